@@ -1,6 +1,7 @@
+import importlib
 import streamlit as st
 from streamlit_option_menu import option_menu
-from python_graphs_CIN.utils import dashboard_utils
+from python_graphs_CIN.utils.data_utils import show_write_status
 
 # Configurar o Streamlit para desativar a sidebar multipáginas automática
 st.set_page_config(
@@ -9,28 +10,42 @@ st.set_page_config(
     initial_sidebar_state="collapsed"  # Colapsa a sidebar padrão, mas usaremos a personalizada
 )
 
-# Importações com tratamento de erro
-try:
-    from python_graphs_CIN.pages import (
-        geral_amplo, informacoes, treina_turma, treina_cidade, produtividade,
-        ag_info_prefeitura, ag_instalacao, ag_visita, chefes_posto, funcionando,
-        geral_resumo, instalados, lista_x, publicados, servicos_a_revisar,
-        upload_excel, visitas_realizadas
-    )
-except ImportError as e:
-    st.error(f"Erro ao importar módulos do pacote 'pages': {str(e)}")
-    st.markdown("""
-    ### Possíveis Soluções
-    - Verifique se todos os arquivos .py estão presentes em `C:\\Users\\re049227\\Documents\\python_graphs_CIN\\pages\\`.
-    - Confirme que os nomes dos arquivos correspondem exatamente aos importados (ex.: `visitas_realizadas.py`, `dashboard_utils.py`).
-    - Execute `dir C:\\Users\\re049227\\Documents\\python_graphs_CIN\\pages\\` para listar os arquivos.
-    """)
-    st.stop()
+# Páginas do menu, na ordem de exibição: rótulo -> (módulo, função que renderiza a página).
+# O módulo só é importado quando a página é aberta pela primeira vez no processo; quem
+# fica na Home não paga a importação das páginas, do plotly e dos carregadores.
+PAGES = {
+    "Ag_info_prefeitura": ("python_graphs_CIN.pages.ag_info_prefeitura", "render_ag_info_prefeitura"),
+    "Ag_instalacao": ("python_graphs_CIN.pages.ag_instalacao", "render_ag_instalacao"),
+    "Ag_visita": ("python_graphs_CIN.pages.ag_visita", "render_ag_visita"),
+    "Chefes_Posto": ("python_graphs_CIN.pages.chefes_posto", "render_chefes_posto"),
+    "Funcionando": ("python_graphs_CIN.pages.funcionando", "render_funcionando"),
+    "Geral_Amplo": ("python_graphs_CIN.pages.geral_amplo", "render_geral_amplo"),
+    "Geral_Resumo": ("python_graphs_CIN.pages.geral_resumo", "render_geral_resumo"),
+    "Informações": ("python_graphs_CIN.pages.informacoes", "render_informacoes"),
+    "Instalados": ("python_graphs_CIN.pages.instalados", "render_instalados"),
+    "Lista_X": ("python_graphs_CIN.pages.lista_x", "render_lista_x"),
+    "Produtividade": ("python_graphs_CIN.pages.produtividade", "render_produtividade"),
+    "Publicados": ("python_graphs_CIN.pages.publicados", "render_publicados"),
+    "Servicos_a_revisar": ("python_graphs_CIN.pages.servicos_a_revisar", "render_servicos_a_revisar"),
+    "Treina_Cidade": ("python_graphs_CIN.pages.treina_cidade", "render_treina_cidade"),
+    "Treina_Turma": ("python_graphs_CIN.pages.treina_turma", "render_treina_turma"),
+    "Upload_Excel": ("python_graphs_CIN.pages.upload_excel", "render_upload_excel"),
+    "Visita_Realizadas": ("python_graphs_CIN.pages.visitas_realizadas", "render_visitas_realizadas"),
+    "Dashboard_Central": ("python_graphs_CIN.utils.dashboard_utils", "render_dashboard_central"),
+}
+
+def load_page(page):
+    """Retorna a função que renderiza a página, importando o módulo dela na primeira vez."""
+    module_name, render_name = PAGES[page]
+    return getattr(importlib.import_module(module_name), render_name)
 
 # Inicializar estado da sessão
 if 'current_page' not in st.session_state:
     st.session_state['current_page'] = 'Home'
 
+# Avisar sobre gravações em segundo plano ainda pendentes ou que falharam
+show_write_status()
+
 def set_page(page):
     if st.session_state['current_page'] != page:
         st.session_state['current_page'] = page
@@ -40,13 +55,8 @@ def set_page(page):
 with st.sidebar:
     page = option_menu(
         "Menu",
-        [
-            "Home", "Ag_info_prefeitura", "Ag_instalacao", "Ag_visita", "Chefes_Posto",
-            "Funcionando", "Geral_Amplo", "Geral_Resumo", "Informações", "Instalados",
-            "Lista_X", "Produtividade", "Publicados", "Servicos_a_revisar", "Treina_Cidade",
-            "Treina_Turma", "Upload_Excel", "Visita_Realizadas", "Dashboard_Central"
-        ],
-        icons=["house"] + ["list-task"] * 18,
+        ["Home"] + list(PAGES),
+        icons=["house"] + ["list-task"] * len(PAGES),
         menu_icon="cast",
         default_index=0,
         key="menu"
@@ -76,48 +86,17 @@ if st.session_state['current_page'] == "Home":
     """, unsafe_allow_html=True)
 
 # Navegação para outras páginas com tratamento de erro
-else:
+elif st.session_state['current_page'] in PAGES:
+    page = st.session_state['current_page']
+    module_name, render_name = PAGES[page]
+    # Caminho do módulo dentro do projeto (ex.: pages\lista_x.py, utils\dashboard_utils.py)
+    module_file = module_name.split('.', 1)[1].replace('.', '\\') + '.py'
     try:
-        if st.session_state['current_page'] == "Geral_Amplo":
-            geral_amplo.render_geral_amplo()
-        elif st.session_state['current_page'] == "Informações":
-            informacoes.render_informacoes()
-        elif st.session_state['current_page'] == "Treina_Turma":
-            treina_turma.render_treina_turma()
-        elif st.session_state['current_page'] == "Treina_Cidade":
-            treina_cidade.render_treina_cidade()
-        elif st.session_state['current_page'] == "Produtividade":
-            produtividade.render_produtividade()
-        elif st.session_state['current_page'] == "Ag_info_prefeitura":
-            ag_info_prefeitura.render_ag_info_prefeitura()
-        elif st.session_state['current_page'] == "Ag_instalacao":
-            ag_instalacao.render_ag_instalacao()
-        elif st.session_state['current_page'] == "Ag_visita":
-            ag_visita.render_ag_visita()
-        elif st.session_state['current_page'] == "Chefes_Posto":
-            chefes_posto.render_chefes_posto()
-        elif st.session_state['current_page'] == "Funcionando":
-            funcionando.render_funcionando()
-        elif st.session_state['current_page'] == "Geral_Resumo":
-            geral_resumo.render_geral_resumo()
-        elif st.session_state['current_page'] == "Instalados":
-            instalados.render_instalados()
-        elif st.session_state['current_page'] == "Lista_X":
-            lista_x.render_lista_x()
-        elif st.session_state['current_page'] == "Publicados":
-            publicados.render_publicados()
-        elif st.session_state['current_page'] == "Servicos_a_revisar":
-            servicos_a_revisar.render_servicos_a_revisar()
-        elif st.session_state['current_page'] == "Upload_Excel":
-            upload_excel.render_upload_excel()
-        elif st.session_state['current_page'] == "Visita_Realizadas":
-            visitas_realizadas.render_visitas_realizadas()
-        elif st.session_state['current_page'] == "Dashboard_Central":
-            dashboard_utils.render_dashboard_central()  # Função correta
+        load_page(page)()
     except Exception as e:
-        st.error(f"Erro ao renderizar a página {st.session_state['current_page']}: {str(e)}")
-        st.markdown("""
+        st.error(f"Erro ao renderizar a página {page}: {str(e)}")
+        st.markdown(f"""
         ### Possíveis Soluções
-        - Verifique se o arquivo `{page}.py` existe em `C:\\Users\\re049227\\Documents\\python_graphs_CIN\\pages\\`.
-        - Confirme se a função `render_{page.lower()}` está definida no arquivo.
+        - Verifique se o arquivo `{module_file}` existe em `C:\\Users\\re049227\\Documents\\python_graphs_CIN\\`.
+        - Confirme se a função `{render_name}` está definida no arquivo.
         """)
\ No newline at end of file
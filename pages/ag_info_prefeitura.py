@@ -1,31 +1,31 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import plotly.express as px
-from python_graphs_CIN.utils.data_utils import EXCEL_FILE, load_excel, process_sheet_data, save_excel, SHEET_CONFIG
+from python_graphs_CIN.utils.data_utils import EXCEL_FILE, load_processed_sheet, save_excel, append_excel_row, patch_excel_row, sheet_cache, shared_frame, category_counts, as_date, display_frame, SHEET_CONFIG, report
 
-@st.cache_data
+@sheet_cache('Ag_info_prefeitura')
+@shared_frame
 def load_and_process_ag_info_prefeitura(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Ag_info_prefeitura com caching."""
     try:
-        raw_df = load_excel('Ag_info_prefeitura', _file_path)
-        if raw_df.empty:
-            st.error("Nenhum dado disponível para a aba 'Ag_info_prefeitura'. Verifique o nome da aba no arquivo Excel.")
+        df = load_processed_sheet('Ag_info_prefeitura', _file_path)
+        if df.empty:
+            report('error', "Nenhum dado disponível para a aba 'Ag_info_prefeitura'. Verifique o nome da aba no arquivo Excel.")
             return pd.DataFrame()
-        
-        df = process_sheet_data(raw_df, 'Ag_info_prefeitura')
         return df
     except Exception as e:
-        st.error(f"Erro ao processar a aba Ag_info_prefeitura: {str(e)}")
+        report('error', f"Erro ao processar a aba Ag_info_prefeitura: {str(e)}")
         return pd.DataFrame()
 
+@shared_frame
 def generate_ag_info_prefeitura_dashboard(df, limite_cidades="Sem Limites"):
     """Gera gráfico para a aba 'Ag_info_prefeitura'."""
+    import plotly.express as px
     if df.empty:
         return None
     
     df_plot = df.head(limite_cidades) if isinstance(limite_cidades, int) else df
-    sit_infra_counts = df_plot['SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA'].value_counts().reset_index()
+    sit_infra_counts = category_counts(df_plot['SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA']).reset_index()
     sit_infra_counts.columns = ['Situação', 'Quantidade']
     fig = px.pie(
         sit_infra_counts,
@@ -50,7 +50,7 @@ def render_ag_info_prefeitura(uploaded_file=None):
         return
     
     st.markdown("### Tabela Completa")
-    st.dataframe(df, use_container_width=True)
+    st.dataframe(display_frame(df, 'Ag_info_prefeitura'), use_container_width=True)
     
     tab1, tab2 = st.tabs(["Dados", "Dashboard"])
     
@@ -71,10 +71,8 @@ def render_ag_info_prefeitura(uploaded_file=None):
                         'SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA': sit_infra,
                         'DATA DA VISITA TÉCNICA': data_visita.strftime('%d/%m/%Y') if data_visita else ''
                     }
-                    df = pd.concat([df, pd.DataFrame([novo])], ignore_index=True)
-                    if save_excel(df, 'Ag_info_prefeitura', file_path):
-                        st.cache_data.clear()
-                        st.success("Registro adicionado!")
+                    if append_excel_row('Ag_info_prefeitura', novo, file_path, background=True):
+                        st.success("Registro enviado para gravação!")
                         st.rerun()
                 else:
                     st.error("Cidade é obrigatória.")
@@ -97,18 +95,19 @@ def render_ag_info_prefeitura(uploaded_file=None):
                     )
                     data_visita_edit = st.date_input(
                         "Data da Visita Técnica (opcional)",
-                        value=pd.to_datetime(row['DATA DA VISITA TÉCNICA'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DA VISITA TÉCNICA']) and row['DATA DA VISITA TÉCNICA'] else None,
+                        value=as_date(row['DATA DA VISITA TÉCNICA']),
                         key="edit_data_visita"
                     )
                     
                     if st.button("Salvar Edição", key="save_button"):
                         if cidade_edit:
-                            df.at[idx, 'CIDADE'] = cidade_edit
-                            df.at[idx, 'SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA'] = sit_infra_edit
-                            df.at[idx, 'DATA DA VISITA TÉCNICA'] = data_visita_edit.strftime('%d/%m/%Y') if data_visita_edit else ''
-                            if save_excel(df, 'Ag_info_prefeitura', file_path):
-                                st.cache_data.clear()
-                                st.success("Registro atualizado!")
+                            alteracoes = {
+                                'CIDADE': cidade_edit,
+                                'SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA': sit_infra_edit,
+                                'DATA DA VISITA TÉCNICA': data_visita_edit.strftime('%d/%m/%Y') if data_visita_edit else ''
+                            }
+                            if patch_excel_row('Ag_info_prefeitura', idx, alteracoes, file_path, background=True, base=df):
+                                st.success("Alteração enviada para gravação!")
                                 st.rerun()
                         else:
                             st.error("Cidade é obrigatória.")
@@ -116,9 +115,8 @@ def render_ag_info_prefeitura(uploaded_file=None):
                 with st.expander("Apagar Registro"):
                     if st.button("Confirmar Apagar", key="delete_button"):
                         df = df.drop(idx).reset_index(drop=True)
-                        if save_excel(df, 'Ag_info_prefeitura', file_path):
-                            st.cache_data.clear()
-                            st.success("Registro removido!")
+                        if save_excel(df, 'Ag_info_prefeitura', file_path, background=True):
+                            st.success("Remoção enviada para gravação!")
                             st.rerun()
             else:
                 st.warning("Nenhuma linha disponível para editar ou apagar.")
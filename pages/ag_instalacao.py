@@ -2,29 +2,27 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 from io import BytesIO
-import openpyxl
-from openpyxl.styles import Font, PatternFill
-from openpyxl.utils.dataframe import dataframe_to_rows
-import plotly.express as px
-from python_graphs_CIN.utils.data_utils import load_excel, process_sheet_data, save_excel, SHEET_CONFIG, EXCEL_FILE
+from python_graphs_CIN.utils.data_utils import load_processed_sheet, save_excel, append_excel_row, sheet_cache, shared_frame, category_counts, as_date, display_frame, SHEET_CONFIG, EXCEL_FILE, report
 
-@st.cache_data
+@sheet_cache('Ag_Instalacao')
+@shared_frame
 def load_and_process_ag_instalacao(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Ag_Instalacao com caching."""
     try:
-        raw_df = load_excel('Ag_Instalacao', _file_path)
-        if raw_df.empty:
-            st.error("Nenhum dado disponível para a aba 'Ag_Instalacao'. Verifique o nome da aba no arquivo Excel.")
+        df = load_processed_sheet('Ag_Instalacao', _file_path)
+        if df.empty:
+            report('error', "Nenhum dado disponível para a aba 'Ag_Instalacao'. Verifique o nome da aba no arquivo Excel.")
             return pd.DataFrame()
-        
-        df = process_sheet_data(raw_df, 'Ag_Instalacao')
         return df
     except Exception as e:
-        st.error(f"Erro ao processar a aba Ag_Instalacao: {str(e)}")
+        report('error', f"Erro ao processar a aba Ag_Instalacao: {str(e)}")
         return pd.DataFrame()
 
 def to_excel(df):
     """Converte DataFrame para Excel com estilização."""
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils.dataframe import dataframe_to_rows
     output = BytesIO()
     workbook = openpyxl.Workbook()
     worksheet = workbook.active
@@ -45,8 +43,10 @@ def to_excel(df):
     workbook.save(output)
     return output.getvalue()
 
+@shared_frame
 def generate_ag_instalacao_dashboards(df, limite_cidades="Sem Limites"):
     """Gera gráficos e relatório para a aba 'Ag_Instalacao'."""
+    import plotly.express as px
     if df.empty:
         return [], pd.DataFrame()
     
@@ -56,7 +56,7 @@ def generate_ag_instalacao_dashboards(df, limite_cidades="Sem Limites"):
     figs = []
     
     # Gráfico 1: Distribuição por Situação da Infra-estrutura
-    sit_infra_counts = df_plot['SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA'].value_counts().reset_index()
+    sit_infra_counts = category_counts(df_plot['SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA']).reset_index()
     sit_infra_counts.columns = ['Situação', 'Quantidade']
     fig1 = px.pie(
         sit_infra_counts,
@@ -69,7 +69,7 @@ def generate_ag_instalacao_dashboards(df, limite_cidades="Sem Limites"):
     figs.append(fig1)
     
     # Gráfico 2: Distribuição por Parecer da Visita Técnica
-    parecer_counts = df_plot['PARECER DA VISITA TÉCNICA'].value_counts().reset_index()
+    parecer_counts = category_counts(df_plot['PARECER DA VISITA TÉCNICA']).reset_index()
     parecer_counts.columns = ['Parecer', 'Quantidade']
     fig2 = px.bar(
         parecer_counts,
@@ -85,7 +85,7 @@ def generate_ag_instalacao_dashboards(df, limite_cidades="Sem Limites"):
     figs.append(fig2)
     
     # Gráfico 3: Status do Termo de Cooperação
-    termo_counts = df_plot['SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO'].value_counts().reset_index()
+    termo_counts = category_counts(df_plot['SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO']).reset_index()
     termo_counts.columns = ['Situação', 'Quantidade']
     fig3 = px.bar(
         termo_counts,
@@ -102,9 +102,6 @@ def generate_ag_instalacao_dashboards(df, limite_cidades="Sem Limites"):
     
     # Relatório de datas
     df_relatorio = df_plot[['CIDADE', 'DATA DO D.O.', 'DATA DA INSTALAÇÃO', 'DATA DO INÍCIO ATEND.']].copy()
-    df_relatorio['DATA DO D.O.'] = pd.to_datetime(df_relatorio['DATA DO D.O.'], format='%d/%m/%Y', errors='coerce')
-    df_relatorio['DATA DA INSTALAÇÃO'] = pd.to_datetime(df_relatorio['DATA DA INSTALAÇÃO'], format='%d/%m/%Y', errors='coerce')
-    df_relatorio['DATA DO INÍCIO ATEND.'] = pd.to_datetime(df_relatorio['DATA DO INÍCIO ATEND.'], format='%d/%m/%Y', errors='coerce')
     
     return figs, df_relatorio
 
@@ -121,7 +118,7 @@ def render_ag_instalacao(uploaded_file=None):
         return
     
     st.markdown("### Tabela Completa")
-    st.dataframe(df, use_container_width=True)
+    st.dataframe(display_frame(df, 'Ag_Instalacao'), use_container_width=True)
     
     # Aba de navegação: Dados e Dashboard
     tab1, tab2 = st.tabs(["Dados", "Dashboard"])
@@ -164,10 +161,8 @@ def render_ag_instalacao(uploaded_file=None):
                         'DATA DA INSTALAÇÃO': data_instalacao.strftime('%d/%m/%Y') if data_instalacao else '',
                         'DATA DO INÍCIO ATEND.': data_inicio_atend.strftime('%d/%m/%Y') if data_inicio_atend else ''
                     }
-                    df = pd.concat([df, pd.DataFrame([novo])], ignore_index=True)
-                    if save_excel(df, 'Ag_Instalacao', file_path):
-                        st.cache_data.clear()
-                        st.success("Registro adicionado!")
+                    if append_excel_row('Ag_Instalacao', novo, file_path, background=True):
+                        st.success("Registro enviado para gravação!")
                         st.rerun()
                 else:
                     st.error("Cidade é obrigatória.")
@@ -205,7 +200,7 @@ def render_ag_instalacao(uploaded_file=None):
                     )
                     data_do_edit = st.date_input(
                         "Data do D.O. (opcional)",
-                        value=pd.to_datetime(row['DATA DO D.O.'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DO D.O.']) and row['DATA DO D.O.'] else None,
+                        value=as_date(row['DATA DO D.O.']),
                         key="edit_data_do"
                     )
                     apto_instalacao_edit = st.checkbox(
@@ -215,12 +210,12 @@ def render_ag_instalacao(uploaded_file=None):
                     )
                     data_instalacao_edit = st.date_input(
                         "Data da Instalação (opcional)",
-                        value=pd.to_datetime(row['DATA DA INSTALAÇÃO'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DA INSTALAÇÃO']) and row['DATA DA INSTALAÇÃO'] else None,
+                        value=as_date(row['DATA DA INSTALAÇÃO']),
                         key="edit_data_instalacao"
                     )
                     data_inicio_atend_edit = st.date_input(
                         "Data do Início Atend. (opcional)",
-                        value=pd.to_datetime(row['DATA DO INÍCIO ATEND.'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DO INÍCIO ATEND.']) and row['DATA DO INÍCIO ATEND.'] else None,
+                        value=as_date(row['DATA DO INÍCIO ATEND.']),
                         key="edit_data_inicio_atend"
                     )
                     
@@ -231,13 +226,12 @@ def render_ag_instalacao(uploaded_file=None):
                             df.at[idx, 'PARECER DA VISITA TÉCNICA'] = parecer_visita_edit
                             df.at[idx, 'REALIZOU TREINAMENTO?'] = realizou_treinamento_edit
                             df.at[idx, 'SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO'] = situacao_termo_edit
-                            df.at[idx, 'DATA DO D.O.'] = data_do_edit.strftime('%d/%m/%Y') if data_do_edit else ''
+                            df.at[idx, 'DATA DO D.O.'] = pd.Timestamp(data_do_edit) if data_do_edit else pd.NaT
                             df.at[idx, 'APTO PARA INSTALAÇÃO'] = apto_instalacao_edit
-                            df.at[idx, 'DATA DA INSTALAÇÃO'] = data_instalacao_edit.strftime('%d/%m/%Y') if data_instalacao_edit else ''
-                            df.at[idx, 'DATA DO INÍCIO ATEND.'] = data_inicio_atend_edit.strftime('%d/%m/%Y') if data_inicio_atend_edit else ''
-                            if save_excel(df, 'Ag_Instalacao', file_path):
-                                st.cache_data.clear()
-                                st.success("Registro atualizado!")
+                            df.at[idx, 'DATA DA INSTALAÇÃO'] = pd.Timestamp(data_instalacao_edit) if data_instalacao_edit else pd.NaT
+                            df.at[idx, 'DATA DO INÍCIO ATEND.'] = pd.Timestamp(data_inicio_atend_edit) if data_inicio_atend_edit else pd.NaT
+                            if save_excel(df, 'Ag_Instalacao', file_path, write_through=True, background=True):
+                                st.success("Alteração enviada para gravação!")
                                 st.rerun()
                         else:
                             st.error("Cidade é obrigatória.")
@@ -245,9 +239,8 @@ def render_ag_instalacao(uploaded_file=None):
                 with st.expander("Apagar Registro"):
                     if st.button("Confirmar Apagar", key="delete_button"):
                         df = df.drop(idx).reset_index(drop=True)
-                        if save_excel(df, 'Ag_Instalacao', file_path):
-                            st.cache_data.clear()
-                            st.success("Registro removido!")
+                        if save_excel(df, 'Ag_Instalacao', file_path, write_through=True, background=True):
+                            st.success("Remoção enviada para gravação!")
                             st.rerun()
             else:
                 st.warning("Nenhuma linha disponível para editar ou apagar.")
@@ -275,7 +268,7 @@ def render_ag_instalacao(uploaded_file=None):
                     {'selector': 'tr:nth-child(even)', 'props': [('background-color', '#f2f2f2')]},
                     {'selector': 'tr:hover', 'props': [('background-color', '#e0e0e0')]}
                 ]).set_properties(**{'font-size': '14px'})
-            st.dataframe(style_dataframe(df_relatorio), use_container_width=True)
+            st.dataframe(style_dataframe(display_frame(df_relatorio, 'Ag_Instalacao')), use_container_width=True)
         
         excel_data = to_excel(df_relatorio)
         st.download_button(
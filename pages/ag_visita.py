@@ -1,26 +1,26 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import plotly.express as px
-from python_graphs_CIN.utils.data_utils import load_excel, process_sheet_data, save_excel, SHEET_CONFIG, EXCEL_FILE
+from python_graphs_CIN.utils.data_utils import load_processed_sheet, save_excel, append_excel_row, patch_excel_row, sheet_cache, shared_frame, category_counts, as_date, display_frame, SHEET_CONFIG, EXCEL_FILE, report
 
-@st.cache_data
+@sheet_cache('Ag. Visita')
+@shared_frame
 def load_and_process_ag_visita(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Ag. Visita com caching."""
     try:
-        raw_df = load_excel('Ag. Visita', _file_path)
-        if raw_df.empty:
-            st.error("Nenhum dado disponível para a aba 'Ag. Visita'. Verifique o nome da aba no arquivo Excel.")
+        df = load_processed_sheet('Ag. Visita', _file_path)
+        if df.empty:
+            report('error', "Nenhum dado disponível para a aba 'Ag. Visita'. Verifique o nome da aba no arquivo Excel.")
             return pd.DataFrame()
-        
-        df = process_sheet_data(raw_df, 'Ag. Visita')
         return df
     except Exception as e:
-        st.error(f"Erro ao processar a aba Ag. Visita: {str(e)}")
+        report('error', f"Erro ao processar a aba Ag. Visita: {str(e)}")
         return pd.DataFrame()
 
+@shared_frame
 def generate_ag_visita_dashboards(df, limite_cidades="Sem Limites"):
     """Gera gráficos para a aba 'Ag. Visita'."""
+    import plotly.express as px
     if df.empty:
         return []
     
@@ -28,7 +28,7 @@ def generate_ag_visita_dashboards(df, limite_cidades="Sem Limites"):
     figs = []
     
     # Gráfico 1: Distribuição por Situação da Infra-estrutura
-    sit_infra_counts = df_plot['SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA'].value_counts().reset_index()
+    sit_infra_counts = category_counts(df_plot['SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA']).reset_index()
     sit_infra_counts.columns = ['Situação', 'Quantidade']
     fig1 = px.pie(
         sit_infra_counts,
@@ -41,7 +41,7 @@ def generate_ag_visita_dashboards(df, limite_cidades="Sem Limites"):
     figs.append(fig1)
     
     # Gráfico 2: Distribuição por Parecer da Visita Técnica
-    parecer_counts = df_plot['PARECER DA VISITA TÉCNICA'].value_counts().reset_index()
+    parecer_counts = category_counts(df_plot['PARECER DA VISITA TÉCNICA']).reset_index()
     parecer_counts.columns = ['Parecer', 'Quantidade']
     fig2 = px.bar(
         parecer_counts,
@@ -57,12 +57,9 @@ def generate_ag_visita_dashboards(df, limite_cidades="Sem Limites"):
     figs.append(fig2)
     
     # Gráfico 3: Visitas por Data
-    df_data = df_plot[df_plot['DATA DA VISITA TÉCNICA'].notna() & (df_plot['DATA DA VISITA TÉCNICA'] != '')]
-    if not df_data.empty:
-        df_data['DATA'] = pd.to_datetime(df_data['DATA DA VISITA TÉCNICA'], format='%d/%m/%Y', errors='coerce')
-        df_data = df_data[df_data['DATA'].notna()]
-        df_data['Mês-Ano'] = df_data['DATA'].dt.strftime('%Y-%m')
-        data_counts = df_data['Mês-Ano'].value_counts().sort_index().reset_index()
+    datas = df_plot['DATA DA VISITA TÉCNICA'].dropna()
+    if not datas.empty:
+        data_counts = datas.dt.strftime('%Y-%m').value_counts().sort_index().reset_index()
         data_counts.columns = ['Mês-Ano', 'Quantidade']
         fig3 = px.line(
             data_counts,
@@ -91,7 +88,7 @@ def render_ag_visita(uploaded_file=None):
         return
     
     st.markdown("### Tabela Completa")
-    st.dataframe(df, use_container_width=True)
+    st.dataframe(display_frame(df, 'Ag. Visita'), use_container_width=True)
     
     tab1, tab2 = st.tabs(["Dados", "Dashboard"])
     
@@ -130,10 +127,8 @@ def render_ag_visita(uploaded_file=None):
                         'ADEQUAÇÕES APÓS VISITA TÉCNICA REALIZADAS': adequacoes_realizadas,
                         'DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES': data_finalizacao.strftime('%d/%m/%Y') if data_finalizacao else ''
                     }
-                    df = pd.concat([df, pd.DataFrame([novo])], ignore_index=True)
-                    if save_excel(df, 'Ag. Visita', file_path):
-                        st.cache_data.clear()
-                        st.success("Registro adicionado!")
+                    if append_excel_row('Ag. Visita', novo, file_path, background=True):
+                        st.success("Registro enviado para gravação!")
                         st.rerun()
                 else:
                     st.error("Cidade é obrigatória.")
@@ -153,7 +148,7 @@ def render_ag_visita(uploaded_file=None):
                     )
                     data_visita_edit = st.date_input(
                         "Data da Visita Técnica (opcional)",
-                        value=pd.to_datetime(row['DATA DA VISITA TÉCNICA'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DA VISITA TÉCNICA']) and row['DATA DA VISITA TÉCNICA'] else None,
+                        value=as_date(row['DATA DA VISITA TÉCNICA']),
                         key="edit_data_visita"
                     )
                     parecer_visita_edit = st.selectbox(
@@ -169,21 +164,22 @@ def render_ag_visita(uploaded_file=None):
                     )
                     data_finalizacao_edit = st.date_input(
                         "Data de Finalização das Adequações (opcional)",
-                        value=pd.to_datetime(row['DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES']) and row['DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES'] else None,
+                        value=as_date(row['DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES']),
                         key="edit_data_finalizacao"
                     )
                     
                     if st.button("Salvar Edição", key="save_button"):
                         if cidade_edit:
-                            df.at[idx, 'CIDADE'] = cidade_edit
-                            df.at[idx, 'SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA'] = sit_infra_edit
-                            df.at[idx, 'DATA DA VISITA TÉCNICA'] = data_visita_edit.strftime('%d/%m/%Y') if data_visita_edit else ''
-                            df.at[idx, 'PARECER DA VISITA TÉCNICA'] = parecer_visita_edit
-                            df.at[idx, 'ADEQUAÇÕES APÓS VISITA TÉCNICA REALIZADAS'] = adequacoes_realizadas_edit
-                            df.at[idx, 'DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES'] = data_finalizacao_edit.strftime('%d/%m/%Y') if data_finalizacao_edit else ''
-                            if save_excel(df, 'Ag. Visita', file_path):
-                                st.cache_data.clear()
-                                st.success("Registro atualizado!")
+                            alteracoes = {
+                                'CIDADE': cidade_edit,
+                                'SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA': sit_infra_edit,
+                                'DATA DA VISITA TÉCNICA': data_visita_edit.strftime('%d/%m/%Y') if data_visita_edit else '',
+                                'PARECER DA VISITA TÉCNICA': parecer_visita_edit,
+                                'ADEQUAÇÕES APÓS VISITA TÉCNICA REALIZADAS': adequacoes_realizadas_edit,
+                                'DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES': data_finalizacao_edit.strftime('%d/%m/%Y') if data_finalizacao_edit else ''
+                            }
+                            if patch_excel_row('Ag. Visita', idx, alteracoes, file_path, background=True, base=df):
+                                st.success("Alteração enviada para gravação!")
                                 st.rerun()
                         else:
                             st.error("Cidade é obrigatória.")
@@ -191,9 +187,8 @@ def render_ag_visita(uploaded_file=None):
                 with st.expander("Apagar Registro"):
                     if st.button("Confirmar Apagar", key="delete_button"):
                         df = df.drop(idx).reset_index(drop=True)
-                        if save_excel(df, 'Ag. Visita', file_path):
-                            st.cache_data.clear()
-                            st.success("Registro removido!")
+                        if save_excel(df, 'Ag. Visita', file_path, background=True):
+                            st.success("Remoção enviada para gravação!")
                             st.rerun()
             else:
                 st.warning("Nenhuma linha disponível para editar ou apagar.")
@@ -1,17 +1,17 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils.data_utils import load_excel, process_sheet_data, save_excel, SHEET_CONFIG, EXCEL_FILE
+from utils.data_utils import load_processed_sheet, save_excel, append_excel_row, patch_excel_row, sheet_cache, shared_frame, as_date, display_frame, SHEET_CONFIG, EXCEL_FILE, report
 
-@st.cache_data
+@sheet_cache('Chefes_Posto')
+@shared_frame
 def load_and_process_chefes_posto(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Chefes_Posto com caching."""
     try:
-        raw_df = load_excel('Chefes_Posto', _file_path)
-        df = process_sheet_data(raw_df, 'Chefes_Posto')
+        df = load_processed_sheet('Chefes_Posto', _file_path)
         return df
     except Exception as e:
-        st.error(f"Erro ao processar a aba Chefes_Posto: {str(e)}")
+        report('error', f"Erro ao processar a aba Chefes_Posto: {str(e)}")
         return pd.DataFrame()
 
 def render_chefes_posto(uploaded_file=None):
@@ -28,7 +28,7 @@ def render_chefes_posto(uploaded_file=None):
         st.warning(f"Colunas ausentes na aba 'Chefes_Posto': {', '.join(missing_columns)}")
     
     st.markdown("### Tabela Completa")
-    st.dataframe(df, use_container_width=True)
+    st.dataframe(display_frame(df, 'Chefes_Posto'), use_container_width=True)
     
     # Aba de navegação: Dados
     tab1 = st.tabs(["Dados"])[0]
@@ -57,10 +57,8 @@ def render_chefes_posto(uploaded_file=None):
                         'Data treinamento': data_treinamento.strftime('%d/%m/%Y') if data_treinamento else '',
                         'Usuário': usuario
                     }
-                    df = pd.concat([df, pd.DataFrame([novo])], ignore_index=True)
-                    if save_excel(df, 'Chefes_Posto', file_path):
-                        st.cache_data.clear()
-                        st.success("Registro adicionado!")
+                    if append_excel_row('Chefes_Posto', novo, file_path, background=True):
+                        st.success("Registro enviado para gravação!")
                         st.rerun()
                 else:
                     st.error("Cidade e Nome são obrigatórios.")
@@ -79,23 +77,24 @@ def render_chefes_posto(uploaded_file=None):
                     telefone_edit = st.text_input("Telefone", value=row['Telefone'], key="edit_telefone")
                     turma_edit = st.number_input("Turma", min_value=0, step=1, value=int(row['Turma']) if pd.notna(row['Turma']) else 0, key="edit_turma")
                     data_treinamento_edit = st.date_input("Data Treinamento (opcional)", 
-                                                         value=pd.to_datetime(row['Data treinamento'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['Data treinamento']) and row['Data treinamento'] else None,
+                                                         value=as_date(row['Data treinamento']),
                                                          key="edit_data_treinamento")
                     usuario_edit = st.text_input("Usuário", value=row['Usuário'], key="edit_usuario")
                     
                     if st.button("Salvar Edição", key="save_button"):
                         if cidade_edit and nome_edit:
-                            df.at[idx, 'Cidade'] = cidade_edit
-                            df.at[idx, 'Posto'] = posto_edit
-                            df.at[idx, 'Nome'] = nome_edit
-                            df.at[idx, 'E-mail'] = email_edit
-                            df.at[idx, 'Telefone'] = telefone_edit
-                            df.at[idx, 'Turma'] = turma_edit
-                            df.at[idx, 'Data treinamento'] = data_treinamento_edit.strftime('%d/%m/%Y') if data_treinamento_edit else ''
-                            df.at[idx, 'Usuário'] = usuario_edit
-                            if save_excel(df, 'Chefes_Posto', file_path):
-                                st.cache_data.clear()
-                                st.success("Registro atualizado!")
+                            alteracoes = {
+                                'Cidade': cidade_edit,
+                                'Posto': posto_edit,
+                                'Nome': nome_edit,
+                                'E-mail': email_edit,
+                                'Telefone': telefone_edit,
+                                'Turma': turma_edit,
+                                'Data treinamento': data_treinamento_edit.strftime('%d/%m/%Y') if data_treinamento_edit else '',
+                                'Usuário': usuario_edit
+                            }
+                            if patch_excel_row('Chefes_Posto', idx, alteracoes, file_path, background=True, base=df):
+                                st.success("Alteração enviada para gravação!")
                                 st.rerun()
                         else:
                             st.error("Cidade e Nome são obrigatórios.")
@@ -103,9 +102,8 @@ def render_chefes_posto(uploaded_file=None):
                 with st.expander("Apagar Registro"):
                     if st.button("Confirmar Apagar", key="delete_button"):
                         df = df.drop(idx).reset_index(drop=True)
-                        if save_excel(df, 'Chefes_Posto', file_path):
-                            st.cache_data.clear()
-                            st.success("Registro removido!")
+                        if save_excel(df, 'Chefes_Posto', file_path, background=True):
+                            st.success("Remoção enviada para gravação!")
                             st.rerun()
             else:
                 st.warning("Nenhuma linha disponível para editar ou apagar.")
\ No newline at end of file
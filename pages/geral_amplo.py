@@ -1,17 +1,17 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils.data_utils import load_excel, process_sheet_data, save_excel, SHEET_CONFIG, EXCEL_FILE
+from utils.data_utils import load_processed_sheet, save_excel, append_excel_row, patch_excel_row, sheet_cache, shared_frame, as_date, display_frame, SHEET_CONFIG, EXCEL_FILE, report
 
-@st.cache_data
+@sheet_cache('Geral-Amplo')
+@shared_frame
 def load_and_process_geral_amplo(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Geral-Amplo com caching."""
     try:
-        raw_df = load_excel('Geral-Amplo', _file_path)
-        df = process_sheet_data(raw_df, 'Geral-Amplo')
+        df = load_processed_sheet('Geral-Amplo', _file_path)
         return df
     except Exception as e:
-        st.error(f"Erro ao processar a aba Geral-Amplo: {str(e)}")
+        report('error', f"Erro ao processar a aba Geral-Amplo: {str(e)}")
         return pd.DataFrame()
 
 def render_geral_amplo(uploaded_file=None):
@@ -28,7 +28,7 @@ def render_geral_amplo(uploaded_file=None):
         st.warning(f"Colunas ausentes na aba 'Geral-Amplo': {', '.join(missing_columns)}")
     
     st.markdown("### Tabela Completa")
-    st.dataframe(df, use_container_width=True)
+    st.dataframe(display_frame(df, 'Geral-Amplo'), use_container_width=True)
     
     # Aba de navegação: Dados
     tab1 = st.tabs(["Dados"])[0]
@@ -79,10 +79,8 @@ def render_geral_amplo(uploaded_file=None):
                         'DATA ASSINATURA': data_assinatura.strftime('%d/%m/%Y') if data_assinatura else '',
                         'PREVISÃO AJUSTE ESTRUTURA P/ VISITA': previsao_ajuste
                     }
-                    df = pd.concat([df, pd.DataFrame([novo])], ignore_index=True)
-                    if save_excel(df, 'Geral-Amplo', file_path):
-                        st.cache_data.clear()
-                        st.success("Registro adicionado!")
+                    if append_excel_row('Geral-Amplo', novo, file_path, background=True):
+                        st.success("Registro enviado para gravação!")
                         st.rerun()
                 else:
                     st.error("Cidade é obrigatória.")
@@ -100,7 +98,7 @@ def render_geral_amplo(uploaded_file=None):
                                                   index=SHEET_CONFIG['Geral-Amplo']['columns']['SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA']['values'].index(row['SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA']) if row['SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA'] in SHEET_CONFIG['Geral-Amplo']['columns']['SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA']['values'] else 0,
                                                   key="edit_sit_infra")
                     data_visita_edit = st.date_input("Data da Visita Técnica (opcional)", 
-                                                     value=pd.to_datetime(row['DATA DA VISITA TÉCNICA'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DA VISITA TÉCNICA']) and row['DATA DA VISITA TÉCNICA'] else None,
+                                                     value=as_date(row['DATA DA VISITA TÉCNICA']),
                                                      key="edit_data_visita")
                     parecer_visita_edit = st.selectbox("Parecer da Visita Técnica", 
                                                        SHEET_CONFIG['Geral-Amplo']['columns']['PARECER DA VISITA TÉCNICA']['values'],
@@ -109,55 +107,56 @@ def render_geral_amplo(uploaded_file=None):
                     adequacoes_realizadas_edit = st.checkbox("Adequações Após Visita Técnica Realizadas?", 
                                                             value=row['ADEQUEÇÕES APÓS VISITA TÉCNICA REALIZADAS?'], key="edit_adequacoes")
                     data_finalizacao_edit = st.date_input("Data de Finalização das Adequações (opcional)", 
-                                                          value=pd.to_datetime(row['DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES']) and row['DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES'] else None,
+                                                          value=as_date(row['DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES']),
                                                           key="edit_data_finalizacao")
                     periodo_inicio_edit = st.date_input("Período Previsto de Treinamento - Início (opcional)", 
-                                                        value=pd.to_datetime(row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO']) and row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'] else None,
+                                                        value=as_date(row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO']),
                                                         key="edit_periodo_inicio")
                     periodo_fim_edit = st.date_input("Período Previsto de Treinamento - Fim (opcional)", 
-                                                     value=pd.to_datetime(row['PERÍODO PREVISTO DE TREINAMENTO_FIM'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['PERÍODO PREVISTO DE TREINAMENTO_FIM']) and row['PERÍODO PREVISTO DE TREINAMENTO_FIM'] else None,
+                                                     value=as_date(row['PERÍODO PREVISTO DE TREINAMENTO_FIM']),
                                                      key="edit_periodo_fim")
                     turma_edit = st.number_input("Turma", min_value=0, step=1, value=int(row['TURMA']) if pd.notna(row['TURMA']) else 0, key="edit_turma")
                     realizou_treinamento_edit = st.checkbox("Realizou Treinamento?", value=row['REALIZOU TREINAMENTO?'], key="edit_realizou_treinamento")
                     situacao_termo_edit = st.text_input("Situação do Novo Termo de Cooperação", value=row['SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO'], key="edit_situacao_termo")
                     data_do_edit = st.date_input("Data do D.O. (opcional)", 
-                                                 value=pd.to_datetime(row['DATA DO D.O.'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DO D.O.']) and row['DATA DO D.O.'] else None,
+                                                 value=as_date(row['DATA DO D.O.']),
                                                  key="edit_data_do")
                     apto_instalacao_edit = st.checkbox("Apto para Instalação?", value=row['APTO PARA INSTALAÇÃO?'], key="edit_apto_instalacao")
                     data_instalacao_edit = st.date_input("Data da Instalação (opcional)", 
-                                                        value=pd.to_datetime(row['DATA DA INSTALAÇÃO'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DA INSTALAÇÃO']) and row['DATA DA INSTALAÇÃO'] else None,
+                                                        value=as_date(row['DATA DA INSTALAÇÃO']),
                                                         key="edit_data_instalacao")
                     data_inicio_atend_edit = st.date_input("Data do Início Atend. (opcional)", 
-                                                          value=pd.to_datetime(row['DATA DO INÍCIO ATEND.'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DO INÍCIO ATEND.']) and row['DATA DO INÍCIO ATEND.'] else None,
+                                                          value=as_date(row['DATA DO INÍCIO ATEND.']),
                                                           key="edit_data_inicio_atend")
                     data_assinatura_edit = st.date_input("Data Assinatura (opcional)", 
-                                                        value=pd.to_datetime(row['DATA ASSINATURA'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA ASSINATURA']) and row['DATA ASSINATURA'] else None,
+                                                        value=as_date(row['DATA ASSINATURA']),
                                                         key="edit_data_assinatura")
                     previsao_ajuste_edit = st.text_input("Previsão Ajuste Estrutura p/ Visita", 
                                                          value=row['PREVISÃO AJUSTE ESTRUTURA P/ VISITA'], key="edit_previsao_ajuste")
                     
                     if st.button("Salvar Edição", key="save_button"):
                         if cidade_edit:
-                            df.at[idx, 'CIDADE'] = cidade_edit
-                            df.at[idx, 'SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA'] = sit_infra_edit
-                            df.at[idx, 'DATA DA VISITA TÉCNICA'] = data_visita_edit.strftime('%d/%m/%Y') if data_visita_edit else ''
-                            df.at[idx, 'PARECER DA VISITA TÉCNICA'] = parecer_visita_edit
-                            df.at[idx, 'ADEQUEÇÕES APÓS VISITA TÉCNICA REALIZADAS?'] = adequacoes_realizadas_edit
-                            df.at[idx, 'DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES'] = data_finalizacao_edit.strftime('%d/%m/%Y') if data_finalizacao_edit else ''
-                            df.at[idx, 'PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'] = periodo_inicio_edit.strftime('%d/%m/%Y') if periodo_inicio_edit else ''
-                            df.at[idx, 'PERÍODO PREVISTO DE TREINAMENTO_FIM'] = periodo_fim_edit.strftime('%d/%m/%Y') if periodo_fim_edit else ''
-                            df.at[idx, 'TURMA'] = turma_edit
-                            df.at[idx, 'REALIZOU TREINAMENTO?'] = realizou_treinamento_edit
-                            df.at[idx, 'SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO'] = situacao_termo_edit
-                            df.at[idx, 'DATA DO D.O.'] = data_do_edit.strftime('%d/%m/%Y') if data_do_edit else ''
-                            df.at[idx, 'APTO PARA INSTALAÇÃO?'] = apto_instalacao_edit
-                            df.at[idx, 'DATA DA INSTALAÇÃO'] = data_instalacao_edit.strftime('%d/%m/%Y') if data_instalacao_edit else ''
-                            df.at[idx, 'DATA DO INÍCIO ATEND.'] = data_inicio_atend_edit.strftime('%d/%m/%Y') if data_inicio_atend_edit else ''
-                            df.at[idx, 'DATA ASSINATURA'] = data_assinatura_edit.strftime('%d/%m/%Y') if data_assinatura_edit else ''
-                            df.at[idx, 'PREVISÃO AJUSTE ESTRUTURA P/ VISITA'] = previsao_ajuste_edit
-                            if save_excel(df, 'Geral-Amplo', file_path):
-                                st.cache_data.clear()
-                                st.success("Registro atualizado!")
+                            alteracoes = {
+                                'CIDADE': cidade_edit,
+                                'SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA': sit_infra_edit,
+                                'DATA DA VISITA TÉCNICA': data_visita_edit.strftime('%d/%m/%Y') if data_visita_edit else '',
+                                'PARECER DA VISITA TÉCNICA': parecer_visita_edit,
+                                'ADEQUEÇÕES APÓS VISITA TÉCNICA REALIZADAS?': adequacoes_realizadas_edit,
+                                'DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES': data_finalizacao_edit.strftime('%d/%m/%Y') if data_finalizacao_edit else '',
+                                'PERÍODO PREVISTO DE TREINAMENTO_INÍCIO': periodo_inicio_edit.strftime('%d/%m/%Y') if periodo_inicio_edit else '',
+                                'PERÍODO PREVISTO DE TREINAMENTO_FIM': periodo_fim_edit.strftime('%d/%m/%Y') if periodo_fim_edit else '',
+                                'TURMA': turma_edit,
+                                'REALIZOU TREINAMENTO?': realizou_treinamento_edit,
+                                'SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO': situacao_termo_edit,
+                                'DATA DO D.O.': data_do_edit.strftime('%d/%m/%Y') if data_do_edit else '',
+                                'APTO PARA INSTALAÇÃO?': apto_instalacao_edit,
+                                'DATA DA INSTALAÇÃO': data_instalacao_edit.strftime('%d/%m/%Y') if data_instalacao_edit else '',
+                                'DATA DO INÍCIO ATEND.': data_inicio_atend_edit.strftime('%d/%m/%Y') if data_inicio_atend_edit else '',
+                                'DATA ASSINATURA': data_assinatura_edit.strftime('%d/%m/%Y') if data_assinatura_edit else '',
+                                'PREVISÃO AJUSTE ESTRUTURA P/ VISITA': previsao_ajuste_edit
+                            }
+                            if patch_excel_row('Geral-Amplo', idx, alteracoes, file_path, background=True, base=df):
+                                st.success("Alteração enviada para gravação!")
                                 st.rerun()
                         else:
                             st.error("Cidade é obrigatória.")
@@ -165,9 +164,8 @@ def render_geral_amplo(uploaded_file=None):
                 with st.expander("Apagar Registro"):
                     if st.button("Confirmar Apagar", key="delete_button"):
                         df = df.drop(idx).reset_index(drop=True)
-                        if save_excel(df, 'Geral-Amplo', file_path):
-                            st.cache_data.clear()
-                            st.success("Registro removido!")
+                        if save_excel(df, 'Geral-Amplo', file_path, background=True):
+                            st.success("Remoção enviada para gravação!")
                             st.rerun()
             else:
                 st.warning("Nenhuma linha disponível para editar ou apagar.")
\ No newline at end of file
@@ -1,57 +1,53 @@
 import streamlit as st
 import pandas as pd
 import os
-from utils.data_utils import load_excel, process_sheet_data
+from utils.data_utils import SHEET_CONFIG, load_processed_sheet, process_sheet_data, phone_text, sheet_cache, shared_frame, invalidate_sheet, report
 import webbrowser
 import time
-import re
 
-@st.cache_data
+def _phones_as_text(df):
+    """Telefones mantidos como digitados ('keep_original') em texto, antes do astype(str):
+    '' nas células vazias em vez de 'nan' e sem o '.0' dos números guardados como float."""
+    columns = [
+        col for col, col_config in SHEET_CONFIG['Informações']['columns'].items()
+        if col_config.get('keep_original') and col in df.columns
+    ]
+    return df.assign(**{col: phone_text(df[col]) for col in columns})
+
+@sheet_cache('Informações')
+@shared_frame
 def load_and_process_informacoes(_retry_count=0, _max_retries=2):
     """Carrega e processa a aba Informações com caching e retry."""
-    with st.spinner("Carregando dados. Isso pode levar alguns minutos..."):
-        try:
-            # Verifica se infosgerais.xlsx existe
-            infos_file = 'infosgerais.xlsx'
-            if os.path.exists(infos_file):
-                raw_df = pd.read_excel(infos_file, sheet_name='Informações')
-            else:
-                # Carrega de load_excel e cria o arquivo se não existir
-                raw_df = load_excel('Informações')
-                if not raw_df.empty:
-                    df = process_sheet_data(raw_df, 'Informações')
-                    # Garantir que todas as colunas sejam strings para evitar erros de tipo
-                    df = df.astype(str)
-                    # Salvar em infosgerais.xlsx
-                    df.to_excel(infos_file, sheet_name='Informações', index=False)
-                else:
-                    st.error("Nenhum dado carregado para a aba 'Informações' no arquivo original.")
-                    return pd.DataFrame()
-
+    try:
+        # Verifica se infosgerais.xlsx existe
+        infos_file = 'infosgerais.xlsx'
+        if os.path.exists(infos_file):
+            raw_df = pd.read_excel(infos_file, sheet_name='Informações')
             if raw_df.empty:
-                st.error("Nenhum dado carregado para a aba 'Informações' no arquivo infosgerais.xlsx.")
+                report('error', "Nenhum dado carregado para a aba 'Informações' no arquivo infosgerais.xlsx.")
                 return pd.DataFrame()
-
-            df = process_sheet_data(raw_df, 'Informações')
-            # Forçar conversão para string para evitar erros de serialização
-            df = df.astype(str)
-            return df
-        except Exception as e:
-            if _retry_count < _max_retries:
-                st.warning(f"Erro ao carregar dados (tentativa {_retry_count + 1}/{_max_retries + 1}): {str(e)}. Tentando novamente...")
-                time.sleep(1)  # Pausa de 1 segundo antes de retry
-                return load_and_process_informacoes(_retry_count + 1, _max_retries)
-            else:
-                st.error(f"Falha após {_max_retries + 1} tentativas: {str(e)}")
+            df = _phones_as_text(process_sheet_data(raw_df, 'Informações'))
+        else:
+            # Carrega do arquivo original (lida em streaming, veja SHEET_CONFIG) e cria o arquivo
+            df = load_processed_sheet('Informações')
+            if df.empty:
+                report('error', "Nenhum dado carregado para a aba 'Informações' no arquivo original.")
                 return pd.DataFrame()
+            df = _phones_as_text(df)
+            # Salvar em infosgerais.xlsx, com todas as colunas como strings para evitar erros de tipo
+            df.astype(str).to_excel(infos_file, sheet_name='Informações', index=False)
 
-def generate_whatsapp_link(phone_number):
-    if pd.notna(phone_number) and str(phone_number).strip():
-        # Remove caracteres não numéricos e adiciona o código do país (ex.: +55 para Brasil)
-        phone = re.sub(r'[^\d]', '', str(phone_number))
-        if phone and len(phone) >= 10:
-            return f"https://wa.me/55{phone}" if phone.startswith('55') else f"https://wa.me/55{phone}"
-    return None
+        # Forçar conversão para string para evitar erros de serialização
+        df = df.astype(str)
+        return df
+    except Exception as e:
+        if _retry_count < _max_retries:
+            report('warning', f"Erro ao carregar dados (tentativa {_retry_count + 1}/{_max_retries + 1}): {str(e)}. Tentando novamente...")
+            time.sleep(1)  # Pausa de 1 segundo antes de retry
+            return load_and_process_informacoes(_retry_count + 1, _max_retries)
+        else:
+            report('error', f"Falha após {_max_retries + 1} tentativas: {str(e)}")
+            return pd.DataFrame()
 
 def generate_email_link(email, subject="Contato sobre Informações", body="Olá, gostaria de obter mais informações."):
     if pd.notna(email) and str(email).strip():
@@ -81,11 +77,12 @@ def render_informacoes():
     
     # Botão para atualizar informações
     if st.button("Atualizar Infos"):
-        st.cache_data.clear()  # Limpa o cache para forçar recarga
+        invalidate_sheet('Informações')  # Limpa só o cache desta aba para forçar recarga
         st.experimental_rerun()  # Usa experimental_rerun para melhor controle
 
     # Carregar dados
-    df = load_and_process_informacoes()
+    with st.spinner("Carregando dados. Isso pode levar alguns minutos..."):
+        df = load_and_process_informacoes()
     if df.empty:
         st.markdown("""
         ### Possíveis Soluções
@@ -98,8 +95,9 @@ def render_informacoes():
     # Verificar colunas esperadas
     expected_columns = [
         'data/hora', 'Cidade', 'Nome do chefe de posto', 'Telefone Celular chefe de posto',
-        'Link WhatsApp', 'E-mail chefe de posto', 'Nome do Secretário/Coordenador',
-        'Telefone do Secretário', 'Link WhatsApp 2', 'Endereço do Posto', 'CEP',
+        'Telefone Celular chefe de posto (E.164)', 'Link WhatsApp', 'E-mail chefe de posto',
+        'Nome do Secretário/Coordenador', 'Telefone do Secretário', 'Telefone do Secretário (E.164)',
+        'Link WhatsApp 2', 'Endereço do Posto', 'CEP',
         'Ponto de referência do endereço', 'Telefone Fixo', 'Horário de abertura',
         'Horário de Fechamento', 'E-mail da Prefeitura', 'Telefone da Prefeitura',
         'PENDÊNCIA P/ VISITA TÉCNICA', 'Código do Posto', 'PREVISÃO AJUSTE ESTRUTURA P/ VISITA'
@@ -108,13 +106,11 @@ def render_informacoes():
     if missing_columns:
         st.warning(f"Colunas ausentes na aba 'Informações': {', '.join(missing_columns)}")
     
-    # Carregar dados na sessão
-    st.session_state['data_informacoes'] = df
-    df = st.session_state.get('data_informacoes', df)
-    
-    # Gerar links de WhatsApp
-    df['Link WhatsApp'] = df['Telefone Celular chefe de posto'].apply(generate_whatsapp_link)
-    df['Link WhatsApp 2'] = df['Telefone do Secretário'].apply(generate_whatsapp_link)
+    # `df` já é a aba compartilhada pelo processo (veja shared_frame); guardar outra cópia
+    # em st.session_state só multiplicaria a memória pelo número de sessões
+    # Os telefones ficam como foram digitados; as colunas '(E.164)', 'Link WhatsApp' e
+    # 'Link WhatsApp 2' já vêm de process_sheet_data (chaves 'e164' e 'whatsapp' dos
+    # telefones em SHEET_CONFIG), calculadas uma vez por carga da aba
     
     # Interface de busca
     with st.container():
@@ -1,45 +1,30 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils.data_utils import load_excel, process_sheet_data, save_excel, SHEET_CONFIG, EXCEL_FILE
-import plotly.express as px
+from utils.data_utils import load_processed_sheet, save_excel, append_excel_row, patch_excel_row, sheet_cache, shared_frame, as_date, as_dates, display_frame, SHEET_CONFIG, EXCEL_FILE, report
 from io import BytesIO
-import openpyxl
-from openpyxl.styles import Font, PatternFill
-from openpyxl.utils.dataframe import dataframe_to_rows
 
-@st.cache_data
+@sheet_cache('Instalados')
+@shared_frame
 def load_and_process_instalados(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Instalados com caching."""
     try:
-        raw_df = load_excel('Instalados', _file_path)
-        if raw_df.empty:
-            st.error("Nenhum dado disponível para a aba 'Instalados'. Verifique o nome da aba no arquivo Excel.")
+        # Como nas outras páginas, a aba processada leva a versão (versao_aba) usada por
+        # patch_excel_row e save_excel para recusar gravações sobre dados antigos
+        df = load_processed_sheet('Instalados', _file_path)
+        if df.empty:
+            report('error', "Nenhum dado disponível para a aba 'Instalados'. Verifique o nome da aba no arquivo Excel.")
             return pd.DataFrame()
-        
-        # Verificar colunas esperadas
-        expected_columns = list(SHEET_CONFIG['Instalados']['columns'].keys())
-        missing_columns = [col for col in expected_columns if col not in raw_df.columns]
-        if missing_columns:
-            for col in missing_columns:
-                col_type = SHEET_CONFIG['Instalados']['columns'][col].get('type', 'string')
-                if col_type == 'date':
-                    raw_df[col] = pd.NaT
-                elif col_type == 'categorical':
-                    raw_df[col] = ''
-                elif col_type == 'boolean':
-                    raw_df[col] = False
-                else:
-                    raw_df[col] = ''
-        
-        df = process_sheet_data(raw_df, 'Instalados')
         return df
     except Exception as e:
-        st.error(f"Erro ao processar a aba Instalados: {str(e)}")
+        report('error', f"Erro ao processar a aba Instalados: {str(e)}")
         return pd.DataFrame()
 
 def to_excel(df):
     """Converte DataFrame para Excel com estilização."""
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils.dataframe import dataframe_to_rows
     output = BytesIO()
     workbook = openpyxl.Workbook()
     worksheet = workbook.active
@@ -61,6 +46,7 @@ def to_excel(df):
     return output.getvalue()
 
 def render_instalados(uploaded_file=None):
+    import plotly.express as px
     st.markdown("""
         <h3>Instalados <span class="material-icons" style="vertical-align: middle; color: #004aad;">check_circle</span></h3>
     """, unsafe_allow_html=True)
@@ -73,7 +59,7 @@ def render_instalados(uploaded_file=None):
         return
     
     st.markdown("### Tabela Completa")
-    st.dataframe(df, use_container_width=True)
+    st.dataframe(display_frame(df, 'Instalados'), use_container_width=True)
     
     # Aba de navegação: Dados e Dashboard
     tab1, tab2 = st.tabs(["Dados", "Dashboard"])
@@ -106,10 +92,8 @@ def render_instalados(uploaded_file=None):
                         'DATA DA INSTALAÇÃO': data_instalacao.strftime('%d/%m/%Y') if data_instalacao else '',
                         'DATA DO INÍCIO ATEND.': data_inicio_atend.strftime('%d/%m/%Y') if data_inicio_atend else ''
                     }
-                    df = pd.concat([df, pd.DataFrame([novo])], ignore_index=True)
-                    if save_excel(df, 'Instalados', file_path):
-                        st.cache_data.clear()
-                        st.success("Registro adicionado!")
+                    if append_excel_row('Instalados', novo, file_path, background=True):
+                        st.success("Registro enviado para gravação!")
                         st.rerun()
                 else:
                     st.error("Cidade é obrigatória.")
@@ -127,37 +111,38 @@ def render_instalados(uploaded_file=None):
                                                        index=SHEET_CONFIG['Instalados']['columns']['PARECER DA VISITA TÉCNICA']['values'].index(row['PARECER DA VISITA TÉCNICA']) if row['PARECER DA VISITA TÉCNICA'] in SHEET_CONFIG['Instalados']['columns']['PARECER DA VISITA TÉCNICA']['values'] else 0,
                                                        key="edit_parecer_visita")
                     periodo_inicio_edit = st.date_input("Período Previsto de Treinamento - Início (opcional)", 
-                                                        value=pd.to_datetime(row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO']) and row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'] else None,
+                                                        value=as_date(row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO']),
                                                         key="edit_periodo_inicio")
                     periodo_fim_edit = st.date_input("Período Previsto de Treinamento - Fim (opcional)", 
-                                                     value=pd.to_datetime(row['PERÍODO PREVISTO DE TREINAMENTO_FIM'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['PERÍODO PREVISTO DE TREINAMENTO_FIM']) and row['PERÍODO PREVISTO DE TREINAMENTO_FIM'] else None,
+                                                     value=as_date(row['PERÍODO PREVISTO DE TREINAMENTO_FIM']),
                                                      key="edit_periodo_fim")
                     situacao_termo_edit = st.text_input("Situação do Novo Termo de Cooperação", value=row['SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO'], key="edit_situacao_termo")
                     data_do_edit = st.date_input("Data do D.O. (opcional)", 
-                                                 value=pd.to_datetime(row['DATA DO D.O.'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DO D.O.']) and row['DATA DO D.O.'] else None,
+                                                 value=as_date(row['DATA DO D.O.']),
                                                  key="edit_data_do")
                     apto_instalacao_edit = st.checkbox("Apto para Instalação?", value=row['APTO PARA INSTALAÇÃO?'], key="edit_apto_instalacao")
                     data_instalacao_edit = st.date_input("Data da Instalação (opcional)", 
-                                                        value=pd.to_datetime(row['DATA DA INSTALAÇÃO'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DA INSTALAÇÃO']) and row['DATA DA INSTALAÇÃO'] else None,
+                                                        value=as_date(row['DATA DA INSTALAÇÃO']),
                                                         key="edit_data_instalacao")
                     data_inicio_atend_edit = st.date_input("Data do Início Atend. (opcional)", 
-                                                          value=pd.to_datetime(row['DATA DO INÍCIO ATEND.'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DO INÍCIO ATEND.']) and row['DATA DO INÍCIO ATEND.'] else None,
+                                                          value=as_date(row['DATA DO INÍCIO ATEND.']),
                                                           key="edit_data_inicio_atend")
                     
                     if st.button("Salvar Edição", key="save_button"):
                         if cidade_edit:
-                            df.at[idx, 'CIDADE'] = cidade_edit
-                            df.at[idx, 'PARECER DA VISITA TÉCNICA'] = parecer_visita_edit
-                            df.at[idx, 'PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'] = periodo_inicio_edit.strftime('%d/%m/%Y') if periodo_inicio_edit else ''
-                            df.at[idx, 'PERÍODO PREVISTO DE TREINAMENTO_FIM'] = periodo_fim_edit.strftime('%d/%m/%Y') if periodo_fim_edit else ''
-                            df.at[idx, 'SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO'] = situacao_termo_edit
-                            df.at[idx, 'DATA DO D.O.'] = data_do_edit.strftime('%d/%m/%Y') if data_do_edit else ''
-                            df.at[idx, 'APTO PARA INSTALAÇÃO?'] = apto_instalacao_edit
-                            df.at[idx, 'DATA DA INSTALAÇÃO'] = data_instalacao_edit.strftime('%d/%m/%Y') if data_instalacao_edit else ''
-                            df.at[idx, 'DATA DO INÍCIO ATEND.'] = data_inicio_atend_edit.strftime('%d/%m/%Y') if data_inicio_atend_edit else ''
-                            if save_excel(df, 'Instalados', file_path):
-                                st.cache_data.clear()
-                                st.success("Registro atualizado!")
+                            alteracoes = {
+                                'CIDADE': cidade_edit,
+                                'PARECER DA VISITA TÉCNICA': parecer_visita_edit,
+                                'PERÍODO PREVISTO DE TREINAMENTO_INÍCIO': periodo_inicio_edit.strftime('%d/%m/%Y') if periodo_inicio_edit else '',
+                                'PERÍODO PREVISTO DE TREINAMENTO_FIM': periodo_fim_edit.strftime('%d/%m/%Y') if periodo_fim_edit else '',
+                                'SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO': situacao_termo_edit,
+                                'DATA DO D.O.': data_do_edit.strftime('%d/%m/%Y') if data_do_edit else '',
+                                'APTO PARA INSTALAÇÃO?': apto_instalacao_edit,
+                                'DATA DA INSTALAÇÃO': data_instalacao_edit.strftime('%d/%m/%Y') if data_instalacao_edit else '',
+                                'DATA DO INÍCIO ATEND.': data_inicio_atend_edit.strftime('%d/%m/%Y') if data_inicio_atend_edit else ''
+                            }
+                            if patch_excel_row('Instalados', idx, alteracoes, file_path, background=True, base=df):
+                                st.success("Alteração enviada para gravação!")
                                 st.rerun()
                         else:
                             st.error("Cidade é obrigatória.")
@@ -165,9 +150,8 @@ def render_instalados(uploaded_file=None):
                 with st.expander("Apagar Registro"):
                     if st.button("Confirmar Apagar", key="delete_button"):
                         df = df.drop(idx).reset_index(drop=True)
-                        if save_excel(df, 'Instalados', file_path):
-                            st.cache_data.clear()
-                            st.success("Registro removido!")
+                        if save_excel(df, 'Instalados', file_path, background=True):
+                            st.success("Remoção enviada para gravação!")
                             st.rerun()
             else:
                 st.warning("Nenhuma linha disponível para editar ou apagar.")
@@ -241,24 +225,13 @@ def render_instalados(uploaded_file=None):
         # Relatório de Datas (idêntico ao de ag_instalacao)
         st.markdown("#### Relatório de Datas por Cidade")
         df_relatorio = df_grafico[['CIDADE', 'DATA DO D.O.', 'DATA DA INSTALAÇÃO', 'DATA DO INÍCIO ATEND.']].copy()
-        df_relatorio['DO para Instalação (Dias)'] = 0
-        df_relatorio['Instalação para Atendimento (Dias)'] = 0
-        df_relatorio['DO para Atendimento (Dias)'] = 0
-        
-        for idx, row in df_relatorio.iterrows():
-            try:
-                data_do = pd.to_datetime(row['DATA DO D.O.'], format='%d/%m/%Y', errors='coerce')
-                data_instalacao = pd.to_datetime(row['DATA DA INSTALAÇÃO'], format='%d/%m/%Y', errors='coerce')
-                data_inicio_atend = pd.to_datetime(row['DATA DO INÍCIO ATEND.'], format='%d/%m/%Y', errors='coerce')
-                
-                if pd.notna(data_do) and pd.notna(data_instalacao):
-                    df_relatorio.at[idx, 'DO para Instalação (Dias)'] = (data_instalacao - data_do).days
-                if pd.notna(data_instalacao) and pd.notna(data_inicio_atend):
-                    df_relatorio.at[idx, 'Instalação para Atendimento (Dias)'] = (data_inicio_atend - data_instalacao).days
-                if pd.notna(data_do) and pd.notna(data_inicio_atend):
-                    df_relatorio.at[idx, 'DO para Atendimento (Dias)'] = (data_inicio_atend - data_do).days
-            except Exception as e:
-                st.warning(f"Erro ao calcular tempos para a cidade {row['CIDADE']}: {str(e)}")
+        # Intervalos em dias; 0 quando alguma das duas datas está vazia
+        data_do = as_dates(df_relatorio['DATA DO D.O.'])
+        data_instalacao = as_dates(df_relatorio['DATA DA INSTALAÇÃO'])
+        data_inicio_atend = as_dates(df_relatorio['DATA DO INÍCIO ATEND.'])
+        df_relatorio['DO para Instalação (Dias)'] = (data_instalacao - data_do).dt.days.fillna(0).astype(int)
+        df_relatorio['Instalação para Atendimento (Dias)'] = (data_inicio_atend - data_instalacao).dt.days.fillna(0).astype(int)
+        df_relatorio['DO para Atendimento (Dias)'] = (data_inicio_atend - data_do).dt.days.fillna(0).astype(int)
         
         # Estilizar o DataFrame
         def style_dataframe(df):
@@ -269,6 +242,7 @@ def render_instalados(uploaded_file=None):
                 {'selector': 'tr:hover', 'props': [('background-color', '#e0e0e0')]}
             ]).set_properties(**{'font-size': '14px'})
         
+        df_relatorio = display_frame(df_relatorio, 'Instalados')
         st.dataframe(style_dataframe(df_relatorio), use_container_width=True)
         
         # Botão para exportar o relatório como Excel
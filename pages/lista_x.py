@@ -1,17 +1,17 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils.data_utils import load_excel, process_sheet_data, save_excel, SHEET_CONFIG, EXCEL_FILE
+from utils.data_utils import load_processed_sheet, save_excel, append_excel_row, patch_excel_row, sheet_cache, shared_frame, display_frame, SHEET_CONFIG, EXCEL_FILE, report
 
-@st.cache_data
+@sheet_cache('Lista X')
+@shared_frame
 def load_and_process_lista_x(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Lista X com caching."""
     try:
-        raw_df = load_excel('Lista X', _file_path)
-        df = process_sheet_data(raw_df, 'Lista X')
+        df = load_processed_sheet('Lista X', _file_path)
         return df
     except Exception as e:
-        st.error(f"Erro ao processar a aba Lista X: {str(e)}")
+        report('error', f"Erro ao processar a aba Lista X: {str(e)}")
         return pd.DataFrame()
 
 def render_lista_x(uploaded_file=None):
@@ -28,7 +28,7 @@ def render_lista_x(uploaded_file=None):
         st.warning(f"Colunas ausentes na aba 'Lista X': {', '.join(missing_columns)}")
     
     st.markdown("### Tabela Completa")
-    st.dataframe(df, use_container_width=True)
+    st.dataframe(display_frame(df, 'Lista X'), use_container_width=True)
     
     # Aba de navegação: Dados
     tab1 = st.tabs(["Dados"])[0]
@@ -67,10 +67,8 @@ def render_lista_x(uploaded_file=None):
                         'Aguardando instalação': aguardando_instalacao,
                         'instalado': instalado
                     }
-                    df = pd.concat([df, pd.DataFrame([novo])], ignore_index=True)
-                    if save_excel(df, 'Lista X', file_path):
-                        st.cache_data.clear()
-                        st.success("Registro adicionado!")
+                    if append_excel_row('Lista X', novo, file_path, background=True):
+                        st.success("Registro enviado para gravação!")
                         st.rerun()
                 else:
                     st.error("Cidade é obrigatória.")
@@ -100,21 +98,22 @@ def render_lista_x(uploaded_file=None):
                     
                     if st.button("Salvar Edição", key="save_button"):
                         if cidade_edit:
-                            df.at[idx, 'Cidade'] = cidade_edit
-                            df.at[idx, 'Não Informou a estrutura do posto'] = nao_informou_edit
-                            df.at[idx, 'Com Pendência na estrutura do posto'] = com_pendencia_edit
-                            df.at[idx, 'Sem pendência na estrutura do posto'] = sem_pendencia_edit
-                            df.at[idx, 'Sanou pendências indicadas'] = sanou_pendencias_edit
-                            df.at[idx, 'Ag. Visita técnica'] = ag_visita_edit
-                            df.at[idx, 'Parecer da visita técnica'] = parecer_visita_edit
-                            df.at[idx, 'Realizou Treinamento'] = realizou_treinamento_edit
-                            df.at[idx, 'Ag. Publicação no Diário Oficial Estado'] = ag_publicacao_edit
-                            df.at[idx, 'Publicado no Diário Oficial do Estado'] = publicado_do_edit
-                            df.at[idx, 'Aguardando instalação'] = aguardando_instalacao_edit
-                            df.at[idx, 'instalado'] = instalado_edit
-                            if save_excel(df, 'Lista X', file_path):
-                                st.cache_data.clear()
-                                st.success("Registro atualizado!")
+                            alteracoes = {
+                                'Cidade': cidade_edit,
+                                'Não Informou a estrutura do posto': nao_informou_edit,
+                                'Com Pendência na estrutura do posto': com_pendencia_edit,
+                                'Sem pendência na estrutura do posto': sem_pendencia_edit,
+                                'Sanou pendências indicadas': sanou_pendencias_edit,
+                                'Ag. Visita técnica': ag_visita_edit,
+                                'Parecer da visita técnica': parecer_visita_edit,
+                                'Realizou Treinamento': realizou_treinamento_edit,
+                                'Ag. Publicação no Diário Oficial Estado': ag_publicacao_edit,
+                                'Publicado no Diário Oficial do Estado': publicado_do_edit,
+                                'Aguardando instalação': aguardando_instalacao_edit,
+                                'instalado': instalado_edit
+                            }
+                            if patch_excel_row('Lista X', idx, alteracoes, file_path, background=True, base=df):
+                                st.success("Alteração enviada para gravação!")
                                 st.rerun()
                         else:
                             st.error("Cidade é obrigatória.")
@@ -122,9 +121,8 @@ def render_lista_x(uploaded_file=None):
                 with st.expander("Apagar Registro"):
                     if st.button("Confirmar Apagar", key="delete_button"):
                         df = df.drop(idx).reset_index(drop=True)
-                        if save_excel(df, 'Lista X', file_path):
-                            st.cache_data.clear()
-                            st.success("Registro removido!")
+                        if save_excel(df, 'Lista X', file_path, background=True):
+                            st.success("Remoção enviada para gravação!")
                             st.rerun()
             else:
                 st.warning("Nenhuma linha disponível para editar ou apagar.")
\ No newline at end of file
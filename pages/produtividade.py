@@ -1,68 +1,44 @@
 # pages/produtividade.py
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from datetime import datetime
 import calendar
 import numpy as np
 import re
-from python_graphs_CIN.utils.data_utils import load_excel, process_sheet_data, save_excel, SHEET_CONFIG, EXCEL_FILE
+from python_graphs_CIN.utils.data_utils import load_processed_sheet, save_excel, append_excel_row, sheet_cache, shared_frame, as_date, display_frame, SHEET_CONFIG, EXCEL_FILE, report
 from python_graphs_CIN.utils.dashboard_utils import generate_produtividade_dashboard
 
-@st.cache_data
+@sheet_cache('Produtividade')
+@shared_frame
 def load_and_process_produtividade(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Produtividade com caching."""
     try:
-        raw_df = load_excel('Produtividade', _file_path)
-        if raw_df.empty:
-            st.error("Nenhum dado disponível para a aba 'Produtividade'. Verifique o arquivo Excel.")
+        # Cabeçalhos normalizados e colunas ausentes já são tratados na leitura da aba
+        df = load_processed_sheet('Produtividade', _file_path)
+        if df.empty:
+            report('error', "Nenhum dado disponível para a aba 'Produtividade'. Verifique o arquivo Excel.")
             return pd.DataFrame(), []
         
-        # Normalizar nomes das colunas
-        raw_df.columns = raw_df.columns.str.replace('\n', ' ').str.strip().str.replace(r'\s+', ' ', regex=True)
-        raw_df.columns = raw_df.columns.str.replace('PREFEITURA DE', 'PREFEITURAS DE')
-        
-        # Verificar colunas esperadas
-        expected_columns = list(SHEET_CONFIG['Produtividade']['columns'].keys())
-        missing_columns = [col for col in expected_columns if col not in raw_df.columns]
-        if missing_columns:
-            st.warning(f"Colunas ausentes na aba 'Produtividade': {', '.join(missing_columns)}")
-            for col in missing_columns:
-                if col in ['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO', 'PERÍODO PREVISTO DE TREINAMENTO_FIM', 'DATA DA INSTALAÇÃO', 'DATA DO INÍCIO ATEND.', 'PREFEITURAS DE']:
-                    raw_df[col] = ''
-                elif col == 'REALIZOU TREINAMENTO?':
-                    raw_df[col] = False
-                elif col in ['JANEIRO', 'FEVEREIRO', 'MARÇO', 'ABRIL', 'MAIO', 'JUNHO', 'JULHO', 'AGOSTO', 'SETEMBRO', 'OUTUBRO', 'NOVEMBRO', 'DEZEMBRO']:
-                    raw_df[col] = 0.0
-        
-        df = process_sheet_data(raw_df, 'Produtividade')
-        
-        # Converter colunas de datas
+        # Colunas de datas já chegam em datetime64
         date_cols = ['DATA DA INSTALAÇÃO', 'DATA DO INÍCIO ATEND.', 'PERÍODO PREVISTO DE TREINAMENTO_INÍCIO', 'PERÍODO PREVISTO DE TREINAMENTO_FIM']
         for col in date_cols:
             if col in df.columns:
-                df[col] = pd.to_datetime(df[col], format='%d/%m/%Y', errors='coerce')
                 null_count = df[col].isna().sum()
                 if null_count > 0:
-                    st.warning(f"{null_count} registros na coluna '{col}' estão vazios ou inválidos.")
+                    report('warning', f"{null_count} registros na coluna '{col}' estão vazios ou inválidos.")
         
-        # Converter colunas de meses para numérico
+        # Colunas de meses já chegam como float (tipo 'float' em SHEET_CONFIG)
         possible_months = ['JANEIRO', 'FEVEREIRO', 'MARÇO', 'ABRIL', 'MAIO', 'JUNHO', 'JULHO', 'AGOSTO', 'SETEMBRO', 'OUTUBRO', 'NOVEMBRO', 'DEZEMBRO']
         months = [m for m in possible_months if m in df.columns]
-        for month in months:
-            df[month] = pd.to_numeric(df[month], errors='coerce').fillna(0.0)
         
-        # Filtrar linhas válidas
-        df['CIDADE'] = df['CIDADE'].astype(str).str.strip().replace('nan', '')
-        df['PREFEITURAS DE'] = df['PREFEITURAS DE'].astype(str).str.strip().replace('nan', '')
-        df['REALIZOU TREINAMENTO?'] = df['REALIZOU TREINAMENTO?'].apply(lambda x: True if str(x).strip().upper() in ['TRUE', 'SIM', 'X'] else False)
+        # Filtrar linhas válidas (CIDADE, PREFEITURAS DE e REALIZOU TREINAMENTO? já vêm limpos de process_sheet_data)
         df = df[df['CIDADE'].notna() & (df['CIDADE'] != '') & (df['CIDADE'] != 'TOTAL')]
         df = df[df['PREFEITURAS DE'].notna() & (df['PREFEITURAS DE'] != '')]
         
         # Verificar duplicatas
         duplicate_cities = df[df['CIDADE'].duplicated(keep=False)]['CIDADE'].unique()
         if len(duplicate_cities) > 0:
-            st.warning(f"Cidades duplicadas encontradas: {duplicate_cities.tolist()}. Agregando dados por cidade.")
+            report('warning', f"Cidades duplicadas encontradas: {duplicate_cities.tolist()}. Agregando dados por cidade.")
             agg_dict = {month: 'sum' for month in months}
             agg_dict.update({
                 'REALIZOU TREINAMENTO?': 'first',
@@ -76,10 +52,11 @@ def load_and_process_produtividade(_file_path=EXCEL_FILE):
         
         return df, months
     except Exception as e:
-        st.error(f"Erro ao processar a aba Produtividade: {str(e)}")
+        report('error', f"Erro ao processar a aba Produtividade: {str(e)}")
         return pd.DataFrame(), []
 
 def render_produtividade(uploaded_file=None):
+    import plotly.express as px
     st.markdown("""
         <h3>Produtividade <span class="material-icons" style="vertical-align: middle; color: #004aad;">bar_chart</span></h3>
     """, unsafe_allow_html=True)
@@ -96,7 +73,7 @@ def render_produtividade(uploaded_file=None):
     
     with tab1:
         st.markdown("### Tabela Completa")
-        st.dataframe(df, use_container_width=True)
+        st.dataframe(display_frame(df, 'Produtividade'), use_container_width=True)
         
         # Adicionar Novo Registro
         with st.expander("Adicionar Novo Registro"):
@@ -122,10 +99,8 @@ def render_produtividade(uploaded_file=None):
                     }
                     for month in months:
                         novo[month] = month_inputs[month]
-                    df = pd.concat([df, pd.DataFrame([novo])], ignore_index=True)
-                    if save_excel(df, 'Produtividade', file_path):
-                        st.cache_data.clear()
-                        st.success("Registro adicionado!")
+                    if append_excel_row('Produtividade', novo, file_path, background=True):
+                        st.success("Registro enviado para gravação!")
                         st.rerun()
                 else:
                     st.error("Cidade e Prefeituras de são obrigatórios.")
@@ -139,35 +114,34 @@ def render_produtividade(uploaded_file=None):
                 with st.expander("Editar Registro"):
                     cidade_edit = st.text_input("Cidade", value=row['CIDADE'], key="edit_cidade")
                     periodo_inicio_edit = st.date_input("Período Previsto de Treinamento - Início (opcional)", 
-                                                        value=pd.to_datetime(row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO']) and row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'] else None,
+                                                        value=as_date(row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO']),
                                                         key="edit_periodo_inicio")
                     periodo_fim_edit = st.date_input("Período Previsto de Treinamento - Fim (opcional)", 
-                                                     value=pd.to_datetime(row['PERÍODO PREVISTO DE TREINAMENTO_FIM'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['PERÍODO PREVISTO DE TREINAMENTO_FIM']) and row['PERÍODO PREVISTO DE TREINAMENTO_FIM'] else None,
+                                                     value=as_date(row['PERÍODO PREVISTO DE TREINAMENTO_FIM']),
                                                      key="edit_periodo_fim")
                     realizou_treinamento_edit = st.checkbox("Realizou Treinamento?", value=row['REALIZOU TREINAMENTO?'], key="edit_realizou_treinamento")
                     data_instalacao_edit = st.date_input("Data da Instalação (opcional)", 
-                                                        value=pd.to_datetime(row['DATA DA INSTALAÇÃO'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DA INSTALAÇÃO']) and row['DATA DA INSTALAÇÃO'] else None,
+                                                        value=as_date(row['DATA DA INSTALAÇÃO']),
                                                         key="edit_data_instalacao")
                     prefeitura_edit = st.text_input("Prefeituras de", value=row['PREFEITURAS DE'], key="edit_prefeitura")
                     data_inicio_atend_edit = st.date_input("Data do Início Atend. (opcional)", 
-                                                          value=pd.to_datetime(row['DATA DO INÍCIO ATEND.'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DO INÍCIO ATEND.']) and row['DATA DO INÍCIO ATEND.'] else None,
+                                                          value=as_date(row['DATA DO INÍCIO ATEND.']),
                                                           key="edit_data_inicio_atend")
                     month_inputs_edit = {month: st.number_input(f"{month}", min_value=0.0, step=1.0, value=float(row[month]) if pd.notna(row[month]) else 0.0, key=f"edit_{month.lower()}") for month in months}
                     
                     if st.button("Salvar Edição", key="save_button"):
                         if cidade_edit and prefeitura_edit:
                             df.at[idx, 'CIDADE'] = cidade_edit
-                            df.at[idx, 'PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'] = periodo_inicio_edit.strftime('%d/%m/%Y') if periodo_inicio_edit else ''
-                            df.at[idx, 'PERÍODO PREVISTO DE TREINAMENTO_FIM'] = periodo_fim_edit.strftime('%d/%m/%Y') if periodo_fim_edit else ''
+                            df.at[idx, 'PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'] = pd.Timestamp(periodo_inicio_edit) if periodo_inicio_edit else pd.NaT
+                            df.at[idx, 'PERÍODO PREVISTO DE TREINAMENTO_FIM'] = pd.Timestamp(periodo_fim_edit) if periodo_fim_edit else pd.NaT
                             df.at[idx, 'REALIZOU TREINAMENTO?'] = realizou_treinamento_edit
-                            df.at[idx, 'DATA DA INSTALAÇÃO'] = data_instalacao_edit.strftime('%d/%m/%Y') if data_instalacao_edit else ''
+                            df.at[idx, 'DATA DA INSTALAÇÃO'] = pd.Timestamp(data_instalacao_edit) if data_instalacao_edit else pd.NaT
                             df.at[idx, 'PREFEITURAS DE'] = prefeitura_edit
-                            df.at[idx, 'DATA DO INÍCIO ATEND.'] = data_inicio_atend_edit.strftime('%d/%m/%Y') if data_inicio_atend_edit else ''
+                            df.at[idx, 'DATA DO INÍCIO ATEND.'] = pd.Timestamp(data_inicio_atend_edit) if data_inicio_atend_edit else pd.NaT
                             for month in months:
                                 df.at[idx, month] = month_inputs_edit[month]
-                            if save_excel(df, 'Produtividade', file_path):
-                                st.cache_data.clear()
-                                st.success("Registro atualizado!")
+                            if save_excel(df, 'Produtividade', file_path, write_through=True, background=True):
+                                st.success("Alteração enviada para gravação!")
                                 st.rerun()
                         else:
                             st.error("Cidade e Prefeituras de são obrigatórios.")
@@ -175,9 +149,8 @@ def render_produtividade(uploaded_file=None):
                 with st.expander("Apagar Registro"):
                     if st.button("Confirmar Apagar", key="delete_button"):
                         df = df.drop(idx).reset_index(drop=True)
-                        if save_excel(df, 'Produtividade', file_path):
-                            st.cache_data.clear()
-                            st.success("Registro removido!")
+                        if save_excel(df, 'Produtividade', file_path, write_through=True, background=True):
+                            st.success("Remoção enviada para gravação!")
                             st.rerun()
             else:
                 st.warning("Nenhuma linha disponível para editar ou apagar.")
@@ -319,7 +292,7 @@ def render_produtividade(uploaded_file=None):
                     })
             
             period_df = pd.DataFrame(period_data)
-            st.dataframe(period_df, use_container_width=True)
+            st.dataframe(display_frame(period_df), use_container_width=True)
             
             compare_prod_df = pd.DataFrame()
             for city in selected_cities:
@@ -1,17 +1,17 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils.data_utils import load_excel, process_sheet_data, save_excel, SHEET_CONFIG, EXCEL_FILE
+from utils.data_utils import load_processed_sheet, save_excel, append_excel_row, patch_excel_row, sheet_cache, shared_frame, as_date, display_frame, SHEET_CONFIG, EXCEL_FILE, report
 
-@st.cache_data
+@sheet_cache('Publicados')
+@shared_frame
 def load_and_process_publicados(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Publicados com caching."""
     try:
-        raw_df = load_excel('Publicados', _file_path)
-        df = process_sheet_data(raw_df, 'Publicados')
+        df = load_processed_sheet('Publicados', _file_path)
         return df
     except Exception as e:
-        st.error(f"Erro ao processar a aba Publicados: {str(e)}")
+        report('error', f"Erro ao processar a aba Publicados: {str(e)}")
         return pd.DataFrame()
 
 def render_publicados(uploaded_file=None):
@@ -28,7 +28,7 @@ def render_publicados(uploaded_file=None):
         st.warning(f"Colunas ausentes na aba 'Publicados': {', '.join(missing_columns)}")
     
     st.markdown("### Tabela Completa")
-    st.dataframe(df, use_container_width=True)
+    st.dataframe(display_frame(df, 'Publicados'), use_container_width=True)
     
     # Aba de navegação: Dados
     tab1 = st.tabs(["Dados"])[0]
@@ -63,10 +63,8 @@ def render_publicados(uploaded_file=None):
                         'DATA DA INSTALAÇÃO': data_instalacao.strftime('%d/%m/%Y') if data_instalacao else '',
                         'PREVISÃO AJUSTE ESTRUTURA P/ VISITA': previsao_ajuste
                     }
-                    df = pd.concat([df, pd.DataFrame([novo])], ignore_index=True)
-                    if save_excel(df, 'Publicados', file_path):
-                        st.cache_data.clear()
-                        st.success("Registro adicionado!")
+                    if append_excel_row('Publicados', novo, file_path, background=True):
+                        st.success("Registro enviado para gravação!")
                         st.rerun()
                 else:
                     st.error("Cidade é obrigatória.")
@@ -84,37 +82,38 @@ def render_publicados(uploaded_file=None):
                                                        index=SHEET_CONFIG['Publicados']['columns']['PARECER DA VISITA TÉCNICA']['values'].index(row['PARECER DA VISITA TÉCNICA']) if row['PARECER DA VISITA TÉCNICA'] in SHEET_CONFIG['Publicados']['columns']['PARECER DA VISITA TÉCNICA']['values'] else 0,
                                                        key="edit_parecer_visita")
                     periodo_inicio_edit = st.date_input("Período Previsto de Treinamento - Início (opcional)", 
-                                                        value=pd.to_datetime(row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO']) and row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'] else None,
+                                                        value=as_date(row['PERÍODO PREVISTO DE TREINAMENTO_INÍCIO']),
                                                         key="edit_periodo_inicio")
                     periodo_fim_edit = st.date_input("Período Previsto de Treinamento - Fim (opcional)", 
-                                                     value=pd.to_datetime(row['PERÍODO PREVISTO DE TREINAMENTO_FIM'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['PERÍODO PREVISTO DE TREINAMENTO_FIM']) and row['PERÍODO PREVISTO DE TREINAMENTO_FIM'] else None,
+                                                     value=as_date(row['PERÍODO PREVISTO DE TREINAMENTO_FIM']),
                                                      key="edit_periodo_fim")
                     realizou_treinamento_edit = st.checkbox("Realizou Treinamento?", value=row['REALIZOU TREINAMENTO?'], key="edit_realizou_treinamento")
                     situacao_termo_edit = st.text_input("Situação do Novo Termo de Cooperação", value=row['SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO'], key="edit_situacao_termo")
                     data_do_edit = st.date_input("Data do D.O. (opcional)", 
-                                                 value=pd.to_datetime(row['DATA DO D.O.'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DO D.O.']) and row['DATA DO D.O.'] else None,
+                                                 value=as_date(row['DATA DO D.O.']),
                                                  key="edit_data_do")
                     apto_instalacao_edit = st.checkbox("Apto para Instalação?", value=row['APTO PARA INSTALAÇÃO?'], key="edit_apto_instalacao")
                     data_instalacao_edit = st.date_input("Data da Instalação (opcional)", 
-                                                        value=pd.to_datetime(row['DATA DA INSTALAÇÃO'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DA INSTALAÇÃO']) and row['DATA DA INSTALAÇÃO'] else None,
+                                                        value=as_date(row['DATA DA INSTALAÇÃO']),
                                                         key="edit_data_instalacao")
                     previsao_ajuste_edit = st.text_input("Previsão Ajuste Estrutura p/ Visita", value=row['PREVISÃO AJUSTE ESTRUTURA P/ VISITA'], key="edit_previsao_ajuste")
                     
                     if st.button("Salvar Edição", key="save_button"):
                         if cidade_edit:
-                            df.at[idx, 'CIDADE'] = cidade_edit
-                            df.at[idx, 'PARECER DA VISITA TÉCNICA'] = parecer_visita_edit
-                            df.at[idx, 'PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'] = periodo_inicio_edit.strftime('%d/%m/%Y') if periodo_inicio_edit else ''
-                            df.at[idx, 'PERÍODO PREVISTO DE TREINAMENTO_FIM'] = periodo_fim_edit.strftime('%d/%m/%Y') if periodo_fim_edit else ''
-                            df.at[idx, 'REALIZOU TREINAMENTO?'] = realizou_treinamento_edit
-                            df.at[idx, 'SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO'] = situacao_termo_edit
-                            df.at[idx, 'DATA DO D.O.'] = data_do_edit.strftime('%d/%m/%Y') if data_do_edit else ''
-                            df.at[idx, 'APTO PARA INSTALAÇÃO?'] = apto_instalacao_edit
-                            df.at[idx, 'DATA DA INSTALAÇÃO'] = data_instalacao_edit.strftime('%d/%m/%Y') if data_instalacao_edit else ''
-                            df.at[idx, 'PREVISÃO AJUSTE ESTRUTURA P/ VISITA'] = previsao_ajuste_edit
-                            if save_excel(df, 'Publicados', file_path):
-                                st.cache_data.clear()
-                                st.success("Registro atualizado!")
+                            alteracoes = {
+                                'CIDADE': cidade_edit,
+                                'PARECER DA VISITA TÉCNICA': parecer_visita_edit,
+                                'PERÍODO PREVISTO DE TREINAMENTO_INÍCIO': periodo_inicio_edit.strftime('%d/%m/%Y') if periodo_inicio_edit else '',
+                                'PERÍODO PREVISTO DE TREINAMENTO_FIM': periodo_fim_edit.strftime('%d/%m/%Y') if periodo_fim_edit else '',
+                                'REALIZOU TREINAMENTO?': realizou_treinamento_edit,
+                                'SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO': situacao_termo_edit,
+                                'DATA DO D.O.': data_do_edit.strftime('%d/%m/%Y') if data_do_edit else '',
+                                'APTO PARA INSTALAÇÃO?': apto_instalacao_edit,
+                                'DATA DA INSTALAÇÃO': data_instalacao_edit.strftime('%d/%m/%Y') if data_instalacao_edit else '',
+                                'PREVISÃO AJUSTE ESTRUTURA P/ VISITA': previsao_ajuste_edit
+                            }
+                            if patch_excel_row('Publicados', idx, alteracoes, file_path, background=True, base=df):
+                                st.success("Alteração enviada para gravação!")
                                 st.rerun()
                         else:
                             st.error("Cidade é obrigatória.")
@@ -122,9 +121,8 @@ def render_publicados(uploaded_file=None):
                 with st.expander("Apagar Registro"):
                     if st.button("Confirmar Apagar", key="delete_button"):
                         df = df.drop(idx).reset_index(drop=True)
-                        if save_excel(df, 'Publicados', file_path):
-                            st.cache_data.clear()
-                            st.success("Registro removido!")
+                        if save_excel(df, 'Publicados', file_path, background=True):
+                            st.success("Remoção enviada para gravação!")
                             st.rerun()
             else:
                 st.warning("Nenhuma linha disponível para editar ou apagar.")
\ No newline at end of file
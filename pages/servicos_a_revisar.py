@@ -4,12 +4,7 @@ import datetime
 import os
 import re
 from io import BytesIO
-import openpyxl
-from openpyxl.styles import Font, PatternFill
-from openpyxl.utils.dataframe import dataframe_to_rows
-import plotly.express as px
-import plotly.graph_objects as go
-from python_graphs_CIN.utils.data_utils import EXCEL_FILE, load_excel, process_sheet_data, save_excel, SHEET_CONFIG
+from python_graphs_CIN.utils.data_utils import EXCEL_FILE, load_excel, process_sheet_data, save_excel, shared_frame, SHEET_CONFIG
 
 ARQUIVO = os.path.join(os.path.dirname(__file__), '..', 'revisarservicos.txt')
 
@@ -132,6 +127,9 @@ def salvar_dados(df):
             f.write(f"{row['SERVIÇO']} | {row['ORGAO']} | {row['TEMPO']} | {data_str}\n")
 
 def to_excel(df):
+    import openpyxl
+    from openpyxl.styles import Font, PatternFill
+    from openpyxl.utils.dataframe import dataframe_to_rows
     output = BytesIO()
     workbook = openpyxl.Workbook()
     worksheet = workbook.active
@@ -152,8 +150,10 @@ def to_excel(df):
     workbook.save(output)
     return output.getvalue()
 
+@shared_frame
 def generate_servicos_a_revisar_dashboards(df, limite_grafico="Sem Limites"):
     """Gera gráficos para a aba 'Serviços a Revisar'."""
+    import plotly.express as px
     if df.empty:
         return []
     
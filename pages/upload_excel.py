@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from utils.data_utils import load_excel, process_sheet_data, SHEET_CONFIG
+from utils.data_utils import load_excel, process_sheet_data, display_frame, SHEET_CONFIG
 
 def render_upload_excel():
     st.markdown("""
@@ -36,7 +36,7 @@ def render_upload_excel():
             
             # Exibe amostra de dados
             st.markdown("### Amostra dos Dados (Primeiras 5 Linhas)")
-            st.dataframe(df.head(5), use_container_width=True)
+            st.dataframe(display_frame(df.head(5), selected_sheet), use_container_width=True)
             
             # Filtro por cidade, se disponível
             if 'Cidade' in df.columns or 'CIDADE' in df.columns:
@@ -50,13 +50,13 @@ def render_upload_excel():
                         st.warning("Nenhum dado encontrado para a cidade selecionada.")
                     else:
                         st.markdown("### Dados Filtrados por Cidade")
-                        st.dataframe(filtered_df, use_container_width=True)
+                        st.dataframe(display_frame(filtered_df, selected_sheet), use_container_width=True)
                 else:
                     st.markdown("### Dados Completos")
-                    st.dataframe(df, use_container_width=True)
+                    st.dataframe(display_frame(df, selected_sheet), use_container_width=True)
             else:
                 st.markdown("### Dados Completos")
-                st.dataframe(df, use_container_width=True)
+                st.dataframe(display_frame(df, selected_sheet), use_container_width=True)
                 
     except Exception as e:
         st.error(f"Erro ao processar o arquivo Excel: {str(e)}")
@@ -1,17 +1,17 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from utils.data_utils import load_excel, process_sheet_data, save_excel, SHEET_CONFIG, EXCEL_FILE
+from utils.data_utils import load_processed_sheet, save_excel, append_excel_row, patch_excel_row, sheet_cache, shared_frame, as_date, display_frame, SHEET_CONFIG, EXCEL_FILE, report
 
-@st.cache_data
+@sheet_cache('Visitas Realizadas')
+@shared_frame
 def load_and_process_visitas_realizadas(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Visitas Realizadas com caching."""
     try:
-        raw_df = load_excel('Visitas Realizadas', _file_path)
-        df = process_sheet_data(raw_df, 'Visitas Realizadas')
+        df = load_processed_sheet('Visitas Realizadas', _file_path)
         return df
     except Exception as e:
-        st.error(f"Erro ao processar a aba Visitas Realizadas: {str(e)}")
+        report('error', f"Erro ao processar a aba Visitas Realizadas: {str(e)}")
         return pd.DataFrame()
 
 def render_visitas_realizadas(uploaded_file=None):
@@ -28,7 +28,7 @@ def render_visitas_realizadas(uploaded_file=None):
         st.warning(f"Colunas ausentes na aba 'Visitas Realizadas': {', '.join(missing_columns)}")
     
     st.markdown("### Tabela Completa")
-    st.dataframe(df, use_container_width=True)
+    st.dataframe(display_frame(df, 'Visitas Realizadas'), use_container_width=True)
     
     # Aba de navegação: Dados
     tab1 = st.tabs(["Dados"])[0]
@@ -53,10 +53,8 @@ def render_visitas_realizadas(uploaded_file=None):
                         'APTO PARA INSTALAÇÃO?': apto_instalacao,
                         'OBSERVAÇÃO': observacao
                     }
-                    df = pd.concat([df, pd.DataFrame([novo])], ignore_index=True)
-                    if save_excel(df, 'Visitas Realizadas', file_path):
-                        st.cache_data.clear()
-                        st.success("Registro adicionado!")
+                    if append_excel_row('Visitas Realizadas', novo, file_path, background=True):
+                        st.success("Registro enviado para gravação!")
                         st.rerun()
                 else:
                     st.error("Cidade é obrigatória.")
@@ -70,7 +68,7 @@ def render_visitas_realizadas(uploaded_file=None):
                 with st.expander("Editar Registro"):
                     cidade_edit = st.text_input("Cidade", value=row['CIDADE'], key="edit_cidade")
                     data_visita_edit = st.date_input("Data da Visita (opcional)", 
-                                                     value=pd.to_datetime(row['DATA DA VISITA'], format='%d/%m/%Y', errors='coerce').date() if pd.notna(row['DATA DA VISITA']) and row['DATA DA VISITA'] else None,
+                                                     value=as_date(row['DATA DA VISITA']),
                                                      key="edit_data_visita")
                     parecer_visita_edit = st.selectbox("Parecer da Visita Técnica", 
                                                        SHEET_CONFIG['Visitas Realizadas']['columns']['PARECER DA VISITA TÉCNICA']['values'],
@@ -81,14 +79,15 @@ def render_visitas_realizadas(uploaded_file=None):
                     
                     if st.button("Salvar Edição", key="save_button"):
                         if cidade_edit:
-                            df.at[idx, 'CIDADE'] = cidade_edit
-                            df.at[idx, 'DATA DA VISITA'] = data_visita_edit.strftime('%d/%m/%Y') if data_visita_edit else ''
-                            df.at[idx, 'PARECER DA VISITA TÉCNICA'] = parecer_visita_edit
-                            df.at[idx, 'APTO PARA INSTALAÇÃO?'] = apto_instalacao_edit
-                            df.at[idx, 'OBSERVAÇÃO'] = observacao_edit
-                            if save_excel(df, 'Visitas Realizadas', file_path):
-                                st.cache_data.clear()
-                                st.success("Registro atualizado!")
+                            alteracoes = {
+                                'CIDADE': cidade_edit,
+                                'DATA DA VISITA': data_visita_edit.strftime('%d/%m/%Y') if data_visita_edit else '',
+                                'PARECER DA VISITA TÉCNICA': parecer_visita_edit,
+                                'APTO PARA INSTALAÇÃO?': apto_instalacao_edit,
+                                'OBSERVAÇÃO': observacao_edit
+                            }
+                            if patch_excel_row('Visitas Realizadas', idx, alteracoes, file_path, background=True, base=df):
+                                st.success("Alteração enviada para gravação!")
                                 st.rerun()
                         else:
                             st.error("Cidade é obrigatória.")
@@ -96,9 +95,8 @@ def render_visitas_realizadas(uploaded_file=None):
                 with st.expander("Apagar Registro"):
                     if st.button("Confirmar Apagar", key="delete_button"):
                         df = df.drop(idx).reset_index(drop=True)
-                        if save_excel(df, 'Visitas Realizadas', file_path):
-                            st.cache_data.clear()
-                            st.success("Registro removido!")
+                        if save_excel(df, 'Visitas Realizadas', file_path, background=True):
+                            st.success("Remoção enviada para gravação!")
                             st.rerun()
             else:
                 st.warning("Nenhuma linha disponível para editar ou apagar.")
\ No newline at end of file
@@ -0,0 +1,2 @@
+# scripts/__init__.py
+# Can be empty
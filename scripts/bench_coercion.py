@@ -0,0 +1,178 @@
+"""Compara o processamento das abas célula a célula (implementação anterior, com .apply)
+com o processamento vetorizado de data_core.process_sheet_data.
+
+Uso (a partir do diretório acima de python_graphs_CIN):
+    python -m python_graphs_CIN.scripts.bench_coercion [linhas]
+
+Gera uma aba sintética com valores válidos, inválidos e vazios para cada aba de
+SHEET_CONFIG, confere que as duas versões produzem o mesmo DataFrame e mostra os tempos.
+"""
+import re
+import sys
+import time
+import numpy as np
+import pandas as pd
+from python_graphs_CIN.utils.data_core import (
+    SHEET_CONFIG, _process_sheet_data, _clean_object_columns, display_frame, parse_training_period, clean_email, clean_time,
+)
+
+def _reference_process(df, sheet_name):
+    """Processamento por célula usado antes da vetorização (referência para comparação)."""
+    for col, col_config in SHEET_CONFIG[sheet_name]['columns'].items():
+        if col not in df.columns:
+            continue
+        col_type = col_config['type']
+        if col_type == 'string':
+            df[col] = df[col].astype(str).replace('nan', '').replace('-', '').str.replace('\n', ' ', regex=False).str.strip()
+        elif col_type == 'categorical':
+            allowed_values = col_config.get('values', [])
+            df[col] = df[col].apply(lambda x: x if pd.notnull(x) and str(x).strip() in allowed_values else allowed_values[0] if allowed_values else '')
+        elif col_type == 'date':
+            df[col] = _reference_dates(df[col], col_config.get('format', '%d/%m/%Y'))
+            df[col] = df[col].apply(lambda x: x.strftime('%d/%m/%Y') if pd.notna(x) else '')
+        elif col_type == 'datetime':
+            df[col] = _reference_dates(df[col], col_config.get('format', '%d/%m/%Y %H:%M'))
+            df[col] = df[col].apply(lambda x: x.strftime('%d/%m/%Y %H:%M') if pd.notna(x) else '')
+        elif col_type == 'boolean':
+            df[col] = df[col].apply(lambda x: True if str(x).strip().upper() in ['X', 'SIM', 'TRUE', 'S'] else False)
+        elif col_type == 'int':
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+        elif col_type == 'float':
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0)
+        elif col_type == 'training_period':
+            df[[f'{col}_INÍCIO', f'{col}_FIM']] = df[col].apply(parse_training_period).apply(pd.Series)
+            df.drop(columns=[col], inplace=True)
+        elif col_type == 'phone':
+            phones = df[col].apply(_reference_whole_number)
+            if col_config.get('e164'):
+                df[col_config['e164']] = phones.apply(_reference_e164)
+            if col_config.get('whatsapp'):
+                df[col_config['whatsapp']] = phones.apply(_reference_whatsapp_link)
+            if not col_config.get('keep_original'):
+                df[col] = phones.apply(_reference_phone_display)
+            if col_config.get('allow_empty', False):
+                df[col] = df[col].replace('', np.nan)
+        elif col_type == 'email':
+            df[col] = df[col].apply(clean_email)
+        elif col_type == 'time':
+            df[col] = df[col].apply(clean_time)
+    return df
+
+def _reference_dates(series, date_format):
+    """Datas no formato configurado; as datas de verdade do Excel chegam da limpeza como str(datetime)."""
+    return pd.to_datetime(series, format=date_format, errors='coerce').fillna(
+        pd.to_datetime(series, format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    )
+
+def _reference_clean_phone_number(phone):
+    """Cópia congelada de clean_phone_number antes da vetorização."""
+    if pd.isna(phone) or phone in ['-', 'sn', 'vazio', 'VAZIO', 'nan']:
+        return ''
+    phone = str(phone).strip()
+    phone = re.sub(r'[^\d]', '', phone)
+    if len(phone) >= 10:
+        return f"({phone[:2]}) {phone[2:7]}-{phone[7:]}"
+    return ''
+
+def _reference_whole_number(phone):
+    """Telefone guardado como float (ou seu texto, '81999991234.0') sem o '.0'; mudança
+    deliberada sobre o baseline, que mantinha o 0 como dígito."""
+    if isinstance(phone, float) and phone.is_integer():
+        return str(int(phone))
+    if isinstance(phone, str):
+        return re.sub(r'^(\d+)\.0+$', r'\1', phone.strip())
+    return phone
+
+def _reference_phone_display(phone):
+    """Formato de exibição por célula: o de _reference_clean_phone_number, sem o 55 na
+    frente e com os últimos quatro dígitos depois do hífen, o que muda os números de 10
+    dígitos para '(dd) dddd-dddd' (mudança deliberada de formato). Sem o 55, o número
+    precisa ter 10 ou 11 dígitos."""
+    if _reference_clean_phone_number(phone) == '':
+        return ''
+    digits = re.sub(r'[^\d]', '', str(phone))
+    if len(digits) > 11 and digits.startswith('55'):
+        digits = digits[2:]
+    if len(digits) not in (10, 11):
+        return ''
+    return f"({digits[:2]}) {digits[2:-4]}-{digits[-4:]}"
+
+def _reference_whatsapp_link(phone):
+    """Link wa.me por célula, como a página Informações montava (sem repetir o 55); só
+    para números que, sem o 55, têm 10 ou 11 dígitos."""
+    if _reference_clean_phone_number(phone) == '':
+        return ''
+    digits = re.sub(r'[^\d]', '', str(phone))
+    if len(digits) > 11 and digits.startswith('55'):
+        digits = digits[2:]
+    if len(digits) not in (10, 11):
+        return ''
+    return f"https://wa.me/55{digits}"
+
+def _reference_e164(phone):
+    """Número em E.164 por célula, o do link wa.me."""
+    link = _reference_whatsapp_link(phone)
+    return '+' + link[len('https://wa.me/'):] if link else ''
+
+def _reference_read_cleanup(df):
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = df[col].apply(lambda x: str(x).replace('\n', ' ').strip() if pd.notnull(x) else '')
+    return df
+
+# Amostras por tipo de coluna: valores bem formados, mal formados e vazios
+SAMPLES = {
+    'string': ['Recife', ' Olinda\n', '-', None, np.nan, 12, 'nan'],
+    'date': ['01/02/2024', '31/12/2023', '2024-01-05', 'VAZIO', None, pd.Timestamp('2024-03-04'), '32/01/2024'],
+    'datetime': ['01/02/2024 10:30', '01/02/2024', None, 'x'],
+    'boolean': ['X', 'sim', ' s ', 'TRUE', 'não', None, True, False, 1],
+    'int': [1, '2', 3.0, 'abc', None],
+    'float': [1.5, '2,5', '3.25', None, '-'],
+    'training_period': ['01/02 a 05/02/24', '10/03/2024 à 12/03/2024', 'N-PREV.', '-', None, 'sem data'],
+    'phone': ['(81) 99999-1234', '81999991234', '5581999991234', '8133334444', '9999-1234', 'sn', None, 81999991234.0, '81999991234.0', '819999912345678', '-'],
+    'email': ['Fulano@Recife.PE.gov.br ', 'invalido@', 'VAZIO', None, 'a.b-c@d.com'],
+    'time': ['10:30', '08:15:00', '25:00', 'vazio', None, ' 7:05 '],
+}
+
+def build_raw_sheet(sheet_name, rows, seed=0):
+    """Monta uma aba sintética com `rows` linhas no formato lido do Excel."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for col, col_config in SHEET_CONFIG[sheet_name]['columns'].items():
+        samples = list(SAMPLES.get(col_config['type'], SAMPLES['string']))
+        if col_config['type'] == 'categorical':
+            samples = list(col_config.get('values', [])) + [' ' + str(v) for v in col_config.get('values', [])[:1]] + ['OUTRO', None]
+        data[col] = pd.Series(samples, dtype=object).iloc[rng.integers(0, len(samples), rows)].reset_index(drop=True)
+    return pd.DataFrame(data)
+
+def _comparable(df, sheet_name):
+    """Datas em texto e categorias/texto Arrow como object, a forma da implementação anterior."""
+    df = display_frame(df, sheet_name)
+    return df.astype({col: object for col in df.columns if isinstance(df[col].dtype, (pd.CategoricalDtype, pd.StringDtype))})
+
+def _timed(func, df, *args):
+    start = time.perf_counter()
+    result = func(df.copy(), *args)
+    return result, time.perf_counter() - start
+
+def main(rows=50_000):
+    total_before = total_after = 0.0
+    for sheet_name in SHEET_CONFIG:
+        raw = build_raw_sheet(sheet_name, rows)
+        cleaned_before, read_before = _timed(_reference_read_cleanup, raw)
+        cleaned_after, read_after = _timed(_clean_object_columns, raw)
+        pd.testing.assert_frame_equal(cleaned_before, cleaned_after)
+
+        before, process_before = _timed(_reference_process, cleaned_before, sheet_name)
+        after, process_after = _timed(_process_sheet_data, cleaned_before, sheet_name)
+        pd.testing.assert_frame_equal(_comparable(before, sheet_name), _comparable(after, sheet_name))
+
+        elapsed_before = read_before + process_before
+        elapsed_after = read_after + process_after
+        total_before += elapsed_before
+        total_after += elapsed_after
+        print(f"{sheet_name:<28} {elapsed_before:8.3f}s -> {elapsed_after:8.3f}s  ({elapsed_before / elapsed_after:5.1f}x)")
+    print(f"{'Total':<28} {total_before:8.3f}s -> {total_after:8.3f}s  ({total_before / total_after:5.1f}x)")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,67 @@
+"""Compara a carga completa do workbook aba a aba (process_excel_file) com a carga em
+processos paralelos (data_core.process_excel_file_parallel).
+
+Uso (a partir do diretório acima de python_graphs_CIN):
+    python -m python_graphs_CIN.scripts.bench_parallel_load arquivo.xlsx [processos]
+
+As duas cargas partem do zero: antes de cada uma, as entradas das abas no cache em disco
+(.cache_abas) e em memória são descartadas. Confere que as duas versões produzem os mesmos
+DataFrames e mostra o tempo das duas e o da aba mais lenta interpretada sozinha (o
+limite da versão paralela com processos suficientes).
+"""
+import sys
+import time
+import pandas as pd
+from python_graphs_CIN.utils import data_core
+from python_graphs_CIN.utils.cache_utils import purge_cached_frames
+from python_graphs_CIN.utils.data_core import (
+    SHEET_CONFIG, resolve_sheet_name, invalidate_sheet, process_excel_file, process_excel_file_parallel,
+)
+from python_graphs_CIN.utils.message_utils import collect_messages
+
+def _start_cold():
+    for sheet_name in SHEET_CONFIG:
+        actual_sheet_name = resolve_sheet_name(sheet_name)
+        purge_cached_frames(actual_sheet_name)
+        invalidate_sheet(actual_sheet_name)
+    data_core._SNAPSHOTS.clear()
+
+def _sheet_times(file_path):
+    """Tempo de cada aba interpretada sozinha, como num processo de trabalho."""
+    with open(file_path, 'rb') as f:
+        data_core._init_sheet_worker(f.read())
+    times = {}
+    for sheet_name in SHEET_CONFIG:
+        actual_sheet_name = resolve_sheet_name(sheet_name)
+        _start_cold()
+        start = time.perf_counter()
+        data_core._process_sheet_in_worker(actual_sheet_name)
+        times[actual_sheet_name] = time.perf_counter() - start
+    return times
+
+def main(file_path, max_workers=None):
+    with collect_messages():
+        _start_cold()
+        start = time.perf_counter()
+        before = process_excel_file.__wrapped__(file_path)
+        elapsed_before = time.perf_counter() - start
+
+        _start_cold()
+        start = time.perf_counter()
+        after = process_excel_file_parallel(file_path, max_workers=max_workers)
+        elapsed_after = time.perf_counter() - start
+
+        sheet_times = _sheet_times(file_path)
+
+    for sheet_name, df in before.items():
+        pd.testing.assert_frame_equal(df, after[sheet_name])
+    slowest = max(sheet_times, key=sheet_times.get)
+    print(f"{'Aba a aba':<28} {elapsed_before:8.3f}s")
+    print(f"{'Aba mais lenta':<28} {sheet_times[slowest]:8.3f}s  ({slowest})")
+    print(f"{'Paralelo':<28} {elapsed_after:8.3f}s  ({max_workers or data_core._available_cpus()} processos, {elapsed_before / elapsed_after:4.1f}x)")
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Uso: python -m python_graphs_CIN.scripts.bench_parallel_load arquivo.xlsx [processos]")
+        sys.exit(2)
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
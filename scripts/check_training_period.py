@@ -0,0 +1,63 @@
+"""Confere parse_training_periods (vetorizado) contra parse_training_period (por célula).
+
+Uso (a partir do diretório acima de python_graphs_CIN):
+    python -m python_graphs_CIN.scripts.check_training_period [linhas]
+
+Roda um corpus de períodos escritos à mão, mais combinações aleatórias das mesmas peças,
+e mostra as divergências e o tempo das duas versões numa coluna com `linhas` valores.
+"""
+import random
+import sys
+import time
+import numpy as np
+import pandas as pd
+from python_graphs_CIN.utils.data_core import parse_training_period, parse_training_periods
+
+CORPUS = [
+    '01/02 a 05/02/25', '01/02/25 à 05/02/25', '10/03 A 12/03/2025', '01/02/2025 a 05/02/2025',
+    '1/2 a 5/2/25', '01/02/2025 À 05/02/2025', '01/02a05/02/25', '01/02  a  05/02/25',
+    '28/02 a 03/03/2024', '30/02 a 01/03/2025', '01/13 a 05/13/25', '01/02/25 a 05/02/2025',
+    '01/02 a 05/02', '01/02 a 5/2', '01/02/2025 a', 'a 05/02/2025', '01/02 e 05/02/25',
+    '01/02 a 05/02 a 09/02/25', 'de 01/02 a 05/02/25', '01/02 até 05/02/25', 'sem data',
+    'x a y', '-', '', ' ', 'VAZIO', 'N-PREV.', 'nan', 'vazio', None, np.nan, pd.NaT,
+    '1/2/25 a 5/2/25', '01/2/25 a 05/2/25', '01/02/5 a 05/02/5', '01/02/125 a 05/02/125',
+    '01/02/2025\ta\t05/02/2025', ' 01/02 a 05/02/25 ', '01.02 a 05.02.25', '01/02/25 a 05/02/25/1',
+    pd.Timestamp('2025-02-01'), 20250201, 1.5, True,
+]
+
+PIECES = ['01/02', '1/2', '31/12', '29/02', '01/02/25', '01/02/2025', '1/2/25', '5/02/2024', '', 'x', '01/02/5']
+SEPARATORS = [' a ', ' à ', ' A ', ' À ', 'a', '  a', ' e ', ' a a ', '-']
+
+def random_corpus(rows, seed=0):
+    rng = random.Random(seed)
+    return [rng.choice(PIECES) + rng.choice(SEPARATORS) + rng.choice(PIECES) for _ in range(rows)]
+
+def reference(series):
+    return series.apply(parse_training_period).apply(pd.Series)
+
+def main(rows=50_000):
+    values = CORPUS + random_corpus(5_000)
+    series = pd.Series(values, dtype=object)
+    expected = reference(series)
+    result = parse_training_periods(series)
+    mismatches = [
+        (value, tuple(expected.iloc[i]), tuple(result.iloc[i]))
+        for i, value in enumerate(values)
+        if not expected.iloc[i].equals(result.iloc[i])
+    ]
+    for value, before, after in mismatches:
+        print(f"{value!r}: {before} != {after}")
+    print(f"{len(values)} valores, {len(mismatches)} divergências")
+
+    column = pd.Series(random_corpus(rows, seed=1), dtype=object)
+    start = time.perf_counter()
+    reference(column)
+    elapsed_before = time.perf_counter() - start
+    start = time.perf_counter()
+    parse_training_periods(column)
+    elapsed_after = time.perf_counter() - start
+    print(f"{rows} linhas: {elapsed_before:.3f}s -> {elapsed_after:.3f}s ({elapsed_before / elapsed_after:.1f}x)")
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000))
@@ -0,0 +1,66 @@
+"""Relatório do tempo de importação por módulo, a partir da saída de `python -X importtime`.
+
+Uso (a partir do diretório acima de python_graphs_CIN):
+    python -m python_graphs_CIN.scripts.importtime_report [módulo] [quantidade]
+    python -X importtime -c "import python_graphs_CIN.app" 2> importtime.log
+    python -m python_graphs_CIN.scripts.importtime_report --log importtime.log [quantidade]
+
+Sem --log, importa `módulo` (padrão: python_graphs_CIN.utils.data_core) num processo
+novo com -X importtime. Lista os módulos em ordem de custo acumulado (o módulo mais tudo o
+que ele importou pela primeira vez), com o custo próprio e o nível na árvore de importação.
+"""
+import subprocess
+import sys
+from collections import namedtuple
+
+DEFAULT_MODULE = 'python_graphs_CIN.utils.data_core'
+
+ImportTime = namedtuple('ImportTime', ['module', 'self_us', 'cumulative_us', 'depth'])
+
+def parse_importtime(lines):
+    """Converte as linhas 'import time: self [us] | cumulative | imported package' em ImportTime."""
+    entries = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # cabeçalho da tabela
+        name = fields[2].rstrip()
+        module = name.lstrip()
+        # Cada nível da árvore acrescenta dois espaços antes do nome
+        depth = (len(name) - len(module) - 1) // 2
+        entries.append(ImportTime(module, int(fields[0]), int(fields[1]), depth))
+    return entries
+
+def run_importtime(module):
+    """Importa `module` num interpretador novo com -X importtime e devolve as linhas do stderr."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"Falha ao importar {module}")
+    return result.stderr.splitlines()
+
+def print_report(entries, limit=30):
+    roots = [entry for entry in entries if entry.depth == 0]
+    total = sum(entry.cumulative_us for entry in roots)
+    print(f"{'Módulo':<60} {'acumulado':>11} {'próprio':>10} {'nível':>6}")
+    for entry in sorted(entries, key=lambda entry: entry.cumulative_us, reverse=True)[:limit]:
+        print(f"{entry.module:<60} {entry.cumulative_us / 1000:9.1f}ms {entry.self_us / 1000:8.1f}ms {entry.depth:6d}")
+    print(f"{'Total':<60} {total / 1000:9.1f}ms  ({len(entries)} módulos)")
+
+def main(argv):
+    if argv[:1] == ['--log']:
+        with open(argv[1], encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        rest = argv[2:]
+    else:
+        lines = run_importtime(argv[0] if argv else DEFAULT_MODULE)
+        rest = argv[1:]
+    print_report(parse_importtime(lines), int(rest[0]) if rest else 30)
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,17 @@
+"""Torna o pacote importável como python_graphs_CIN, o nome usado nos imports do projeto,
+mesmo quando o checkout está num diretório com outro nome."""
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+if ROOT.name == 'python_graphs_CIN':
+    sys.path.insert(0, str(ROOT.parent))
+elif 'python_graphs_CIN' not in sys.modules:
+    spec = importlib.util.spec_from_file_location(
+        'python_graphs_CIN', ROOT / '__init__.py', submodule_search_locations=[str(ROOT)]
+    )
+    package = importlib.util.module_from_spec(spec)
+    sys.modules['python_graphs_CIN'] = package
+    spec.loader.exec_module(package)
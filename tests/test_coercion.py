@@ -0,0 +1,22 @@
+"""Processamento vetorizado contra as implementações por célula de scripts/ (bench_coercion
+e check_training_period), em abas sintéticas menores."""
+import pandas as pd
+import pytest
+
+from python_graphs_CIN.scripts.bench_coercion import _comparable, _reference_process, _reference_read_cleanup, build_raw_sheet
+from python_graphs_CIN.scripts.check_training_period import CORPUS, random_corpus, reference
+from python_graphs_CIN.utils.data_core import SHEET_CONFIG, _clean_object_columns, _process_sheet_data, parse_training_periods
+
+@pytest.mark.parametrize('sheet_name', list(SHEET_CONFIG))
+def test_vectorized_coercion_matches_per_row(sheet_name):
+    raw = build_raw_sheet(sheet_name, 500)
+    cleaned = _reference_read_cleanup(raw.copy())
+    pd.testing.assert_frame_equal(_clean_object_columns(raw.copy()), cleaned)
+
+    expected = _reference_process(cleaned.copy(), sheet_name)
+    result = _process_sheet_data(cleaned.copy(), sheet_name)
+    pd.testing.assert_frame_equal(_comparable(result, sheet_name), _comparable(expected, sheet_name))
+
+def test_parse_training_periods_matches_per_cell():
+    series = pd.Series(CORPUS + random_corpus(2_000), dtype=object)
+    pd.testing.assert_frame_equal(parse_training_periods(series), reference(series))
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from python_graphs_CIN.utils.contact_utils import normalize_phones, phone_text
+from python_graphs_CIN.utils.data_core import clean_phone_number, process_sheet_data
+
+PHONES = ['(71) 99999-8888', '7133334444', '5571999998888', '+55 (71) 3333-4444', '123', '-', None]
+DISPLAY = ['(71) 99999-8888', '(71) 3333-4444', '(71) 99999-8888', '(71) 3333-4444', '', '', '']
+
+def test_normalize_phones():
+    phones = normalize_phones(pd.Series(PHONES))
+    assert phones['display'].tolist() == DISPLAY
+    assert phones['e164'].tolist() == [
+        '+5571999998888', '+557133334444', '+5571999998888', '+557133334444', '', '', '',
+    ]
+    assert phones['whatsapp'][2] == 'https://wa.me/5571999998888'
+
+def test_float_cells_and_long_numbers():
+    phones = normalize_phones(pd.Series([71999998888.0, '71999998888.0', np.nan, '71999998888123'], dtype=object))
+    assert phones['e164'].tolist() == ['+5571999998888', '+5571999998888', '', '']
+    assert phones['whatsapp'][0] == 'https://wa.me/5571999998888'
+    assert phones['display'][0] == '(71) 99999-8888'
+    numeric = normalize_phones(pd.Series([7133334444.0, np.nan]))
+    assert numeric['e164'].tolist() == ['+557133334444', '']
+    assert clean_phone_number(71999998888.0) == '(71) 99999-8888'
+
+def test_phone_text():
+    assert phone_text(pd.Series([71999998888.0, np.nan])).tolist() == ['71999998888', '']
+    assert phone_text(pd.Series(['(71) 3333-4444', None, '71999998888.0'])).tolist() == ['(71) 3333-4444', '', '71999998888']
+
+def test_informacoes_float_phones():
+    raw = pd.DataFrame({'CIDADE': ['A', 'B'], 'Telefone Celular chefe de posto': [71999998888.0, np.nan], 'Telefone do Secretário': ['-', '7133334444']})
+    df = process_sheet_data(raw, 'Informações')
+    assert df['Telefone Celular chefe de posto (E.164)'].tolist() == ['+5571999998888', '']
+    assert df['Link WhatsApp'].tolist() == ['https://wa.me/5571999998888', '']
+
+def test_display_matches_clean_phone_number():
+    assert [clean_phone_number(phone) for phone in PHONES] == DISPLAY
+
+def test_informacoes_keeps_phones_as_typed():
+    raw = pd.DataFrame({'CIDADE': ['A'] * len(PHONES), 'Telefone Celular chefe de posto': PHONES, 'Telefone do Secretário': PHONES})
+    df = process_sheet_data(raw, 'Informações')
+    assert df['Telefone Celular chefe de posto'].tolist() == PHONES
+    assert df['Telefone do Secretário (E.164)'][1] == '+557133334444'
+    assert df['Link WhatsApp 2'][2] == 'https://wa.me/5571999998888'
@@ -0,0 +1,69 @@
+"""Gravação da aba inteira (save_excel) numa aba com faixa de título e cabeçalho de dois
+níveis: as linhas acima dos dados ficam como estão e a aba lida de volta é a mesma."""
+from datetime import datetime
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from python_graphs_CIN.utils.data_core import load_processed_sheet, save_excel
+from python_graphs_CIN.utils.message_utils import collect_messages
+
+SHEET = 'Treina-turma'
+START = 'PERÍODO PREVISTO DE TREINAMENTO_INÍCIO'
+
+@pytest.fixture
+def workbook(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = SHEET
+    ws['A1'] = 'ACOMPANHAMENTO DOS TREINAMENTOS POR TURMA'
+    ws.merge_cells('A1:E1')
+    ws.append([])
+    ws.append(['CIDADE', 'PERÍODO PREVISTO DE TREINAMENTO', None, 'TURMA', 'REALIZOU TREINAMENTO?'])
+    ws.append([None, 'INÍCIO', 'FIM', None, None])
+    ws.merge_cells('B3:C3')
+    ws.merge_cells('A3:A4')
+    ws.append(['Recife', datetime(2024, 3, 5), '08/03/2024', 1, 'SIM'])
+    ws.append(['Olinda', '05/03/2024', datetime(2024, 3, 9), 2, None])
+    ws.append(['Paulista', None, None, 3, 'SIM'])
+    path = tmp_path / 'acompanhamento.xlsx'
+    wb.save(path)
+    return str(path)
+
+def _load(path):
+    with collect_messages() as messages:
+        df = load_processed_sheet(SHEET, path)
+    assert not messages.has_errors(), messages
+    return df
+
+def test_mixed_date_column_keeps_real_dates(workbook):
+    df = _load(workbook)
+    assert df[START].tolist()[:2] == [pd.Timestamp(2024, 3, 5), pd.Timestamp(2024, 3, 5)]
+
+def test_full_save_keeps_banner_and_two_row_header(workbook):
+    before = _load(workbook)
+    with collect_messages():
+        assert save_excel(before, SHEET, workbook)
+        after = _load(workbook)
+    pd.testing.assert_frame_equal(after, before)
+
+    ws = openpyxl.load_workbook(workbook)[SHEET]
+    assert ws['A1'].value == 'ACOMPANHAMENTO DOS TREINAMENTOS POR TURMA'
+    assert [cell.value for cell in ws[4]][:3] == [None, 'INÍCIO', 'FIM']
+    assert {str(merged) for merged in ws.merged_cells.ranges} == {'A1:E1', 'A3:A4', 'B3:C3'}
+    assert ws.max_row == 4 + len(before)
+
+    # Uma segunda gravação parte da aba já regravada e não perde nada
+    with collect_messages():
+        assert save_excel(after, SHEET, workbook)
+        again = _load(workbook)
+    pd.testing.assert_frame_equal(again, before)
+
+def test_full_save_adds_new_columns_to_header_row(workbook):
+    df = _load(workbook).assign(OBSERVAÇÃO=['a', 'b', 'c'])
+    with collect_messages():
+        assert save_excel(df, SHEET, workbook)
+    ws = openpyxl.load_workbook(workbook)[SHEET]
+    assert ws.cell(row=4, column=6).value == 'OBSERVAÇÃO'
+    assert [ws.cell(row=row, column=6).value for row in (5, 6, 7)] == ['a', 'b', 'c']
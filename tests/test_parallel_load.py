@@ -0,0 +1,26 @@
+"""Com um só processo, a carga paralela interpreta as abas sem abrir o pool."""
+import openpyxl
+import pandas as pd
+
+from python_graphs_CIN.utils import data_core
+from python_graphs_CIN.utils.message_utils import collect_messages
+
+SHEET = 'Treina-turma'
+
+def test_single_worker_runs_in_process(tmp_path, monkeypatch):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = SHEET
+    ws.append(['CIDADE', 'TURMA'])
+    ws.append(['Recife', 1])
+    path = str(tmp_path / 'acompanhamento.xlsx')
+    wb.save(path)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError('ProcessPoolExecutor com um só processo')
+    monkeypatch.setattr(data_core, 'ProcessPoolExecutor', no_pool)
+    with collect_messages():
+        processed = data_core.process_excel_file_parallel(path, max_workers=1)
+        expected = data_core.load_processed_sheet(SHEET, path)
+    pd.testing.assert_frame_equal(processed[SHEET], expected)
+    assert processed[SHEET]['CIDADE'].tolist() == ['Recife']
@@ -0,0 +1,37 @@
+"""As abas brutas do snapshot contam no orçamento do SHARED_CACHE e saem dele quando o
+arquivo muda."""
+import os
+
+import openpyxl
+
+from python_graphs_CIN.utils.cache_utils import SHARED_CACHE
+from python_graphs_CIN.utils.data_core import SNAPSHOT_CACHE_NAME, get_workbook_snapshot
+
+def _snapshot_entries(path):
+    return [key for name, key in list(SHARED_CACHE._entries) if name == SNAPSHOT_CACHE_NAME and key[0][0] == path]
+
+def _write_workbook(path, cities):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Lista X'
+    ws.append(['CIDADE'])
+    for city in cities:
+        ws.append([city])
+    wb.save(path)
+
+def test_snapshot_frames_live_in_shared_cache(tmp_path):
+    path = str(tmp_path / 'acompanhamento.xlsx')
+    _write_workbook(path, ['Recife', 'Olinda'])
+    snapshot = get_workbook_snapshot(path)
+    assert snapshot.get('Lista X')['CIDADE'].tolist() == ['Recife', 'Olinda']
+    assert [key[1] for key in _snapshot_entries(os.path.abspath(path))] == ['Lista X']
+
+    # Descartada pelo orçamento, a aba é interpretada de novo
+    SHARED_CACHE.clear(SNAPSHOT_CACHE_NAME)
+    assert snapshot.get('Lista X')['CIDADE'].tolist() == ['Recife', 'Olinda']
+
+    # Nova versão do arquivo: as abas da anterior saem do cache
+    _write_workbook(path, ['Paulista'])
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+    assert get_workbook_snapshot(path).get('Lista X')['CIDADE'].tolist() == ['Paulista']
+    assert len(_snapshot_entries(os.path.abspath(path))) == 1
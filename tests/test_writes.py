@@ -0,0 +1,85 @@
+"""Gravações parciais (patch, append), refeitas sobre linhas que mudaram de posição, e
+gravações recusadas por conflito de versão."""
+import openpyxl
+import pytest
+
+from python_graphs_CIN.utils.data_core import (
+    VersionConflictError, append_excel_row, load_processed_sheet, patch_excel_row, save_excel,
+)
+from python_graphs_CIN.utils.message_utils import collect_messages
+from python_graphs_CIN.utils.writer_utils import WorkbookWriter, WriteOperation
+
+SHEET = 'Treina-turma'
+CITIES = ['Recife', 'Olinda', 'Paulista', 'Igarassu']
+
+@pytest.fixture
+def workbook(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = SHEET
+    ws.append(['CIDADE', 'TURMA', 'REALIZOU TREINAMENTO?'])
+    for turma, city in enumerate(CITIES, start=1):
+        ws.append([city, turma, 'SIM'])
+    path = tmp_path / 'acompanhamento.xlsx'
+    wb.save(path)
+    return str(path)
+
+def _load(path):
+    with collect_messages():
+        return load_processed_sheet(SHEET, path)
+
+def _rows(path):
+    ws = openpyxl.load_workbook(path)[SHEET]
+    return [list(row[:3]) for row in ws.iter_rows(min_row=2, values_only=True)]
+
+def test_patch_writes_only_the_changed_cells(workbook):
+    df = _load(workbook)
+    with collect_messages():
+        assert patch_excel_row(SHEET, 1, {'TURMA': 7}, workbook, base=df)
+    assert _rows(workbook) == [['Recife', 1, 'SIM'], ['Olinda', 7, 'SIM'], ['Paulista', 3, 'SIM'], ['Igarassu', 4, 'SIM']]
+    assert _load(workbook).attrs['versao_aba'] == df.attrs['versao_aba'] + 1
+
+def test_append_adds_rows_after_the_last_one(workbook):
+    with collect_messages():
+        assert append_excel_row(SHEET, {'CIDADE': 'Goiana', 'TURMA': 5, 'REALIZOU TREINAMENTO?': False}, workbook)
+    assert _rows(workbook)[-1] == ['Goiana', 5, None]
+    assert _load(workbook)['CIDADE'].tolist() == CITIES + ['Goiana']
+
+def test_stale_patch_is_rebased_on_the_city(workbook):
+    base = _load(workbook)
+    # Outra sessão apaga a primeira linha: 'Paulista' passa do índice 2 para o 1
+    other = _load(workbook)
+    with collect_messages():
+        assert save_excel(other.drop(0).reset_index(drop=True), SHEET, workbook)
+        assert patch_excel_row(SHEET, 2, {'TURMA': 9}, workbook, base=base)
+    df = _load(workbook)
+    assert df['CIDADE'].tolist() == ['Olinda', 'Paulista', 'Igarassu']
+    assert df['TURMA'].tolist() == [2, 9, 4]
+
+def test_stale_patch_of_a_deleted_city_is_refused(workbook):
+    base = _load(workbook)
+    with collect_messages() as messages:
+        assert save_excel(base.drop(0).reset_index(drop=True), SHEET, workbook)
+        assert not patch_excel_row(SHEET, 0, {'TURMA': 9}, workbook, base=base)
+    assert "Cidade 'Recife' não encontrada" in messages.errors[-1].text
+
+def test_stale_save_raises_version_conflict(workbook):
+    base = _load(workbook)
+    with collect_messages() as messages:
+        assert patch_excel_row(SHEET, 0, {'TURMA': 8}, workbook, base=_load(workbook))
+        with pytest.raises(VersionConflictError):
+            save_excel(base, SHEET, workbook, background=True).result()
+        # Sem background, o conflito vira uma mensagem de erro e a gravação retorna False
+        assert not save_excel(base, SHEET, workbook)
+    assert 'alterada por outra pessoa' in messages.errors[-1].text
+    assert _rows(workbook)[0] == ['Recife', 8, 'SIM']
+
+def test_after_save_failure_is_logged_and_keeps_the_save(workbook, caplog):
+    def apply(wb):
+        wb[SHEET]['B2'] = 9
+    def after_save(file_path):
+        raise RuntimeError('cache indisponível')
+    with caplog.at_level('ERROR', logger='python_graphs_CIN.writer'):
+        assert WorkbookWriter(debounce=0).submit(workbook, WriteOperation(SHEET, apply, after_save)).result(timeout=10)
+    assert _rows(workbook)[0] == ['Recife', 9, 'SIM']
+    assert 'cache indisponível' in caplog.text
@@ -0,0 +1,231 @@
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+# Diretório do cache colunar (Parquet) das abas já processadas
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", ".cache_abas")
+
+def _sheet_slug(sheet_name):
+    """Converte o nome da aba em um nome de arquivo seguro."""
+    return re.sub(r'[^0-9A-Za-z]+', '_', sheet_name.encode('ascii', 'ignore').decode()).strip('_') or 'aba'
+
+def cache_file_path(sheet_name, fingerprint, cache_dir=CACHE_DIR):
+    """Caminho do arquivo Parquet de uma aba para uma impressão digital do arquivo Excel."""
+    return os.path.join(cache_dir, f"{_sheet_slug(sheet_name)}__{fingerprint}.parquet")
+
+def has_cached_frame(sheet_name, fingerprint, cache_dir=CACHE_DIR):
+    """Indica se já existe entrada em disco para a aba nessa impressão digital."""
+    return os.path.exists(cache_file_path(sheet_name, fingerprint, cache_dir))
+
+def read_cached_frame(sheet_name, fingerprint, cache_dir=CACHE_DIR, columns=None):
+    """Lê a aba processada do cache em disco. Retorna None se não houver entrada válida.
+
+    Com `columns`, só essas colunas (as que existirem na entrada) são lidas do Parquet, na
+    ordem pedida; as demais nem chegam a ser descompactadas.
+    """
+    path = cache_file_path(sheet_name, fingerprint, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        if columns is not None:
+            import pyarrow.parquet as pq
+            available = set(pq.read_schema(path).names)
+            columns = [col for col in columns if col in available]
+        # Colunas de texto voltam como string[pyarrow], o mesmo tipo gravado por process_sheet_data
+        with pd.option_context('mode.string_storage', 'pyarrow'):
+            return pd.read_parquet(path, engine='pyarrow', columns=columns)
+    except Exception:
+        # Entrada corrompida ou gravada por outra versão: descarta e deixa recalcular
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+def write_cached_frame(sheet_name, fingerprint, df, cache_dir=CACHE_DIR):
+    """Grava a aba processada no cache em disco e remove as entradas antigas da mesma aba.
+
+    Retorna False se o DataFrame não puder ser serializado em Parquet (ex.: colunas com
+    tipos mistos ou nomes duplicados); nesse caso a aba simplesmente não é cacheada.
+    """
+    path = cache_file_path(sheet_name, fingerprint, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        df.to_parquet(tmp_path, engine='pyarrow')
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+    purge_cached_frames(sheet_name, keep=os.path.basename(path), cache_dir=cache_dir)
+    return True
+
+def purge_cached_frames(sheet_name, keep=None, cache_dir=CACHE_DIR):
+    """Remove do disco as entradas de uma aba, exceto o arquivo `keep`."""
+    if not os.path.isdir(cache_dir):
+        return
+    prefix = f"{_sheet_slug(sheet_name)}__"
+    for name in os.listdir(cache_dir):
+        if name.startswith(prefix) and name.endswith('.parquet') and name != keep:
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except OSError:
+                pass
+
+# Funções que descartam as entradas de cache de uma aba. Ficam neste módulo para serem
+# compartilhadas entre as duas formas de importar data_utils usadas pelas páginas
+# (utils.data_utils e python_graphs_CIN.utils.data_utils).
+_SHEET_EVICTORS = {}
+_GLOBAL_EVICTORS = {}
+
+def register_sheet_evictor(sheet_name, name, evictor):
+    """Registra `evictor()` para ser chamado quando a aba for invalidada."""
+    _SHEET_EVICTORS.setdefault(sheet_name, {})[name] = evictor
+
+def register_evictor(name, evictor):
+    """Registra `evictor(aba)` para caches com uma entrada por aba (ex.: load_excel)."""
+    _GLOBAL_EVICTORS[name] = evictor
+
+# Orçamento de memória padrão do SHARED_CACHE (DataFrames e figuras guardados no processo)
+SHARED_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+def value_nbytes(value):
+    """Memória ocupada por um valor guardado no cache, em bytes.
+
+    DataFrames e Series contam memory_usage(deep=True); figuras do plotly, o tamanho do
+    JSON serializado (o que o st.plotly_chart envia ao navegador); dicionários, listas e
+    tuplas, a soma dos itens.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, dict):
+        return sum(value_nbytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(value_nbytes(item) for item in value)
+    if hasattr(value, 'to_plotly_json'):
+        return len(value.to_json())
+    return sys.getsizeof(value)
+
+class SharedCache:
+    """Cache LRU do processo (compartilhado por todas as sessões) com orçamento de memória.
+
+    Cada entrada é identificada por (nome, chave) e guarda o tamanho calculado por
+    value_nbytes. Quando o total passa de `max_bytes`, as entradas usadas há mais tempo são
+    descartadas; um valor maior que o orçamento inteiro nem chega a ser guardado. Os
+    contadores `hits`, `misses` e `evictions` acompanham o uso (veja `stats`).
+    """
+
+    def __init__(self, max_bytes=SHARED_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._entry_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, key, default=None):
+        """Valor guardado para (nome, chave), marcado como o mais recente, ou `default`."""
+        with self._lock:
+            entry = self._entries.get((name, key))
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end((name, key))
+            self.hits += 1
+            return entry[0]
+
+    def put(self, name, key, value):
+        """Guarda o valor e descarta as entradas mais antigas até caber no orçamento."""
+        nbytes = value_nbytes(value)
+        with self._lock:
+            self._discard((name, key))
+            if nbytes > self.max_bytes:
+                self.evictions += 1
+                return
+            self._entries[(name, key)] = (value, nbytes)
+            self.nbytes += nbytes
+            self._shrink()
+
+    def get_or_compute(self, name, key, compute):
+        """Valor guardado para (nome, chave); se não houver, calcula com `compute()` e guarda.
+
+        Sessões que pedem a mesma entrada ao mesmo tempo esperam o primeiro cálculo em vez
+        de repeti-lo. A trava da entrada é reentrante: `compute` pode chamar a mesma entrada
+        de novo (ex.: nova tentativa de carga).
+        """
+        entry_key = (name, key)
+        with self._lock:
+            entry_lock = self._entry_locks.setdefault(entry_key, threading.RLock())
+        with entry_lock:
+            with self._lock:
+                entry = self._entries.get(entry_key)
+                if entry is not None:
+                    self._entries.move_to_end(entry_key)
+                    self.hits += 1
+                    return entry[0]
+                self.misses += 1
+            value = compute()
+            self.put(name, key, value)
+            return value
+
+    def clear(self, name, match=None):
+        """Descarta as entradas de `name`: todas, ou só aquelas cuja chave satisfaz `match(chave)`."""
+        with self._lock:
+            for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == name]:
+                if match is None or match(entry_key[1]):
+                    self._discard(entry_key)
+
+    def resize(self, max_bytes):
+        """Troca o orçamento de memória, descartando entradas se o novo for menor."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._shrink()
+
+    def stats(self):
+        """Contadores e ocupação atual do cache."""
+        with self._lock:
+            return {
+                'entries': len(self._entries), 'bytes': self.nbytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+            }
+
+    def _discard(self, entry_key):
+        entry = self._entries.pop(entry_key, None)
+        if entry is not None:
+            self.nbytes -= entry[1]
+        self._entry_locks.pop(entry_key, None)
+
+    def _shrink(self):
+        while self.nbytes > self.max_bytes and self._entries:
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+
+# Cache compartilhado por todas as sessões do servidor: carregadores @shared_frame,
+# figuras dos dashboards, resultados de process_sheet_data e abas brutas dos snapshots do
+# workbook (data_core.WorkbookSnapshot)
+SHARED_CACHE = SharedCache()
+
+def get_processed_frame(sheet_name, digest):
+    """Retorna uma cópia rasa (copy-on-write) do resultado processado da aba, ou None."""
+    df = SHARED_CACHE.get(f"process_sheet_data:{sheet_name}", digest)
+    return None if df is None else df.copy(deep=False)
+
+def put_processed_frame(sheet_name, digest, df):
+    """Guarda uma cópia rasa (copy-on-write) do resultado processado da aba."""
+    SHARED_CACHE.put(f"process_sheet_data:{sheet_name}", digest, df.copy(deep=False))
+
+def evict_sheet(sheet_name):
+    """Descarta as entradas em memória de uma aba em todos os caches registrados."""
+    SHARED_CACHE.clear(f"process_sheet_data:{sheet_name}")
+    for evictor in list(_GLOBAL_EVICTORS.values()):
+        evictor(sheet_name)
+    for evictor in list(_SHEET_EVICTORS.get(sheet_name, {}).values()):
+        evictor()
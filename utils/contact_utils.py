@@ -0,0 +1,69 @@
+import pandas as pd
+
+# Valores tratados como vazios em telefones, e-mails e horários
+EMPTY_CONTACT_VALUES = ['-', 'sn', 'vazio', 'VAZIO', 'nan']
+
+# Código do país usado no E.164 e nos links do WhatsApp
+COUNTRY_CODE = '55'
+
+def _text(series):
+    """Coluna como str(x) célula a célula, com '' nas células vazias.
+
+    Mesma regra de data_core.text_values; fica aqui para este módulo não depender de
+    data_core, que o importa.
+    """
+    present = series.notna()
+    text = pd.Series('', index=series.index, dtype=object)
+    if present.any():
+        text[present] = series[present].astype(str)
+    return text
+
+def _filled(series):
+    """Máscara das células que não são vazias nem um dos EMPTY_CONTACT_VALUES."""
+    return series.notna() & ~series.isin(EMPTY_CONTACT_VALUES)
+
+def phone_text(series):
+    """Telefones como texto, com '' nas células vazias e sem o '.0' dos números que o Excel
+    guarda como float ('71999998888.0' vira '71999998888')."""
+    return _text(series).str.strip().str.replace(r'^(\d+)\.0+$', r'\1', regex=True)
+
+def normalize_phones(series, country_code=COUNTRY_CODE):
+    """Normaliza uma coluna de telefones de uma vez só.
+
+    Retorna um DataFrame com o mesmo índice e as colunas:
+    - 'display': '(dd) ddddd-dddd' ou, com 10 dígitos, '(dd) dddd-dddd', a mesma regra de
+      clean_phone_number;
+    - 'e164': '+55dddddddddd';
+    - 'whatsapp': link https://wa.me/ para o número em E.164.
+    O código do país já presente no número (12 ou mais dígitos começando com ele) não
+    entra no DDD nem é repetido, e o '.0' de números guardados como float é descartado.
+    Telefones vazios ou que, sem o código do país, não têm 10 ou 11 dígitos ficam '' nas
+    três colunas.
+    """
+    digits = phone_text(series).str.replace(r'[^\d]', '', regex=True)
+    # Números brasileiros têm no máximo 11 dígitos; 12 ou mais começando com o código do
+    # país já vieram com ele
+    with_country = (digits.str.len() > 11) & digits.str.startswith(country_code)
+    national = digits.where(~with_country, digits.str[len(country_code):])
+    valid = _filled(series) & national.str.len().between(10, 11)
+    display = '(' + national.str[:2] + ') ' + national.str[2:-4] + '-' + national.str[-4:]
+    e164 = '+' + country_code + national
+    return pd.DataFrame({
+        'display': display.where(valid, ''),
+        'e164': e164.where(valid, ''),
+        'whatsapp': ('https://wa.me/' + e164.str[1:]).where(valid, ''),
+    }, index=series.index)
+
+def normalize_emails(series):
+    """Versão vetorizada de clean_email para uma coluna inteira."""
+    emails = _text(series).str.strip().str.lower()
+    valid = _filled(series) & emails.str.match(r'^[\w\.-]+@[\w\.-]+\.\w+$')
+    return emails.where(valid, '')
+
+def normalize_times(series):
+    """Versão vetorizada de clean_time para uma coluna inteira."""
+    times = _text(series).str.strip()
+    candidates = _filled(series)
+    full = candidates & pd.to_datetime(times, format='%H:%M:%S', errors='coerce').notna()
+    short = candidates & ~full & pd.to_datetime(times, format='%H:%M', errors='coerce').notna()
+    return times.where(full, (times + ':00').where(short, ''))
@@ -3,50 +3,52 @@ import pandas as pd
 from datetime import datetime
 import os
 import re
-import plotly.express as px
-from python_graphs_CIN.utils.data_utils import load_excel, process_sheet_data, SHEET_CONFIG, EXCEL_FILE
+import threading
+from python_graphs_CIN.utils.data_utils import load_processed_sheet, sheet_cache, shared_frame, display_frame, file_cache_key, SHEET_CONFIG, EXCEL_FILE
+from python_graphs_CIN.utils.message_utils import collect_messages, report
 from python_graphs_CIN.pages.ag_info_prefeitura import generate_ag_info_prefeitura_dashboard
 from python_graphs_CIN.pages.ag_instalacao import generate_ag_instalacao_dashboards
 from python_graphs_CIN.pages.ag_visita import generate_ag_visita_dashboards
 from python_graphs_CIN.pages.servicos_a_revisar import generate_servicos_a_revisar_dashboards
 
-@st.cache_data
+# O dashboard central só consulta as abas: carrega apenas as colunas de SHEET_CONFIG
+@sheet_cache('Ag_info_prefeitura')
+@shared_frame
 def load_and_process_ag_info_prefeitura(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Ag_info_prefeitura com caching."""
     try:
-        raw_df = load_excel('Ag_info_prefeitura', _file_path)
-        if raw_df.empty:
+        df = load_processed_sheet('Ag_info_prefeitura', _file_path, project=True)
+        if df.empty:
             return pd.DataFrame()
-        df = process_sheet_data(raw_df, 'Ag_info_prefeitura')
         return df
     except Exception as e:
-        st.error(f"Erro ao processar a aba Ag_info_prefeitura: {str(e)}")
+        report('error', f"Erro ao processar a aba Ag_info_prefeitura: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data
+@sheet_cache('Ag_Instalacao')
+@shared_frame
 def load_and_process_ag_instalacao(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Ag_Instalacao com caching."""
     try:
-        raw_df = load_excel('Ag_Instalacao', _file_path)
-        if raw_df.empty:
+        df = load_processed_sheet('Ag_Instalacao', _file_path, project=True)
+        if df.empty:
             return pd.DataFrame()
-        df = process_sheet_data(raw_df, 'Ag_Instalacao')
         return df
     except Exception as e:
-        st.error(f"Erro ao processar a aba Ag_Instalacao: {str(e)}")
+        report('error', f"Erro ao processar a aba Ag_Instalacao: {str(e)}")
         return pd.DataFrame()
 
-@st.cache_data
+@sheet_cache('Ag. Visita')
+@shared_frame
 def load_and_process_ag_visita(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Ag. Visita com caching."""
     try:
-        raw_df = load_excel('Ag. Visita', _file_path)
-        if raw_df.empty:
+        df = load_processed_sheet('Ag. Visita', _file_path, project=True)
+        if df.empty:
             return pd.DataFrame()
-        df = process_sheet_data(raw_df, 'Ag. Visita')
         return df
     except Exception as e:
-        st.error(f"Erro ao processar a aba Ag. Visita: {str(e)}")
+        report('error', f"Erro ao processar a aba Ag. Visita: {str(e)}")
         return pd.DataFrame()
 
 ARQUIVO_SERVICOS = os.path.join(os.path.dirname(__file__), '..', 'revisarservicos.txt')
@@ -111,7 +113,7 @@ def carregar_dados_servicos():
         df = pd.DataFrame(dados)
         return df
     except Exception as e:
-        st.error(f"Erro ao carregar revisarservicos.txt: {str(e)}")
+        report('error', f"Erro ao carregar revisarservicos.txt: {str(e)}")
         return pd.DataFrame()
 
 def atualizar_tempo_servicos(df):
@@ -135,14 +137,14 @@ def atualizar_tempo_servicos(df):
             df.at[idx, 'TEMPO'] = 0
     return df
 
-@st.cache_data
+@sheet_cache('Produtividade')
+@shared_frame
 def load_and_process_produtividade(_file_path=EXCEL_FILE):
     """Carrega e processa a aba Produtividade com caching."""
     try:
-        raw_df = load_excel('Produtividade', _file_path)
-        if raw_df.empty:
+        df = load_processed_sheet('Produtividade', _file_path, project=True)
+        if df.empty:
             return pd.DataFrame(), []
-        df = process_sheet_data(raw_df, 'Produtividade')
         possible_months = ['JANEIRO', 'FEVEREIRO', 'MARÇO', 'ABRIL', 'MAIO', 'JUNHO', 'JULHO', 'AGOSTO', 'SETEMBRO', 'OUTUBRO', 'NOVEMBRO', 'DEZEMBRO']
         months = [m for m in possible_months if m in df.columns]
         df = df[df['CIDADE'].notna() & (df['CIDADE'] != '') & (df['CIDADE'] != 'TOTAL')]
@@ -161,11 +163,13 @@ def load_and_process_produtividade(_file_path=EXCEL_FILE):
             df = df.groupby('CIDADE').agg(agg_dict).reset_index()
         return df, months
     except Exception as e:
-        st.error(f"Erro ao processar a aba Produtividade: {str(e)}")
+        report('error', f"Erro ao processar a aba Produtividade: {str(e)}")
         return pd.DataFrame(), []
 
+@shared_frame
 def generate_produtividade_dashboard(df, months, limite_cidades="Sem Limites"):
     """Gera gráficos para a aba 'Produtividade'."""
+    import plotly.express as px
     if df.empty or not months:
         return []
     
@@ -221,108 +225,175 @@ def generate_produtividade_dashboard(df, months, limite_cidades="Sem Limites"):
     
     return figs
 
+LIMITES = [2, 5, 10, 15, 20, 50, 100, "Sem Limites"]
+
+def _style_dataframe(df):
+    return df.style.set_table_styles([
+        {'selector': 'th', 'props': [('background-color', '#4F81BD'), ('color', 'white'), ('font-weight', 'bold'), ('text-align', 'center'), ('padding', '8px')]},
+        {'selector': 'td', 'props': [('border', '1px solid #ddd'), ('padding', '8px'), ('text-align', 'center')]},
+        {'selector': 'tr:nth-child(even)', 'props': [('background-color', '#f2f2f2')]},
+        {'selector': 'tr:hover', 'props': [('background-color', '#e0e0e0')]}
+    ]).set_properties(**{'font-size': '14px'})
+
+def load_servicos():
+    """Serviços a revisar (revisarservicos.txt) com a coluna TEMPO atualizada."""
+    df_servicos = carregar_dados_servicos()
+    if not df_servicos.empty:
+        df_servicos = atualizar_tempo_servicos(df_servicos)
+    return df_servicos
+
+def render_ag_info_prefeitura_section(file_path):
+    st.markdown("### Dashboard de Aguardando Informações da Prefeitura")
+    limite_cidades = st.selectbox(
+        "Limitar número de cidades no gráfico",
+        LIMITES,
+        index=7,
+        key="limit_cidades_info"
+    )
+    fig_info = generate_ag_info_prefeitura_dashboard(load_and_process_ag_info_prefeitura(file_path), limite_cidades)
+    if fig_info:
+        st.plotly_chart(fig_info, use_container_width=True)
+    else:
+        st.warning("Nenhum dado disponível.")
+
+def render_ag_instalacao_section(file_path):
+    st.markdown("### Dashboard de Aguardando Instalação")
+    limite_cidades = st.selectbox(
+        "Limitar número de cidades no dashboard",
+        LIMITES,
+        index=7,
+        key="limit_cidades_instalacao"
+    )
+    figs_instal, df_relatorio_instal = generate_ag_instalacao_dashboards(load_and_process_ag_instalacao(file_path), limite_cidades)
+    for fig in figs_instal:
+        st.plotly_chart(fig, use_container_width=True)
+    st.markdown("#### Relatório de Datas por Cidade")
+    if not df_relatorio_instal.empty:
+        st.dataframe(_style_dataframe(display_frame(df_relatorio_instal, 'Ag_Instalacao')), use_container_width=True)
+    else:
+        st.warning("Nenhum dado disponível para o relatório de datas.")
+
+def render_ag_visita_section(file_path):
+    st.markdown("### Dashboard de Aguardando Visita Técnica")
+    limite_cidades = st.selectbox(
+        "Limitar número de cidades no dashboard",
+        LIMITES,
+        index=7,
+        key="limit_cidades_visita"
+    )
+    figs_visita = generate_ag_visita_dashboards(load_and_process_ag_visita(file_path), limite_cidades)
+    for fig in figs_visita:
+        st.plotly_chart(fig, use_container_width=True)
+
+def render_servicos_section(file_path):
+    st.markdown("### Dashboard de Serviços a Revisar")
+    limite_grafico = st.selectbox(
+        "Limitar número de serviços nos gráficos",
+        LIMITES,
+        index=7,
+        key="limit_graph_servicos"
+    )
+    figs_servicos = generate_servicos_a_revisar_dashboards(load_servicos(), limite_grafico)
+    for fig in figs_servicos:
+        st.plotly_chart(fig, use_container_width=True)
+
+def render_produtividade_section(file_path):
+    st.markdown("### Dashboard de Produtividade")
+    limite_cidades = st.selectbox(
+        "Limitar número de cidades no dashboard",
+        LIMITES,
+        index=7,
+        key="limit_cidades_produtividade"
+    )
+    df_produtividade, months_prod = load_and_process_produtividade(file_path)
+    figs_prod = generate_produtividade_dashboard(df_produtividade, months_prod, limite_cidades)
+    for fig in figs_prod:
+        st.plotly_chart(fig, use_container_width=True)
+    if not df_produtividade.empty:
+        st.markdown("#### Tabela de Produtividade")
+        st.dataframe(_style_dataframe(display_frame(df_produtividade, 'Produtividade')), use_container_width=True)
+    else:
+        st.warning("Nenhum dado disponível para o dashboard de produtividade.")
+
+# Pré-carga de cada seção: só as funções de dados e de gráficos (avisam com report, sem
+# st.*), com o limite padrão ("Sem Limites"); nunca as de renderização
+def _warm_ag_info_prefeitura(file_path):
+    generate_ag_info_prefeitura_dashboard(load_and_process_ag_info_prefeitura(file_path), "Sem Limites")
+
+def _warm_ag_instalacao(file_path):
+    generate_ag_instalacao_dashboards(load_and_process_ag_instalacao(file_path), "Sem Limites")
+
+def _warm_ag_visita(file_path):
+    generate_ag_visita_dashboards(load_and_process_ag_visita(file_path), "Sem Limites")
+
+def _warm_servicos(file_path):
+    generate_servicos_a_revisar_dashboards(load_servicos(), "Sem Limites")
+
+def _warm_produtividade(file_path):
+    df_produtividade, months_prod = load_and_process_produtividade(file_path)
+    generate_produtividade_dashboard(df_produtividade, months_prod, "Sem Limites")
+
+# Seções do dashboard central: nome -> (renderização, pré-carga em segundo plano)
+DASHBOARD_SECTIONS = {
+    "Ag Info Prefeitura": (render_ag_info_prefeitura_section, _warm_ag_info_prefeitura),
+    "Ag Instalacao": (render_ag_instalacao_section, _warm_ag_instalacao),
+    "Ag Visita": (render_ag_visita_section, _warm_ag_visita),
+    "Servicos a Revisar": (render_servicos_section, _warm_servicos),
+    "Produtividade": (render_produtividade_section, _warm_produtividade),
+}
+
+# Última versão pré-carregada (file_cache_key) de cada arquivo: {caminho ou 'upload': chave}.
+# Uma versão nova substitui a anterior, como em _SNAPSHOTS
+_WARMED = {}
+_WARMED_LOCK = threading.Lock()
+
+def warm_dashboard_sections(file_path, skip=()):
+    """Pré-carrega em segundo plano as seções do dashboard central, uma vez por versão do arquivo.
+
+    A thread não tem contexto do Streamlit, então só roda funções de dados (veja _warm_*).
+    As mensagens delas são coletadas; as dos carregadores em cache (shared_frame) ficam
+    guardadas com o resultado e aparecem quando a seção for aberta.
+    """
+    key = file_cache_key(file_path)
+    with _WARMED_LOCK:
+        if key is None or _WARMED.get(key[0]) == key:
+            return
+        _WARMED[key[0]] = key
+
+    def warm():
+        with collect_messages():
+            for section, (_, warm_section) in DASHBOARD_SECTIONS.items():
+                if section in skip:
+                    continue
+                try:
+                    warm_section(file_path)
+                except Exception:
+                    pass  # a seção mostra o erro quando for aberta
+
+    threading.Thread(target=warm, name='dashboard-warmup', daemon=True).start()
+
+@st.fragment
+def render_dashboard_section(section, file_path):
+    """Seção aberta do dashboard central. Os seletores de limite reexecutam só esta seção."""
+    DASHBOARD_SECTIONS[section][0](file_path)
+
 def render_dashboard_central(uploaded_file=None):
-    """Renderiza o dashboard central com todas as abas."""
+    """Renderiza o dashboard central: só a seção escolhida é carregada e desenhada."""
     st.markdown("""
         <h2>Dashboard Central <span class="material-icons" style="vertical-align: middle; color: #004aad;">dashboard</span></h2>
     """, unsafe_allow_html=True)
     
     file_path = uploaded_file if uploaded_file else EXCEL_FILE
-    df_info_prefeitura = load_and_process_ag_info_prefeitura(file_path)
-    df_instalacao = load_and_process_ag_instalacao(file_path)
-    df_visita = load_and_process_ag_visita(file_path)
-    df_servicos = carregar_dados_servicos()
-    if not df_servicos.empty:
-        df_servicos = atualizar_tempo_servicos(df_servicos)
-    df_produtividade, months_prod = load_and_process_produtividade(file_path)
-    
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["Ag Info Prefeitura", "Ag Instalacao", "Ag Visita", "Servicos a Revisar", "Produtividade"])
-    
-    with tab1:
-        st.markdown("### Dashboard de Aguardando Informações da Prefeitura")
-        limite_cidades = st.selectbox(
-            "Limitar número de cidades no gráfico",
-            [2, 5, 10, 15, 20, 50, 100, "Sem Limites"],
-            index=7,
-            key="limit_cidades_info"
-        )
-        fig_info = generate_ag_info_prefeitura_dashboard(df_info_prefeitura, limite_cidades)
-        if fig_info:
-            st.plotly_chart(fig_info, use_container_width=True)
-        else:
-            st.warning("Nenhum dado disponível.")
-    
-    with tab2:
-        st.markdown("### Dashboard de Aguardando Instalação")
-        limite_cidades = st.selectbox(
-            "Limitar número de cidades no dashboard",
-            [2, 5, 10, 15, 20, 50, 100, "Sem Limites"],
-            index=7,
-            key="limit_cidades_instalacao"
-        )
-        figs_instal, df_relatorio_instal = generate_ag_instalacao_dashboards(df_instalacao, limite_cidades)
-        for fig in figs_instal:
-            st.plotly_chart(fig, use_container_width=True)
-        st.markdown("#### Relatório de Datas por Cidade")
-        if not df_relatorio_instal.empty:
-            def style_dataframe(df):
-                return df.style.set_table_styles([
-                    {'selector': 'th', 'props': [('background-color', '#4F81BD'), ('color', 'white'), ('font-weight', 'bold'), ('text-align', 'center'), ('padding', '8px')]},
-                    {'selector': 'td', 'props': [('border', '1px solid #ddd'), ('padding', '8px'), ('text-align', 'center')]},
-                    {'selector': 'tr:nth-child(even)', 'props': [('background-color', '#f2f2f2')]},
-                    {'selector': 'tr:hover', 'props': [('background-color', '#e0e0e0')]}
-                ]).set_properties(**{'font-size': '14px'})
-            st.dataframe(style_dataframe(df_relatorio_instal), use_container_width=True)
-        else:
-            st.warning("Nenhum dado disponível para o relatório de datas.")
-    
-    with tab3:
-        st.markdown("### Dashboard de Aguardando Visita Técnica")
-        limite_cidades = st.selectbox(
-            "Limitar número de cidades no dashboard",
-            [2, 5, 10, 15, 20, 50, 100, "Sem Limites"],
-            index=7,
-            key="limit_cidades_visita"
-        )
-        figs_visita = generate_ag_visita_dashboards(df_visita, limite_cidades)
-        for fig in figs_visita:
-            st.plotly_chart(fig, use_container_width=True)
-    
-    with tab4:
-        st.markdown("### Dashboard de Serviços a Revisar")
-        limite_grafico = st.selectbox(
-            "Limitar número de serviços nos gráficos",
-            [2, 5, 10, 15, 20, 50, 100, "Sem Limites"],
-            index=7,
-            key="limit_graph_servicos"
-        )
-        figs_servicos = generate_servicos_a_revisar_dashboards(df_servicos, limite_grafico)
-        for fig in figs_servicos:
-            st.plotly_chart(fig, use_container_width=True)
-    
-    with tab5:
-        st.markdown("### Dashboard de Produtividade")
-        limite_cidades = st.selectbox(
-            "Limitar número de cidades no dashboard",
-            [2, 5, 10, 15, 20, 50, 100, "Sem Limites"],
-            index=7,
-            key="limit_cidades_produtividade"
-        )
-        figs_prod = generate_produtividade_dashboard(df_produtividade, months_prod, limite_cidades)
-        for fig in figs_prod:
-            st.plotly_chart(fig, use_container_width=True)
-        if not df_produtividade.empty:
-            st.markdown("#### Tabela de Produtividade")
-            def style_dataframe(df):
-                return df.style.set_table_styles([
-                    {'selector': 'th', 'props': [('background-color', '#4F81BD'), ('color', 'white'), ('font-weight', 'bold'), ('text-align', 'center'), ('padding', '8px')]},
-                    {'selector': 'td', 'props': [('border', '1px solid #ddd'), ('padding', '8px'), ('text-align', 'center')]},
-                    {'selector': 'tr:nth-child(even)', 'props': [('background-color', '#f2f2f2')]},
-                    {'selector': 'tr:hover', 'props': [('background-color', '#e0e0e0')]}
-                ]).set_properties(**{'font-size': '14px'})
-            st.dataframe(style_dataframe(df_produtividade), use_container_width=True)
-        else:
-            st.warning("Nenhum dado disponível para o dashboard de produtividade.")
+    section = st.radio(
+        "Seção do dashboard",
+        list(DASHBOARD_SECTIONS),
+        horizontal=True,
+        key="dashboard_central_secao",
+        label_visibility="collapsed"
+    )
+    render_dashboard_section(section, file_path)
+    # As demais seções ficam prontas no cache enquanto o usuário olha esta
+    warm_dashboard_sections(file_path, skip=(section,))
 
 if __name__ == "__main__":
     render_dashboard_central()
\ No newline at end of file
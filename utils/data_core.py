@@ -0,0 +1,1919 @@
+import pandas as pd
+import re
+from datetime import datetime
+import numpy as np
+import os
+from io import BytesIO
+import hashlib
+import threading
+import posixpath
+import zipfile
+import inspect
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import namedtuple
+from itertools import chain, islice
+from functools import lru_cache, wraps
+from types import MappingProxyType
+from xml.etree import ElementTree
+from python_graphs_CIN.utils.cache_utils import (
+    has_cached_frame, read_cached_frame, write_cached_frame,
+    register_evictor, register_sheet_evictor, get_processed_frame, put_processed_frame, evict_sheet,
+    SHARED_CACHE,
+)
+from python_graphs_CIN.utils.contact_utils import normalize_phones, normalize_emails, normalize_times, phone_text
+from python_graphs_CIN.utils.writer_utils import WRITER, WriteOperation, atomic_save, file_lock
+from python_graphs_CIN.utils.message_utils import report, replay, collect_messages
+
+# Camada de dados sem Streamlit: pode rodar em processos de trabalho, scripts e rotinas
+# agendadas. Avisos e erros saem por message_utils.report (colete com collect_messages);
+# as páginas usam utils.data_utils, que mostra essas mensagens na interface.
+
+# openpyxl é importado dentro das funções que leem em blocos ou gravam o Excel: a Home e
+# os scripts que só usam os dados em cache não pagam essa importação (veja
+# scripts/importtime_report.py).
+
+# Copy-on-write do pandas: cópias rasas e fatias não copiam dados, e só a coluna alterada
+# é copiada na primeira escrita. É o que permite entregar a mesma aba em cache a todas
+# as sessões (veja shared_frame) sem uma sessão alterar os dados das outras.
+pd.set_option('mode.copy_on_write', True)
+
+# Caminho padrão do arquivo Excel
+EXCEL_FILE = os.path.join(os.path.dirname(__file__), "..", "ACOMPANHAMENTO_CIN_EM_TODO_LUGAR.xlsx")
+FALLBACK_EXCEL_FILE = r"C:/Users/re049227/Documents/python_graphs_CIN/ACOMPANHAMENTO_CIN_EM_TODO_LUGAR.xlsx"
+
+# Normalizar nomes das abas para comparação
+def normalize_sheet_name(name):
+    """Normaliza nomes de abas removendo acentos, pontos e convertendo para minúsculas."""
+    if not name:
+        return name
+    name = name.replace('.', ' ').replace('_', ' ').replace('-', ' ')
+    name = re.sub(r'[áàãâä]', 'a', name.lower())
+    name = re.sub(r'[éèêë]', 'e', name)
+    name = re.sub(r'[íìîï]', 'i', name)
+    name = re.sub(r'[óòõôö]', 'o', name)
+    name = re.sub(r'[úùûü]', 'u', name)
+    name = re.sub(r'[ç]', 'c', name)
+    return name.strip()
+
+# Mapeamento de nomes normalizados para nomes reais
+SHEET_NAME_MAPPING = {
+    normalize_sheet_name(sheet): sheet for sheet in [
+        'Geral-Amplo', 'Lista X', 'Geral-Resumo', 'Status', 'Visitas Realizadas',
+        'Ag. Visita', 'Ag_info_prefeitura', 'Ag_Instalacao', 'Publicados', 'Instalados',
+        'Funcionando', 'Treina-turma', 'Treina-cidade', 'Informações', 'Chefes_Posto', 'Produtividade'
+    ]
+}
+
+@lru_cache(maxsize=None)
+def resolve_sheet_name(sheet_name):
+    """Nome real da aba para um nome escrito de qualquer forma (acentos, '_', '-', maiúsculas)."""
+    return SHEET_NAME_MAPPING.get(normalize_sheet_name(sheet_name), sheet_name)
+
+# Configuração das abas com colunas e tipos
+SHEET_CONFIG = {
+    'Geral-Amplo': {'columns': {'CIDADE': {'type': 'string'}}},
+    'Lista X': {'columns': {'CIDADE': {'type': 'string'}}},
+    'Geral-Resumo': {'columns': {'CIDADE': {'type': 'string'}}},
+    'Status': {'columns': {'CIDADE': {'type': 'string'}}},
+    'Visitas Realizadas': {
+        'columns': {
+            'CIDADE': {'type': 'string'},
+            'DATA DA VISITA': {'type': 'date', 'format': '%d/%m/%Y'},
+            'PARECER DA VISITA TÉCNICA': {'type': 'categorical', 'values': ['Aprovado', 'Pendente', 'Reprovado']},
+            'APTO PARA INSTALAÇÃO?': {'type': 'boolean'},
+            'OBSERVAÇÃO': {'type': 'string'}
+        }
+    },
+    'Ag. Visita': {
+        'columns': {
+            'CIDADE': {'type': 'string'},
+            'SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA': {
+                'type': 'categorical',
+                'values': ['Sem pendência', 'Com Pendência', 'Não Informada']
+            },
+            'DATA DA VISITA TÉCNICA': {'type': 'date', 'format': '%d/%m/%Y'},
+            'PARECER DA VISITA TÉCNICA': {
+                'type': 'categorical',
+                'values': ['Reprovado', 'Aprovado', '']
+            },
+            'ADEQUAÇÕES APÓS VISITA TÉCNICA REALIZADAS': {'type': 'string'},
+            'DATA DE FINALIZAÇÃO DAS ADEQUAÇÕES': {'type': 'date', 'format': '%d/%m/%Y'}
+        }
+    },
+    'Ag_info_prefeitura': {
+        'columns': {
+            'CIDADE': {'type': 'string'},
+            'SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA': {
+                'type': 'categorical',
+                'values': ['Sem pendência', 'Com Pendência', 'Não Informada']
+            },
+            'DATA DA VISITA TÉCNICA': {'type': 'date', 'format': '%d/%m/%Y'}
+        }
+    },
+    'Ag_Instalacao': {
+        'columns': {
+            'CIDADE': {'type': 'string'},
+            'SIT. DA INFRA-ESTRUTURA P/VISITA TÉCNICA': {
+                'type': 'categorical',
+                'values': ['Sem pendência', 'Com Pendência', 'Não Informada']
+            },
+            'PARECER DA VISITA TÉCNICA': {
+                'type': 'categorical',
+                'values': ['Aprovado', 'Reprovado']
+            },
+            'REALIZOU TREINAMENTO?': {'type': 'boolean'},
+            'SITUAÇÃO DO NOVO TERMO DE COOPERAÇÃO': {
+                'type': 'categorical',
+                'values': ['Publicado D.O.', 'Não Publicado D.O.']
+            },
+            'DATA DO D.O.': {'type': 'date', 'format': '%d/%m/%Y'},
+            'APTO PARA INSTALAÇÃO': {'type': 'boolean'},
+            'DATA DA INSTALAÇÃO': {'type': 'date', 'format': '%d/%m/%Y'},
+            'DATA DO INÍCIO ATEND.': {'type': 'date', 'format': '%d/%m/%Y'}
+        }
+    },
+    'Publicados': {'columns': {'CIDADE': {'type': 'string'}}},
+    'Instalados': {
+        'columns': {
+            'CIDADE': {'type': 'string'},
+            'DATA DA INSTALAÇÃO': {'type': 'date', 'format': '%d/%m/%Y'},
+            'PREFEITURAS DE': {'type': 'string'}
+        }
+    },
+    'Funcionando': {'columns': {'CIDADE': {'type': 'string'}}},
+    'Treina-turma': {
+        'columns': {
+            'CIDADE': {'type': 'string'},
+            'PERÍODO PREVISTO DE TREINAMENTO_INÍCIO': {'type': 'date', 'format': '%d/%m/%Y'},
+            'PERÍODO PREVISTO DE TREINAMENTO_FIM': {'type': 'date', 'format': '%d/%m/%Y'},
+            'TURMA': {'type': 'int'},
+            'REALIZOU TREINAMENTO?': {'type': 'boolean'}
+        }
+    },
+    'Treina-cidade': {'columns': {'CIDADE': {'type': 'string'}}},
+    'Informações': {
+        'stream': True,
+        'columns': {
+            'CIDADE': {'type': 'string'},
+            'Telefone Celular chefe de posto': {
+                'type': 'phone', 'keep_original': True, 'e164': 'Telefone Celular chefe de posto (E.164)', 'whatsapp': 'Link WhatsApp'
+            },
+            'Telefone do Secretário': {
+                'type': 'phone', 'keep_original': True, 'e164': 'Telefone do Secretário (E.164)', 'whatsapp': 'Link WhatsApp 2'
+            },
+        }
+    },
+    'Chefes_Posto': {
+        'columns': {
+            'CIDADE': {'type': 'string'},
+            'POSTO': {'type': 'string'},
+            'NOME': {'type': 'string'},
+            'E-MAIL': {'type': 'email'},
+            'TELEFONE': {'type': 'phone'},
+            'TURMA': {'type': 'int'},
+            'DATA TREINAMENTO': {'type': 'training_period'},
+            'USUÁRIO': {'type': 'string'}
+        }
+    },
+    'Produtividade': {
+        'stream': True,
+        'columns': {
+            'CIDADE': {'type': 'string'},
+            'PREFEITURAS DE': {'type': 'string'},
+            'REALIZOU TREINAMENTO?': {'type': 'boolean'},
+            'DATA DA INSTALAÇÃO': {'type': 'date', 'format': '%d/%m/%Y'},
+            'DATA DO INÍCIO ATEND.': {'type': 'date', 'format': '%d/%m/%Y'},
+            'PERÍODO PREVISTO DE TREINAMENTO_INÍCIO': {'type': 'date', 'format': '%d/%m/%Y'},
+            'PERÍODO PREVISTO DE TREINAMENTO_FIM': {'type': 'date', 'format': '%d/%m/%Y'},
+            'JANEIRO': {'type': 'float'},
+            'FEVEREIRO': {'type': 'float'},
+            'MARÇO': {'type': 'float'},
+            'ABRIL': {'type': 'float'},
+            'MAIO': {'type': 'float'},
+            'JUNHO': {'type': 'float'},
+            'JULHO': {'type': 'float'},
+            'AGOSTO': {'type': 'float'},
+            'SETEMBRO': {'type': 'float'},
+            'OUTUBRO': {'type': 'float'},
+            'NOVEMBRO': {'type': 'float'},
+            'DEZEMBRO': {'type': 'float'}
+        }
+    }
+}
+
+MISSING_FILE_HELP = """
+                    ### Possíveis Soluções
+                    - Verifique se o arquivo `ACOMPANHAMENTO_CIN_EM_TODO_LUGAR.xlsx` está em `C:\\Users\\re049227\\Documents\\python_graphs_CIN\\`.
+                    - Confirme se o nome do arquivo está correto (sem espaços extras ou caracteres ocultos).
+                    - Se o arquivo foi carregado via upload, certifique-se de que o módulo `upload_excel.py` está configurado corretamente.
+                    - Em produção, verifique o caminho do arquivo no servidor ou contêiner.
+                    - Certifique-se de que o arquivo não está corrompido ou bloqueado por outro programa.
+                    """
+
+def resolve_excel_path(file_path=EXCEL_FILE):
+    """Retorna o caminho do arquivo Excel a ser lido (principal ou alternativo), ou None se nenhum existir."""
+    if isinstance(file_path, BytesIO):
+        return file_path
+    if os.path.exists(file_path):
+        return file_path
+    report('warning', f"Arquivo não encontrado no caminho principal: {os.path.abspath(file_path)}")
+    if os.path.exists(FALLBACK_EXCEL_FILE):
+        return FALLBACK_EXCEL_FILE
+    report('error', f"Arquivo não encontrado no caminho alternativo: {os.path.abspath(FALLBACK_EXCEL_FILE)}")
+    report('help', MISSING_FILE_HELP)
+    return None
+
+class WorkbookSnapshot:
+    """Leitura única do arquivo Excel.
+
+    O arquivo é lido do disco e descompactado uma só vez; todas as abas de SHEET_CONFIG
+    são interpretadas numa única passada e entregues por aba através de `get`. Abas com
+    faixas de título acima do cabeçalho ou cabeçalho em duas linhas são lidas a partir do
+    cabeçalho achado por resolve_header.
+
+    Os DataFrames brutos ficam no SHARED_CACHE (entradas SNAPSHOT_CACHE_NAME), dentro do
+    orçamento de memória dos demais caches; se forem descartados, `get` interpreta a aba de
+    novo a partir do workbook já aberto.
+    """
+
+    def __init__(self, file_path, sheet_names=None, key=None):
+        if isinstance(file_path, BytesIO):
+            data = file_path.getvalue()
+        else:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+        self.file_path = file_path
+        self.key = _snapshot_key(file_path) if key is None else key
+        self._lock = threading.Lock()
+        self._xls = pd.ExcelFile(BytesIO(data), engine='openpyxl')
+        self.sheet_names = self._xls.sheet_names
+        wanted = [resolve_sheet_name(sheet) for sheet in (SHEET_CONFIG.keys() if sheet_names is None else sheet_names)]
+        wanted = [sheet for sheet in dict.fromkeys(wanted) if sheet in self.sheet_names]
+        self._layouts = {}
+        # Abas com o cabeçalho na primeira linha numa só passada; as demais uma a uma
+        first_row_header = [sheet for sheet in wanted if self._layout(sheet) is None]
+        frames = self._xls.parse(sheet_name=first_row_header) if first_row_header else {}
+        for sheet in wanted:
+            self._store(sheet, frames[sheet] if sheet in frames else self._parse(sheet))
+
+    def _layout(self, sheet_name):
+        """Cabeçalho da aba (veja resolve_header), lido das primeiras linhas do workbook já aberto."""
+        if sheet_name not in self._layouts:
+            worksheet = self._xls.book[sheet_name]
+            self._layouts[sheet_name] = _header_layout(sheet_name, self.file_path, lambda n: list(worksheet.iter_rows(max_row=n, values_only=True)))
+        return self._layouts[sheet_name]
+
+    def _parse(self, sheet_name, usecols=None):
+        layout = self._layout(sheet_name)
+        if layout is None:
+            return self._xls.parse(sheet_name=sheet_name, usecols=usecols)
+        # Cabeçalho fora da primeira linha ou em duas linhas: lê a partir da última linha do
+        # cabeçalho e troca os nomes pelos achatados
+        df = self._xls.parse(sheet_name=sheet_name, header=layout.row + layout.depth - 1)
+        names = _unique_headers(layout.names)
+        df.columns = [names[i] if i < len(names) else col for i, col in enumerate(df.columns)]
+        if usecols is not None:
+            df = df.loc[:, [usecols(col) for col in df.columns]]
+        return df
+
+    def _store(self, sheet_name, df):
+        SHARED_CACHE.put(SNAPSHOT_CACHE_NAME, (self.key, sheet_name), df)
+        return df
+
+    def has_sheet(self, sheet_name):
+        return resolve_sheet_name(sheet_name) in self.sheet_names
+
+    def get(self, sheet_name, usecols=None):
+        """Retorna uma cópia rasa (copy-on-write) do DataFrame bruto da aba, ou None se a aba
+        não existir no arquivo.
+
+        `usecols(cabeçalho) -> bool` limita as colunas devolvidas. Se a aba ainda não foi
+        interpretada, só essas colunas são lidas e o resultado incompleto não fica no snapshot.
+        """
+        actual_sheet_name = resolve_sheet_name(sheet_name)
+        if actual_sheet_name not in self.sheet_names:
+            return None
+        with self._lock:
+            df = SHARED_CACHE.get(SNAPSHOT_CACHE_NAME, (self.key, actual_sheet_name))
+            if df is None:
+                if usecols is not None:
+                    return self._parse(actual_sheet_name, usecols)
+                # Abas fora de SHEET_CONFIG (ex.: exploradas em upload_excel) ou já
+                # descartadas do SHARED_CACHE são lidas sob demanda
+                df = self._store(actual_sheet_name, self._parse(actual_sheet_name))
+            if usecols is not None:
+                df = df.loc[:, [usecols(col) for col in df.columns]]
+            return df.copy(deep=False)
+
+# Snapshot atual de cada arquivo: {caminho ou 'upload': WorkbookSnapshot}. Os DataFrames
+# brutos ficam no SHARED_CACHE, com chave (chave do snapshot, aba)
+_SNAPSHOTS = {}
+_SNAPSHOTS_LOCK = threading.Lock()
+SNAPSHOT_CACHE_NAME = 'workbook_snapshot'
+
+def _snapshot_key(file_path):
+    if isinstance(file_path, BytesIO):
+        return ('upload', hashlib.md5(file_path.getvalue()).hexdigest())
+    stat = os.stat(file_path)
+    return (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+def file_cache_key(file_path=EXCEL_FILE):
+    """Impressão digital barata do arquivo que seria lido de `file_path`, para chaves de cache.
+
+    Caminhos viram (caminho absoluto, tamanho, mtime) do arquivo principal ou, se ele não
+    existir, do alternativo (como em resolve_excel_path); BytesIO vira o md5 dos bytes.
+    Arquivos diferentes, ou versões diferentes do mesmo arquivo, nunca dividem entrada.
+    Retorna None se nenhum arquivo existir.
+    """
+    if not isinstance(file_path, BytesIO):
+        file_path = next((path for path in (file_path, FALLBACK_EXCEL_FILE) if isinstance(path, str) and os.path.exists(path)), None)
+        if file_path is None:
+            return None
+    return _snapshot_key(file_path)
+
+def get_workbook_snapshot(file_path=EXCEL_FILE, sheet_names=None):
+    """Retorna o snapshot do arquivo, reaproveitando o já carregado enquanto o arquivo não mudar.
+
+    `sheet_names` limita as abas interpretadas de imediato quando um novo snapshot é criado;
+    as demais são lidas sob demanda.
+    """
+    key = _snapshot_key(file_path)
+    with _SNAPSHOTS_LOCK:
+        snapshot = _SNAPSHOTS.get(key[0])
+        if snapshot is None or snapshot.key != key:
+            # As abas da versão anterior do arquivo não serão mais lidas
+            SHARED_CACHE.clear(SNAPSHOT_CACHE_NAME, lambda entry: entry[0][0] == key[0])
+            snapshot = WorkbookSnapshot(file_path, sheet_names, key)
+            _SNAPSHOTS[key[0]] = snapshot
+        return snapshot
+
+def _shared_view(value):
+    """Cópia rasa do resultado guardado: mesmos dados, objeto próprio da sessão."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, dict):
+        return {key: _shared_view(item) for key, item in value.items()}
+    if isinstance(value, (tuple, list)):
+        return type(value)(_shared_view(item) for item in value)
+    return value
+
+# Argumentos dos carregadores que indicam o arquivo Excel lido
+_FILE_ARGUMENTS = ('_file_path', 'file_path', 'uploaded_file')
+
+def _shared_key_value(value):
+    """Forma hasheável de um argumento na chave de shared_frame.
+
+    DataFrames entram pelo hash do conteúdo e arquivos enviados (BytesIO) pelo md5 dos
+    bytes, como no st.cache_data.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        digest = _frame_digest(value.to_frame() if isinstance(value, pd.Series) else value)
+        if digest is None:
+            raise TypeError("DataFrame sem hash de conteúdo")
+        return ('frame', digest)
+    if isinstance(value, BytesIO):
+        return file_cache_key(value)
+    if isinstance(value, list):
+        return ('list', tuple(_shared_key_value(item) for item in value))
+    hash(value)
+    return value
+
+def shared_frame(func):
+    """Cache por processo para carregadores de abas e geradores de gráficos, no lugar de
+    @st.cache_data.
+
+    O st.cache_data serializa o resultado e devolve uma cópia nova a cada acerto, em cada
+    sessão; com muitas sessões abertas a memória cresce com sessões x abas. Aqui o
+    resultado fica uma única vez no SHARED_CACHE (LRU com orçamento de memória) e cada
+    chamada recebe uma cópia rasa dos mesmos dados. Com o copy-on-write ligado, editar a
+    cópia (df.at[...], df[col] = ...) copia só as colunas alteradas, sem afetar as outras
+    sessões. Figuras do plotly são devolvidas como estão: não devem ser alteradas depois.
+
+    Como no st.cache_data, argumentos com nome começando por '_' não entram na chave, com
+    exceção dos que indicam o arquivo lido (_FILE_ARGUMENTS), que entram pela impressão
+    digital do arquivo (file_cache_key): outro arquivo enviado, o alternativo ou uma nova
+    versão do arquivo nunca recebem a entrada de outro. Argumentos que não podem entrar na
+    chave fazem a chamada passar direto, sem cache.
+
+    `func.clear()` descarta todas as entradas e `func.clear(args)` só as desses argumentos,
+    em qualquer arquivo (usado por sheet_cache/invalidate_sheet).
+
+    As mensagens emitidas pelo carregador com report ficam guardadas junto do resultado e
+    são emitidas de novo a cada acerto, como o st.cache_data fazia com st.warning/st.error.
+    Só essas: chamadas diretas a st.* dentro do carregador aparecem apenas na execução que
+    calculou o resultado, então carregadores em cache avisam sempre com report.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+    signature = inspect.signature(func)
+
+    def key_items(arguments):
+        for param, value in arguments.items():
+            if param in _FILE_ARGUMENTS:
+                yield param, file_cache_key(EXCEL_FILE if value is None else value)
+            elif not param.startswith('_'):
+                yield param, _shared_key_value(value)
+
+    def cache_key(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return tuple(key_items(bound.arguments))
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            key = cache_key(args, kwargs)
+        except TypeError:
+            return func(*args, **kwargs)
+
+        def compute():
+            with collect_messages() as messages:
+                value = func(*args, **kwargs)
+            return value, tuple(messages)
+
+        value, messages = SHARED_CACHE.get_or_compute(name, key, compute)
+        replay(messages)
+        return _shared_view(value)
+
+    def clear(*args, **kwargs):
+        given = set(key_items(signature.bind_partial(*args, **kwargs).arguments))
+        SHARED_CACHE.clear(name, given.issubset if given else None)
+
+    wrapper.clear = clear
+    return wrapper
+
+@shared_frame
+def load_excel(sheet_name, _file_path=EXCEL_FILE):
+    """Carrega uma aba específica do arquivo Excel com caching."""
+    if isinstance(_file_path, BytesIO):
+        report('debug', "Usando arquivo carregado via upload")
+    return _read_sheet(sheet_name, _file_path)
+
+# load_excel tem uma entrada por aba e arquivo; clear(aba) descarta a aba em todos os arquivos
+register_evictor(f"{__name__}.load_excel", lambda sheet_name: load_excel.clear(sheet_name))
+
+def _read_sheet(sheet_name, _file_path=EXCEL_FILE, usecols=None):
+    """Lê uma aba do snapshot atual do arquivo, sem passar pelo cache (shared_frame).
+
+    `usecols` (nomes de coluna já normalizados, como em SHEET_CONFIG) limita a leitura a
+    essas colunas; as demais colunas da planilha não são convertidas em DataFrame.
+    """
+    try:
+        actual_sheet_name = resolve_sheet_name(sheet_name)
+        plan = sheet_plan(actual_sheet_name)
+        header_renames = plan.header_renames if plan is not None else HEADER_RENAMES
+        
+        file_path = resolve_excel_path(_file_path)
+        if file_path is None:
+            return pd.DataFrame()
+        if not isinstance(file_path, BytesIO):
+            WRITER.wait(file_path)
+        # Na projeção o snapshot não interpreta as demais abas de uma vez
+        snapshot = get_workbook_snapshot(file_path, sheet_names=() if usecols is not None else None)
+        
+        # Verify sheet existence
+        if not snapshot.has_sheet(actual_sheet_name):
+            report('error', f"Aba '{actual_sheet_name}' não encontrada no arquivo Excel. Abas disponíveis: {snapshot.sheet_names}")
+            return pd.DataFrame()
+        
+        header_filter = None
+        if usecols is not None:
+            wanted = set(usecols)
+            header_filter = lambda header: normalize_headers(pd.Index([str(header)]), header_renames)[0] in wanted
+        df = snapshot.get(actual_sheet_name, usecols=header_filter)
+        df.columns = normalize_headers(df.columns, header_renames)
+        
+        missing_cols = plan.fill_missing(df) if plan is not None else []
+        if missing_cols:
+            report('warning', f"Colunas ausentes na aba '{actual_sheet_name}': {', '.join(missing_cols)}")
+        
+        _clean_object_columns(df)
+        
+        return df
+    except Exception as e:
+        report('error', f"Erro ao carregar a aba {sheet_name}: {str(e)}")
+        report('debug', f"Abas disponíveis no arquivo: {snapshot.sheet_names if 'snapshot' in locals() else 'Arquivo não carregado'}")
+        return pd.DataFrame()
+
+def parse_training_period(period):
+    """Parseia o período de treinamento no formato 'dd/mm a dd/mm/yy' e retorna as datas de início e fim."""
+    if pd.isna(period) or period in ['-', '', 'VAZIO', 'N-PREV.', 'nan']:
+        return pd.Series([pd.NaT, pd.NaT])
+    
+    try:
+        period = str(period).strip()
+        if not period or period in ['-', 'VAZIO', 'N-PREV.']:
+            return pd.Series([pd.NaT, pd.NaT])
+        
+        parts = re.split(r'\s*(?:à|a)\s*', period, flags=re.IGNORECASE)
+        if len(parts) != 2:
+            return pd.Series([pd.NaT, pd.NaT])
+        
+        start_date, end_date = parts
+        # Adicionar ano à primeira data, se necessário
+        if len(start_date.split('/')) == 2:
+            start_date = f"{start_date}/20{end_date[-2:]}"
+        elif len(start_date.split('/')) == 3 and len(start_date.split('/')[-1]) == 2:
+            start_date = f"{start_date[:6]}20{start_date[-2:]}"
+        
+        if len(end_date.split('/')) == 2:
+            end_date = f"{end_date}/20{end_date[-2:]}"
+        elif len(end_date.split('/')) == 3 and len(end_date.split('/')[-1]) == 2:
+            end_date = f"{end_date[:6]}20{end_date[-2:]}"
+        
+        for fmt in ['%d/%m/%Y', '%d/%m/%y']:
+            try:
+                start_dt = pd.to_datetime(start_date, format=fmt, errors='coerce')
+                end_dt = pd.to_datetime(end_date, format=fmt, errors='coerce')
+                if pd.notna(start_dt) and pd.notna(end_dt):
+                    return pd.Series([start_dt, end_dt])
+            except:
+                continue
+        
+        return pd.Series([pd.NaT, pd.NaT])
+    except Exception:
+        return pd.Series([pd.NaT, pd.NaT])
+
+def clean_phone_number(phone):
+    """Limpa e padroniza números de telefone."""
+    if pd.isna(phone) or phone in ['-', 'sn', 'vazio', 'VAZIO', 'nan']:
+        return ''
+    # Sem o '.0' dos números guardados como float, como em contact_utils.normalize_phones
+    phone = re.sub(r'^(\d+)\.0+$', r'\1', str(phone).strip())
+    phone = re.sub(r'[^\d]', '', phone)
+    # Sem o código do país; o que sobra precisa ter 10 ou 11 dígitos
+    if len(phone) > 11 and phone.startswith('55'):
+        phone = phone[2:]
+    if len(phone) in (10, 11):
+        return f"({phone[:2]}) {phone[2:-4]}-{phone[-4:]}"
+    return ''
+
+def clean_email(email):
+    """Limpa e padroniza e-mails."""
+    if pd.isna(email) or email in ['-', 'sn', 'vazio', 'VAZIO', 'nan']:
+        return ''
+    email = str(email).strip().lower()
+    if re.match(r'^[\w\.-]+@[\w\.-]+\.\w+$', email):
+        return email
+    return ''
+
+def clean_time(time):
+    """Limpa e padroniza horários."""
+    if pd.isna(time) or time in ['-', 'sn', 'vazio', 'VAZIO', 'nan']:
+        return ''
+    time = str(time).strip()
+    try:
+        pd.to_datetime(time, format='%H:%M:%S')
+        return time
+    except:
+        try:
+            pd.to_datetime(time, format='%H:%M')
+            return time + ':00'
+        except:
+            return ''
+
+# Tipo das colunas 'string' das abas processadas: texto em Arrow ocupa bem menos memória
+# que objetos str do Python
+TEXT_DTYPE = 'string[pyarrow]'
+
+def text_values(series):
+    """Converte uma coluna para texto como str(x) célula a célula, com '' nas células vazias."""
+    present = series.notna()
+    text = pd.Series('', index=series.index, dtype=object)
+    if present.any():
+        text[present] = series[present].astype(str)
+    return text
+
+def _map_unique(series, transform):
+    """Aplica `transform` (Series -> Series) uma vez por valor distinto da coluna.
+
+    As colunas da planilha repetem muito (status, cidades, datas), então transformar só os
+    valores distintos e espalhar o resultado pelas linhas evita repetir o mesmo trabalho.
+    Só é usado em colunas de texto puro, inteiros, booleanos ou datas, em que valores iguais
+    no factorize (ex.: 1 e True numa coluna mista) não podem ter resultados diferentes.
+    """
+    if len(series) < 1000:
+        return transform(series)
+    if series.dtype.kind not in 'biuM' and not (series.dtype == object and pd.api.types.infer_dtype(series) == 'string'):
+        return transform(series)
+    codes, uniques = pd.factorize(series)
+    if len(uniques) * 2 > len(series):
+        return transform(series)
+    mapped = transform(pd.Series(uniques, dtype=series.dtype))
+    result = pd.Series(mapped.to_numpy()[codes], index=series.index, dtype=mapped.dtype)
+    missing = codes == -1
+    if missing.any():
+        result[missing] = transform(series[missing]).to_numpy()
+    return result
+
+def _clean_text(series):
+    return text_values(series).str.replace('\n', ' ', regex=False).str.strip()
+
+def _clean_generic(series):
+    return text_values(series).replace('nan', '').str.replace('\n', ' ', regex=False).str.strip()
+
+def _clean_string(series):
+    return series.astype(str).replace('nan', '').replace('-', '').str.replace('\n', ' ', regex=False).str.strip()
+
+def _clean_categorical(series, allowed_values):
+    valid = series.notna() & text_values(series).str.strip().isin(allowed_values)
+    return series.where(valid, allowed_values[0] if allowed_values else '')
+
+def _parse_dates(series, input_format):
+    """Datas no formato configurado; numa coluna que mistura texto com datas de verdade do
+    Excel, as datas de verdade chegam da leitura como str(datetime) e também são aceitas."""
+    dates = pd.to_datetime(series, format=input_format, errors='coerce')
+    retry = dates.isna() & series.notna()
+    if retry.any():
+        dates[retry] = pd.to_datetime(series[retry], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+    return dates
+
+def _as_categorical(series, allowed_values):
+    """Categorical com os valores configurados como categorias, na ordem da configuração.
+
+    Valores aceitos que não estão literalmente na lista (ex.: o número 1 para a categoria
+    '1') viram categorias extras, para que nenhum valor se perca na conversão.
+    """
+    extras = [value for value in pd.unique(series) if value not in allowed_values]
+    return pd.Series(pd.Categorical(series, categories=list(allowed_values) + extras), index=series.index)
+
+def _clean_boolean(series):
+    return series.astype(str).str.strip().str.upper().isin(['X', 'SIM', 'TRUE', 'S'])
+
+# Período de treinamento: exatamente um separador 'a'/'à' entre as duas datas, como no
+# re.split de parse_training_period (que só aceita o período quando sobram duas partes)
+_TRAINING_PERIOD_PATTERN = re.compile(r'^([^aàAÀ]*?)\s*[aàAÀ]\s*([^aàAÀ]*)$')
+
+def _complete_year(dates, year_suffix):
+    """Completa 'dd/mm' com '/20' + `year_suffix` e troca 'dd/mm/aa' por 'dd/mm/20aa'."""
+    slashes = dates.str.count('/')
+    short_year = (slashes == 2) & (dates.str.len() - dates.str.rfind('/') - 1 == 2)
+    dates = dates.where(slashes != 1, dates + '/20' + year_suffix)
+    return dates.where(~short_year, dates.str[:6] + '20' + dates.str[-2:])
+
+def parse_training_periods(series):
+    """Versão vetorizada de parse_training_period para uma coluna inteira.
+
+    Retorna um DataFrame com as colunas 0 (início) e 1 (fim) em datetime64. Depois de
+    completar os anos nenhuma data que falha em '%d/%m/%Y' passa em '%d/%m/%y', então
+    basta uma chamada de pd.to_datetime para as datas de início e fim juntas.
+    """
+    text = text_values(series).str.strip()
+    empty = series.isna() | series.isin(['-', '', 'VAZIO', 'N-PREV.', 'nan']) | text.isin(['', '-', 'VAZIO', 'N-PREV.'])
+    parts = text.str.extract(_TRAINING_PERIOD_PATTERN)
+    year_suffix = parts[1].str[-2:]
+    dates = pd.to_datetime(
+        pd.concat([_complete_year(parts[0], year_suffix), _complete_year(parts[1], year_suffix)], ignore_index=True),
+        format='%d/%m/%Y', errors='coerce',
+    )
+    start = pd.Series(dates.to_numpy()[:len(series)], index=series.index)
+    end = pd.Series(dates.to_numpy()[len(series):], index=series.index)
+    valid = ~empty & start.notna() & end.notna()
+    return pd.DataFrame({0: start.where(valid), 1: end.where(valid)})
+
+def _clean_object_columns(df):
+    """Converte as colunas de texto lidas do Excel em str sem quebras de linha nem espaços nas pontas."""
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = _map_unique(df[col], _clean_text)
+    return df
+
+# Substituições aplicadas aos cabeçalhos de todas as abas, depois de normalizar os espaços
+HEADER_RENAMES = MappingProxyType({'PREFEITURA DE': 'PREFEITURAS DE'})
+
+def normalize_headers(columns, renames=HEADER_RENAMES):
+    """Cabeçalhos sem quebras de linha nem espaços repetidos, com as substituições de `renames`."""
+    columns = columns.str.replace('\n', ' ').str.strip().str.replace(r'\s+', ' ', regex=True)
+    for old, new in renames.items():
+        columns = columns.str.replace(old, new, regex=False)
+    return columns
+
+def _column_default(col_config):
+    """Valor de uma coluna configurada que não existe na aba."""
+    col_type = col_config.get('type', 'string')
+    if col_type in ['date', 'datetime']:
+        return pd.NaT
+    if col_type == 'boolean':
+        return False
+    if col_type in ['int', 'float']:
+        return 0
+    if col_type == 'categorical':
+        return col_config.get('values', [''])[0]
+    return ''
+
+def _column_converter(col, col_config):
+    """Função que converte a coluna `col` de um DataFrame, no lugar, conforme o tipo configurado."""
+    col_type = col_config['type']
+    if col_type == 'string':
+        def convert(df):
+            df[col] = _map_unique(df[col], _clean_string).astype(TEXT_DTYPE)
+    elif col_type == 'categorical':
+        allowed_values = col_config.get('values', [])
+        def convert(df):
+            df[col] = _as_categorical(_map_unique(df[col], lambda s: _clean_categorical(s, allowed_values)), allowed_values)
+    elif col_type in ['date', 'datetime']:
+        input_format = col_config.get('format', '%d/%m/%Y' if col_type == 'date' else '%d/%m/%Y %H:%M')
+        def convert(df):
+            df[col] = _map_unique(df[col], lambda s: _parse_dates(s, input_format))
+    elif col_type == 'boolean':
+        def convert(df):
+            df[col] = _map_unique(df[col], _clean_boolean)
+    elif col_type == 'int':
+        def convert(df):
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+    elif col_type == 'float':
+        def convert(df):
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0)
+    elif col_type == 'training_period':
+        def convert(df):
+            periods = parse_training_periods(df[col])
+            df[f'{col}_INÍCIO'] = periods[0]
+            df[f'{col}_FIM'] = periods[1]
+            df.drop(columns=[col], inplace=True)
+    elif col_type == 'phone':
+        # 'e164' e 'whatsapp': colunas que recebem o número em E.164 e o link wa.me do
+        # telefone, cacheadas com a aba; com 'keep_original' o telefone fica como foi
+        # digitado na planilha em vez de ir para o formato de exibição
+        e164_col = col_config.get('e164')
+        link_col = col_config.get('whatsapp')
+        keep_original = col_config.get('keep_original', False)
+        allow_empty = col_config.get('allow_empty', False)
+        def convert(df):
+            phones = normalize_phones(df[col])
+            if not keep_original:
+                df[col] = phones['display'].replace('', np.nan) if allow_empty else phones['display']
+            if e164_col:
+                df[e164_col] = phones['e164']
+            if link_col:
+                df[link_col] = phones['whatsapp']
+    elif col_type == 'email':
+        def convert(df):
+            df[col] = _map_unique(df[col], normalize_emails)
+    elif col_type == 'time':
+        def convert(df):
+            df[col] = _map_unique(df[col], normalize_times)
+    else:
+        return None
+    return convert
+
+class SheetPlan(namedtuple('SheetPlan', ['sheet_name', 'columns', 'output_columns', 'defaults', 'converters', 'header_renames', 'date_formats', 'stream'])):
+    """Plano de carga de uma aba, compilado uma vez a partir de SHEET_CONFIG.
+
+    - sheet_name: nome real da aba;
+    - columns: colunas esperadas, na ordem da configuração;
+    - output_columns: colunas que essas viram no resultado processado (ex.: um
+      'training_period' vira _INÍCIO e _FIM, um 'phone' com 'e164' ou 'whatsapp' ganha
+      essas colunas);
+    - defaults: valor de cada coluna esperada que não existe na aba;
+    - converters: funções que convertem o DataFrame no lugar, na ordem da configuração;
+    - header_renames: substituições aplicadas aos cabeçalhos lidos do Excel;
+    - date_formats: texto das colunas de data na exibição e na gravação ('dd/mm/aaaa' ou
+      'dd/mm/aaaa hh:mm').
+    - stream: se a aba é lida em blocos por iter_sheet_chunks em vez de inteira pelo
+      snapshot ('stream' na configuração da aba).
+    """
+    __slots__ = ()
+
+    def fill_missing(self, df):
+        """Cria no lugar as colunas esperadas ausentes em `df` e retorna os nomes delas."""
+        missing = [col for col in self.columns if col not in df.columns]
+        for col in missing:
+            df[col] = self.defaults[col]
+        return missing
+
+    def convert(self, df):
+        """Completa as colunas ausentes e aplica os conversores; altera e retorna `df`."""
+        self.fill_missing(df)
+        for convert in self.converters:
+            convert(df)
+        return df
+
+def compile_sheet_plan(sheet_name, sheet_config):
+    """Compila a configuração de uma aba (uma entrada de SHEET_CONFIG) em um SheetPlan."""
+    columns = sheet_config['columns']
+    converters = [_column_converter(col, col_config) for col, col_config in columns.items()]
+    output_columns = []
+    for col, col_config in columns.items():
+        if col_config['type'] == 'training_period':
+            output_columns += [f'{col}_INÍCIO', f'{col}_FIM']
+        else:
+            output_columns += [col] + [col_config[key] for key in ('e164', 'whatsapp') if col_config.get(key)]
+    return SheetPlan(
+        sheet_name=sheet_name,
+        columns=tuple(columns),
+        output_columns=tuple(dict.fromkeys(output_columns)),
+        defaults=MappingProxyType({col: _column_default(col_config) for col, col_config in columns.items()}),
+        converters=tuple(convert for convert in converters if convert is not None),
+        header_renames=HEADER_RENAMES,
+        date_formats=MappingProxyType({
+            col: '%d/%m/%Y' if col_config['type'] == 'date' else '%d/%m/%Y %H:%M'
+            for col, col_config in columns.items() if col_config['type'] in ['date', 'datetime']
+        }),
+        stream=sheet_config.get('stream', False),
+    )
+
+# Planos de todas as abas configuradas, por nome real da aba
+SHEET_PLANS = MappingProxyType({sheet_name: compile_sheet_plan(sheet_name, sheet_config) for sheet_name, sheet_config in SHEET_CONFIG.items()})
+
+def sheet_plan(sheet_name):
+    """Plano da aba (aceita o nome escrito de qualquer forma), ou None se ela não estiver em SHEET_CONFIG."""
+    return SHEET_PLANS.get(resolve_sheet_name(sheet_name))
+
+# Linhas do início da aba examinadas à procura do cabeçalho
+HEADER_SCAN_ROWS = 10
+
+# Cabeçalho encontrado por resolve_header: linha (a partir de 0) em que começa, quantas
+# linhas ocupa (1 ou 2) e os nomes das colunas já achatados, antes de normalize_headers
+HeaderLayout = namedtuple('HeaderLayout', ['row', 'depth', 'names'])
+
+def _trim_row(row):
+    row = list(row)
+    while row and row[-1] is None:
+        row.pop()
+    return row
+
+def _flatten_header_rows(top, bottom):
+    """Achata um cabeçalho de dois níveis: 'GRUPO' sobre 'INÍCIO' | 'FIM' vira 'GRUPO_INÍCIO', 'GRUPO_FIM'.
+
+    Células mescladas chegam com o valor só na primeira coluna; o grupo vale para as colunas
+    seguintes enquanto a linha de baixo tiver nomes. Uma coluna sem nada embaixo (mesclada
+    na vertical) fica só com o nome de cima.
+    """
+    names, group = [], None
+    for i in range(max(len(top), len(bottom))):
+        upper = top[i] if i < len(top) else None
+        lower = bottom[i] if i < len(bottom) else None
+        if upper is not None:
+            group = upper if lower is not None else None
+            names.append(f'{upper}_{lower}' if lower is not None else upper)
+        elif lower is not None:
+            names.append(f'{group}_{lower}' if group is not None else lower)
+        else:
+            group = None
+            names.append(None)
+    return _trim_row(names)
+
+def resolve_header(rows, plan):
+    """Acha o cabeçalho entre as primeiras linhas `rows` da aba (valores, como em iter_rows).
+
+    Cada linha, sozinha ou achatada com a seguinte, é pontuada pelo número de colunas
+    esperadas do plano que ela contém; vence a de maior pontuação (a primeira, no empate).
+    Retorna None quando o cabeçalho é a primeira linha, o caso normal lido direto pelo
+    pandas, ou quando nenhuma linha tem colunas esperadas.
+    """
+    if plan is None or not rows:
+        return None
+    expected = set(plan.columns)
+
+    def score(names):
+        headers = normalize_headers(pd.Index(_unique_headers(names), dtype=object), plan.header_renames)
+        return len(expected.intersection(headers))
+
+    first_row = _trim_row(rows[0])
+    best, best_score = None, score(first_row)
+    if best_score == len(expected):
+        return None
+    for row in range(len(rows)):
+        candidates = [(1, first_row if row == 0 else _trim_row(rows[row]))]
+        if row + 1 < len(rows):
+            candidates.append((2, _flatten_header_rows(_trim_row(rows[row]), _trim_row(rows[row + 1]))))
+        for depth, names in candidates:
+            candidate_score = score(names)
+            if candidate_score > best_score:
+                best, best_score = HeaderLayout(row, depth, names), candidate_score
+    return best
+
+# Cabeçalhos já resolvidos: {(aba, chave do cache da aba): HeaderLayout ou None}
+_HEADER_LAYOUTS = {}
+
+def _header_layout(sheet_name, file_path, read_rows):
+    """resolve_header da aba, guardado pela impressão digital da aba no arquivo.
+
+    `read_rows(n)` devolve as n primeiras linhas da aba; só é chamado quando a aba mudou.
+    """
+    plan = sheet_plan(sheet_name)
+    if plan is None:
+        return None
+    key = (plan.sheet_name, _sheet_cache_key(file_path, plan.sheet_name))
+    if key[1] is not None and key in _HEADER_LAYOUTS:
+        return _HEADER_LAYOUTS[key]
+    layout = resolve_header(read_rows(HEADER_SCAN_ROWS), plan)
+    if key[1] is not None:
+        _HEADER_LAYOUTS[key] = layout
+    return layout
+
+def _frame_digest(df):
+    """Hash do conteúdo de um DataFrame (valores, índice, colunas e tipos), ou None se não for hasheável."""
+    try:
+        row_hashes = pd.util.hash_pandas_object(df, index=True).values
+    except TypeError:
+        return None
+    hasher = hashlib.sha1(row_hashes.tobytes())
+    hasher.update(repr((list(df.columns), [str(dtype) for dtype in df.dtypes])).encode('utf-8'))
+    return hasher.hexdigest()
+
+def process_sheet_data(df, sheet_name):
+    """Processa os dados de uma aba com base na configuração definida.
+
+    Colunas 'date'/'datetime' saem como datetime64 (NaT quando vazias ou inválidas); o texto
+    'dd/mm/aaaa' só é gerado na exibição (display_frame) e na gravação do Excel. Colunas
+    'categorical' saem como pd.Categorical com os `values` configurados como categorias
+    (use category_counts para contar só as que aparecem) e colunas 'string' como
+    TEXT_DTYPE.
+
+    O resultado fica em memória por aba, identificado pelo conteúdo de `df`, para que
+    invalidate_sheet possa descartar só as entradas da aba que foi salva.
+    """
+    actual_sheet_name = resolve_sheet_name(sheet_name)
+    digest = _frame_digest(df)
+    if digest is not None:
+        cached = get_processed_frame(actual_sheet_name, digest)
+        if cached is not None:
+            return cached
+    result = _process_sheet_data(df, sheet_name)
+    if digest is not None:
+        put_processed_frame(actual_sheet_name, digest, result)
+    return result
+
+def _process_generic(df):
+    """Processamento das abas fora de SHEET_CONFIG: tudo vira texto limpo."""
+    for col in df.columns:
+        if df[col].dtype == 'datetime64[ns]':
+            df[col] = df[col].dt.strftime('%d/%m/%Y %H:%M:%S')
+        df[col] = _map_unique(df[col], _clean_generic)
+    return df
+
+def _process_sheet_data(df, sheet_name):
+    plan = sheet_plan(sheet_name)
+    if plan is None:
+        report('warning', f"Aba '{resolve_sheet_name(sheet_name)}' não configurada em SHEET_CONFIG. Usando processamento genérico.")
+        return _process_generic(df)
+    return plan.convert(df)
+
+def category_counts(series):
+    """value_counts sem as categorias que não aparecem na coluna.
+
+    Em colunas categóricas value_counts lista todas as categorias, inclusive as de contagem
+    zero, que não devem virar barras ou fatias vazias nos gráficos.
+    """
+    counts = series.value_counts()
+    return counts[counts > 0]
+
+def display_frame(df, sheet_name=None):
+    """Cópia de `df` com as colunas datetime64 em texto, para st.dataframe e exportações.
+
+    Usa 'dd/mm/aaaa hh:mm' nas colunas configuradas como 'datetime' na aba e 'dd/mm/aaaa'
+    nas demais; datas vazias viram ''.
+    """
+    plan = sheet_plan(sheet_name) if sheet_name else None
+    date_formats = plan.date_formats if plan is not None else {}
+    df = df.copy(deep=False)
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            date_format = date_formats.get(col, '%d/%m/%Y')
+            df[col] = df[col].dt.strftime(date_format).fillna('')
+    return df
+
+def as_dates(series, date_format='%d/%m/%Y'):
+    """Coluna de datas como datetime64: já tipadas passam direto, texto é convertido uma vez."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    return pd.to_datetime(series, format=date_format, errors='coerce')
+
+def as_date(value, date_format='%d/%m/%Y'):
+    """Valor de uma célula de data (datetime64 ou texto) como date para st.date_input; None se vazio."""
+    if isinstance(value, str):
+        value = pd.to_datetime(value.strip(), format=date_format, errors='coerce') if value.strip() else pd.NaT
+    return value.date() if isinstance(value, datetime) and pd.notna(value) else None
+
+# Versão do processamento; entra na chave do cache em disco para invalidar entradas
+# gravadas por versões anteriores de process_sheet_data ou de SHEET_CONFIG
+PROCESSING_VERSION = hashlib.sha1(f"10:{SHEET_CONFIG!r}".encode('utf-8')).hexdigest()[:8]
+
+# Hash do conteúdo já calculado por (caminho, tamanho, mtime)
+_CONTENT_HASHES = {}
+
+def workbook_fingerprint(file_path=EXCEL_FILE):
+    """Impressão digital do arquivo Excel: tamanho, mtime e hash do conteúdo.
+
+    O hash só é recalculado quando o tamanho ou o mtime mudam. Retorna None para
+    arquivos carregados via upload (BytesIO), que não usam o cache em disco.
+    """
+    if isinstance(file_path, BytesIO):
+        return None
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    content_hash = _CONTENT_HASHES.get(key)
+    if content_hash is None:
+        hasher = hashlib.sha1()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(chunk)
+        content_hash = hasher.hexdigest()[:16]
+        _CONTENT_HASHES[key] = content_hash
+    return f"{stat.st_size}-{stat.st_mtime_ns}-{content_hash}"
+
+_XLSX_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_XLSX_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+# Índice (abas e impressões digitais) já lido por arquivo
+_WORKBOOK_INDEXES = {}
+
+def _zip_part_path(target):
+    """Converte o destino de uma relação de xl/workbook.xml no caminho da parte dentro do zip."""
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join('xl', target))
+
+def _workbook_index(file_path):
+    """Lê apenas o diretório do zip do xlsx, xl/workbook.xml e suas relações.
+
+    Retorna um dicionário ordenado {aba: impressão digital}. A impressão digital combina o
+    CRC32 e o tamanho da parte da aba (xl/worksheets/sheetN.xml) com os CRCs das partes
+    compartilhadas que mudam o significado do XML da aba (sharedStrings e styles).
+    Nenhuma célula é interpretada.
+    """
+    key = _snapshot_key(file_path)
+    index = _WORKBOOK_INDEXES.get(key[0])
+    if index is not None and index[0] == key:
+        return index[1]
+    with zipfile.ZipFile(file_path) as zf:
+        infos = {info.filename: info for info in zf.infolist()}
+        workbook = ElementTree.fromstring(zf.read('xl/workbook.xml'))
+        rels = ElementTree.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    targets = {}
+    shared_crcs = []
+    for rel in rels:
+        part = _zip_part_path(rel.get('Target', ''))
+        targets[rel.get('Id')] = part
+        if rel.get('Type', '').endswith(('/sharedStrings', '/styles')) and part in infos:
+            shared_crcs.append(f"{infos[part].CRC:08x}")
+    shared_token = ''.join(sorted(shared_crcs))
+    sheets = {}
+    for sheet in workbook.iter(f'{{{_XLSX_MAIN_NS}}}sheet'):
+        info = infos.get(targets.get(sheet.get(f'{{{_XLSX_REL_NS}}}id')))
+        sheets[sheet.get('name')] = f"{info.CRC:08x}-{info.file_size}-{shared_token}" if info else None
+    _WORKBOOK_INDEXES[key[0]] = (key, sheets)
+    return sheets
+
+def workbook_sheet_names(file_path=EXCEL_FILE):
+    """Nomes das abas do arquivo, na ordem do Excel, sem interpretar as planilhas."""
+    return list(_workbook_index(file_path).keys())
+
+def sheet_fingerprints(file_path=EXCEL_FILE):
+    """Mapeia cada aba de SHEET_NAME_MAPPING presente no arquivo para a impressão digital da sua parte no zip.
+
+    Abas cujo XML (e as strings compartilhadas) não mudou mantêm a mesma impressão digital
+    depois que alguém salva o arquivo, então só as abas alteradas precisam ser reinterpretadas.
+    """
+    index = _workbook_index(file_path)
+    return {sheet: index[sheet] for sheet in SHEET_NAME_MAPPING.values() if index.get(sheet)}
+
+def _sheet_cache_key(file_path, sheet_name):
+    """Chave do cache em disco de uma aba: impressão digital da aba, ou do arquivo inteiro se o zip não puder ser lido."""
+    if isinstance(file_path, BytesIO):
+        return None
+    try:
+        fingerprint = sheet_fingerprints(file_path).get(sheet_name)
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError):
+        fingerprint = None
+    if fingerprint is None:
+        fingerprint = workbook_fingerprint(file_path)
+    return f"{PROCESSING_VERSION}-{fingerprint}"
+
+_CUSTOM_PROPS_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/custom-properties'
+_VT_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes'
+# Prefixo das propriedades personalizadas do xlsx com a versão de cada aba
+_VERSION_PREFIX = 'versao:'
+# Versões já lidas por arquivo
+_SHEET_VERSIONS = {}
+
+def sheet_versions(file_path=EXCEL_FILE):
+    """Versão de cada aba gravada pelo sistema, lida de docProps/custom.xml sem abrir as planilhas.
+
+    Cada gravação feita por save_excel, patch_excel_rows ou append_excel_rows incrementa a
+    versão da aba. Abas nunca gravadas pelo sistema ficam na versão 0.
+    """
+    key = _snapshot_key(file_path)
+    cached = _SHEET_VERSIONS.get(key[0])
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    versions = {}
+    with zipfile.ZipFile(file_path) as zf:
+        if 'docProps/custom.xml' in zf.namelist():
+            for prop in ElementTree.fromstring(zf.read('docProps/custom.xml')).iter(f'{{{_CUSTOM_PROPS_NS}}}property'):
+                name = prop.get('name', '')
+                value = prop.find(f'{{{_VT_NS}}}i4')
+                if name.startswith(_VERSION_PREFIX) and value is not None and value.text:
+                    versions[name[len(_VERSION_PREFIX):]] = int(value.text)
+    _SHEET_VERSIONS[key[0]] = (key, versions)
+    return versions
+
+def frame_version(df):
+    """Versão da aba no momento em que o DataFrame foi carregado (None se desconhecida)."""
+    return df.attrs.get('versao_aba')
+
+# Linhas por bloco na leitura em streaming (iter_sheet_chunks)
+STREAM_CHUNK_ROWS = 5000
+
+def _unique_headers(header_row):
+    """Cabeçalhos como os do pd.read_excel: vazios viram 'Unnamed: i' e repetidos ganham '.1', '.2'..."""
+    headers, seen = [], {}
+    for i, value in enumerate(header_row):
+        name = f'Unnamed: {i}' if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        seen.setdefault(name, 0)
+        headers.append(name)
+    return headers
+
+def iter_sheet_chunks(sheet_name, file_path=EXCEL_FILE, chunk_rows=STREAM_CHUNK_ROWS, usecols=None):
+    """Lê a aba em streaming e produz DataFrames de até `chunk_rows` linhas já processados.
+
+    Usa openpyxl em modo read_only com iter_rows(values_only=True): só o bloco atual existe
+    como DataFrame bruto, então o pico de memória depende do tamanho do bloco e não do
+    tamanho da aba. As colunas do plano de cada bloco passam pelos conversores da aba (veja
+    _stream_column); as demais ficam com os valores crus do Excel, já que o tipo delas só
+    pode ser inferido com a aba inteira (read_sheet_streaming faz isso no fim). O índice
+    continua a numeração das linhas da aba. Como no pd.read_excel, linhas vazias no
+    meio da aba são mantidas e as do fim descartadas. `usecols` tem o mesmo papel que em
+    _read_sheet.
+    """
+    actual_sheet_name = resolve_sheet_name(sheet_name)
+    plan = sheet_plan(actual_sheet_name)
+    file_path = resolve_excel_path(file_path)
+    if file_path is None:
+        return
+    if isinstance(file_path, BytesIO):
+        data = file_path.getvalue()
+    else:
+        WRITER.wait(file_path)
+        # Lê o arquivo de uma vez: o xlsx fica livre para ser trocado por atomic_save
+        # enquanto os blocos são consumidos
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    import openpyxl
+    wb = openpyxl.load_workbook(BytesIO(data), read_only=True, data_only=True)
+    try:
+        if actual_sheet_name not in wb.sheetnames:
+            report('error', f"Aba '{actual_sheet_name}' não encontrada no arquivo Excel. Abas disponíveis: {wb.sheetnames}")
+            return
+        rows = wb[actual_sheet_name].iter_rows(values_only=True)
+        first_rows = list(islice(rows, HEADER_SCAN_ROWS))
+        layout = _header_layout(actual_sheet_name, file_path, lambda n: first_rows[:n])
+        if layout is None:
+            header_row = _trim_row(first_rows[0]) if first_rows else []
+            data_start = 1
+        else:
+            header_row, data_start = layout.names, layout.row + layout.depth
+        rows = chain(first_rows[data_start:], rows)
+        headers = normalize_headers(pd.Index(_unique_headers(header_row), dtype=object), plan.header_renames if plan is not None else HEADER_RENAMES)
+        wanted = None if usecols is None else set(usecols)
+        positions = [i for i, header in enumerate(headers) if wanted is None or header in wanted]
+        headers = headers[positions]
+        if plan is None:
+            report('warning', f"Aba '{actual_sheet_name}' não configurada em SHEET_CONFIG. Usando processamento genérico.")
+        else:
+            missing_cols = [col for col in plan.columns if col not in headers]
+            if missing_cols:
+                report('warning', f"Colunas ausentes na aba '{actual_sheet_name}': {', '.join(missing_cols)}")
+
+        chunk, blank_rows, start = [], 0, 0
+        for row in rows:
+            values = [row[i] if i < len(row) else None for i in positions]
+            if all(value is None for value in values):
+                blank_rows += 1
+                continue
+            chunk.extend([[None] * len(positions)] * blank_rows)
+            blank_rows = 0
+            chunk.append(values)
+            if len(chunk) >= chunk_rows:
+                yield _process_chunk(chunk, headers, start, plan)
+                start += len(chunk)
+                chunk = []
+        if chunk:
+            yield _process_chunk(chunk, headers, start, plan)
+    finally:
+        wb.close()
+
+def _stream_column(series, col_type):
+    """Prepara a coluna configurada de um bloco (dtype object) para o conversor do plano.
+
+    O tipo inferido de um bloco depende só das linhas dele, então cada célula é tratada por
+    si: a coluna fica numérica (ou de datas) só se for assim no bloco inteiro, e no resto
+    vira texto limpo como nas colunas mistas de load_excel. Nas colunas de data, as células
+    que já são datas no Excel são mantidas e só as de texto são limpas.
+    """
+    if col_type in ['int', 'float', 'date', 'datetime']:
+        typed = series.infer_objects()
+        if typed.dtype.kind in ('iuf' if col_type in ['int', 'float'] else 'M'):
+            return typed
+    if col_type in ['date', 'datetime']:
+        is_text = series.map(lambda value: isinstance(value, str))
+        if is_text.any():
+            series = series.copy()
+            series[is_text] = _clean_text(series[is_text])
+        return series
+    return _map_unique(series, _clean_text)
+
+def _process_chunk(rows, headers, start, plan):
+    df = pd.DataFrame(rows, columns=headers, index=pd.RangeIndex(start, start + len(rows)), dtype=object)
+    if plan is None:
+        return df
+    config = SHEET_CONFIG[plan.sheet_name]['columns']
+    for col in plan.columns:
+        if col in df.columns:
+            df[col] = _stream_column(df[col], config[col]['type'])
+    return plan.convert(df)
+
+def read_sheet_streaming(sheet_name, file_path=EXCEL_FILE, chunk_rows=STREAM_CHUNK_ROWS, usecols=None):
+    """A aba inteira lida por iter_sheet_chunks; só os blocos já processados ficam em memória."""
+    chunks = list(iter_sheet_chunks(sheet_name, file_path, chunk_rows, usecols))
+    if not chunks:
+        return pd.DataFrame()
+    df = pd.concat(chunks)
+    plan = sheet_plan(sheet_name)
+    # Colunas fora do plano chegam cruas: o tipo é inferido com a aba inteira, como no
+    # pd.read_excel, e só então as de texto são limpas
+    for col in df.columns:
+        if plan is None or col not in plan.output_columns:
+            df[col] = df[col].infer_objects()
+            if df[col].dtype == 'object':
+                df[col] = _map_unique(df[col], _clean_text)
+    if plan is None:
+        return _process_generic(df)
+    # Blocos com categorias extras diferentes voltam como object no concat
+    config = SHEET_CONFIG[plan.sheet_name]['columns']
+    for col, col_config in config.items():
+        if col_config['type'] == 'categorical' and col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = _as_categorical(df[col].astype(object), col_config.get('values', []))
+    return df
+
+def load_processed_sheet(sheet_name, file_path=EXCEL_FILE, project=False, also_needed=()):
+    """Retorna a aba já processada por process_sheet_data.
+
+    O resultado é gravado em Parquet no cache em disco, identificado pela impressão digital
+    da aba dentro do xlsx; enquanto a aba não mudar, as próximas cargas (inclusive após
+    reiniciar o servidor ou após edições em outras abas) leem o Parquet em vez de
+    interpretar o xlsx com o openpyxl.
+
+    Com `project=True` (só para telas de consulta, que não gravam a aba de volta) o
+    resultado traz apenas as colunas configuradas em SHEET_CONFIG mais `also_needed`: do
+    Parquet só essas colunas são lidas e, sem cache, do xlsx só essas colunas viram
+    DataFrame. A aba projetada não é gravada no cache em disco, que guarda a aba inteira.
+
+    O DataFrame leva a versão da aba em `df.attrs['versao_aba']` (veja frame_version), usada
+    por save_excel e patch_excel_rows para detectar alterações feitas por outra sessão.
+    """
+    actual_sheet_name = resolve_sheet_name(sheet_name)
+    plan = sheet_plan(actual_sheet_name)
+    read_columns = result_columns = None
+    if project and plan is not None:
+        read_columns = list(dict.fromkeys(plan.columns + tuple(also_needed)))
+        result_columns = list(dict.fromkeys(plan.output_columns + tuple(also_needed)))
+    
+    resolved_path = resolve_excel_path(file_path)
+    if resolved_path is None:
+        return pd.DataFrame()
+    if not isinstance(resolved_path, BytesIO):
+        # Lê a versão com as gravações já enfileiradas por esta ou outras sessões
+        WRITER.wait(resolved_path)
+    # A versão é lida antes dos dados: se a aba mudar no meio, o carimbo fica antigo e a
+    # gravação é recusada, em vez de aceitar uma gravação baseada em dados antigos
+    version = None if isinstance(resolved_path, BytesIO) else sheet_versions(resolved_path).get(actual_sheet_name, 0)
+    cache_key = _sheet_cache_key(resolved_path, actual_sheet_name)
+    if cache_key is not None:
+        cached = read_cached_frame(actual_sheet_name, cache_key, columns=result_columns)
+        if cached is not None:
+            cached.attrs['versao_aba'] = version
+            return cached
+        if result_columns is None and not (plan is not None and plan.stream):
+            # Interpreta numa só passada todas as abas que mudaram, não só a pedida (menos
+            # as lidas em streaming)
+            stale_sheets = [sheet for sheet in SHEET_CONFIG if not SHEET_PLANS[sheet].stream and not has_cached_frame(sheet, _sheet_cache_key(resolved_path, sheet))]
+            get_workbook_snapshot(resolved_path, sheet_names=stale_sheets)
+    
+    if plan is not None and plan.stream:
+        df = read_sheet_streaming(sheet_name, resolved_path, usecols=read_columns)
+    else:
+        # Lê direto do snapshot: o cache de load_excel não conhece a versão do arquivo
+        df = process_sheet_data(_read_sheet(sheet_name, resolved_path, usecols=read_columns), sheet_name)
+    if result_columns is not None:
+        df = df[[col for col in result_columns if col in df.columns]]
+    # Só grava se a aba não mudou durante a leitura
+    elif cache_key is not None and not df.empty and _sheet_cache_key(resolved_path, actual_sheet_name) == cache_key:
+        write_cached_frame(actual_sheet_name, cache_key, df)
+    df.attrs['versao_aba'] = version
+    return df
+
+@shared_frame
+def process_excel_file(uploaded_file=None):
+    """Processa todas as abas do arquivo Excel e retorna um dicionário de DataFrames."""
+    processed_data = {}
+    file_path = uploaded_file if uploaded_file is not None else EXCEL_FILE
+    
+    try:
+        file_path = resolve_excel_path(file_path)
+        if file_path is None:
+            return processed_data
+        
+        # Só o diretório do zip é lido aqui; as abas que mudaram são interpretadas numa única passada
+        sheet_names = workbook_sheet_names(file_path)
+        report('debug', f"Abas disponíveis no arquivo Excel: {sheet_names}")
+        for sheet_name in SHEET_CONFIG.keys():
+            actual_sheet_name = resolve_sheet_name(sheet_name)
+            if actual_sheet_name not in sheet_names:
+                report('warning', f"Aba '{actual_sheet_name}' não encontrada no arquivo Excel. Abas disponíveis: {sheet_names}")
+                processed_data[actual_sheet_name] = pd.DataFrame()
+                continue
+            try:
+                processed_data[actual_sheet_name] = load_processed_sheet(sheet_name, file_path)
+            except Exception as e:
+                report('warning', f"Erro ao processar a aba {actual_sheet_name}: {str(e)}")
+                processed_data[actual_sheet_name] = pd.DataFrame()
+    except Exception as e:
+        report('error', f"Erro ao abrir o arquivo Excel: {str(e)}")
+        return processed_data
+    
+    return processed_data
+
+def sheet_cache(*sheet_names):
+    """Decorador para carregadores @shared_frame (ou @st.cache_data) das páginas: registra a
+    função como dependente das abas indicadas, para que invalidate_sheet limpe só ela.
+
+    Uso (acima de @shared_frame):
+        @sheet_cache('Instalados')
+        @shared_frame
+        def load_and_process_instalados(_file_path=EXCEL_FILE): ...
+    """
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        for sheet_name in sheet_names:
+            actual_sheet_name = resolve_sheet_name(sheet_name)
+            register_sheet_evictor(actual_sheet_name, name, func.clear)
+        return func
+    return decorator
+
+# process_excel_file depende de todas as abas configuradas
+sheet_cache(*SHEET_CONFIG)(process_excel_file)
+
+def frame_to_arrow(df):
+    """Serializa o DataFrame num buffer Arrow (formato IPC em stream), com os tipos do pandas."""
+    import pyarrow as pa
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+def frame_from_arrow(buffer):
+    """DataFrame de volta a partir de um buffer gerado por frame_to_arrow."""
+    import pyarrow as pa
+    # Colunas de texto voltam como string[pyarrow], como no cache em disco
+    with pd.option_context('mode.string_storage', 'pyarrow'):
+        return pa.ipc.open_stream(buffer).read_all().to_pandas()
+
+# Bytes do workbook no processo de trabalho, recebidos uma vez por processo (initargs)
+_WORKER_WORKBOOK = None
+
+def _init_sheet_worker(data):
+    global _WORKER_WORKBOOK
+    _WORKER_WORKBOOK = data
+
+def _process_sheet_in_worker(sheet_name):
+    """Lê e processa uma aba dos bytes do workbook; roda num processo de trabalho.
+
+    Retorna (buffer Arrow, mensagens emitidas). Só a aba pedida é interpretada: as demais
+    ficam com os outros processos.
+    """
+    file_path = BytesIO(_WORKER_WORKBOOK)
+    with collect_messages() as messages:
+        plan = sheet_plan(resolve_sheet_name(sheet_name))
+        if plan is not None and plan.stream:
+            df = read_sheet_streaming(sheet_name, file_path)
+        else:
+            get_workbook_snapshot(file_path, sheet_names=[sheet_name])
+            df = process_sheet_data(_read_sheet(sheet_name, file_path), sheet_name)
+    return frame_to_arrow(df), tuple(messages)
+
+def _available_cpus():
+    """Núcleos que este processo pode usar: a afinidade de CPU onde ela existe (Linux,
+    contêineres com CPUs limitadas), senão todos os da máquina."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def process_excel_file_parallel(uploaded_file=None, max_workers=None):
+    """Como process_excel_file, mas interpreta as abas em paralelo, em processos separados.
+
+    O arquivo é lido uma única vez e os bytes vão uma vez para cada processo de trabalho;
+    cada aba é interpretada (openpyxl) e processada (process_sheet_data) num processo do
+    ProcessPoolExecutor e volta como buffer Arrow (frame_to_arrow). Abas que já estão no
+    cache em disco são lidas dele, sem passar pelos processos, e as interpretadas agora são
+    gravadas nele. Com vários núcleos, a carga completa leva perto do tempo da aba mais lenta.
+
+    Os processos são iniciados com 'spawn' (só importam data_core, sem Streamlit): criar
+    processos por fork a partir do servidor, que tem várias threads, pode travar. Com um só
+    processo (um núcleo disponível, `max_workers=1` ou uma única aba a interpretar) as abas
+    são interpretadas aqui mesmo, como em process_excel_file: o spawn e a ida e volta em
+    Arrow só custariam tempo.
+    """
+    processed_data = {}
+    file_path = uploaded_file if uploaded_file is not None else EXCEL_FILE
+    try:
+        file_path = resolve_excel_path(file_path)
+        if file_path is None:
+            return processed_data
+        uploaded = isinstance(file_path, BytesIO)
+        if not uploaded:
+            WRITER.wait(file_path)
+        # Versões e chaves do cache são lidas antes dos bytes, como em load_processed_sheet
+        versions = {} if uploaded else sheet_versions(file_path)
+        sheet_names = workbook_sheet_names(file_path)
+        report('debug', f"Abas disponíveis no arquivo Excel: {sheet_names}")
+    except Exception as e:
+        report('error', f"Erro ao abrir o arquivo Excel: {str(e)}")
+        return processed_data
+
+    cache_keys = {}
+    pending = []
+    for sheet_name in SHEET_CONFIG.keys():
+        actual_sheet_name = resolve_sheet_name(sheet_name)
+        processed_data[actual_sheet_name] = pd.DataFrame()
+        if actual_sheet_name not in sheet_names:
+            report('warning', f"Aba '{actual_sheet_name}' não encontrada no arquivo Excel. Abas disponíveis: {sheet_names}")
+            continue
+        cache_key = cache_keys[actual_sheet_name] = _sheet_cache_key(file_path, actual_sheet_name)
+        cached = read_cached_frame(actual_sheet_name, cache_key) if cache_key is not None else None
+        if cached is not None:
+            cached.attrs['versao_aba'] = versions.get(actual_sheet_name, 0)
+            processed_data[actual_sheet_name] = cached
+        else:
+            pending.append(actual_sheet_name)
+    if not pending:
+        return processed_data
+
+    max_workers = min(len(pending), max_workers or _available_cpus())
+    if max_workers <= 1:
+        for actual_sheet_name in pending:
+            try:
+                processed_data[actual_sheet_name] = load_processed_sheet(actual_sheet_name, file_path)
+            except Exception as e:
+                report('warning', f"Erro ao processar a aba {actual_sheet_name}: {str(e)}")
+        return processed_data
+
+    try:
+        if uploaded:
+            data = file_path.getvalue()
+        else:
+            with open(file_path, 'rb') as f:
+                data = f.read()
+    except Exception as e:
+        report('error', f"Erro ao abrir o arquivo Excel: {str(e)}")
+        return processed_data
+
+    with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_sheet_worker, initargs=(data,)) as pool:
+        futures = {sheet_name: pool.submit(_process_sheet_in_worker, sheet_name) for sheet_name in pending}
+        for actual_sheet_name, future in futures.items():
+            try:
+                buffer, messages = future.result()
+                df = frame_from_arrow(buffer)
+            except Exception as e:
+                report('warning', f"Erro ao processar a aba {actual_sheet_name}: {str(e)}")
+                continue
+            replay(messages)
+            cache_key = cache_keys[actual_sheet_name]
+            # Só grava se a aba não mudou desde que a chave foi lida
+            if cache_key is not None and not df.empty and _sheet_cache_key(file_path, actual_sheet_name) == cache_key:
+                write_cached_frame(actual_sheet_name, cache_key, df)
+            df.attrs['versao_aba'] = None if uploaded else versions.get(actual_sheet_name, 0)
+            processed_data[actual_sheet_name] = df
+    return processed_data
+
+def invalidate_sheet(sheet_name):
+    """Descarta apenas as entradas de cache ligadas a uma aba.
+
+    Limpa a entrada de load_excel da aba, os resultados de process_sheet_data da aba e os
+    carregadores registrados com @sheet_cache para ela; as demais abas continuam em cache.
+    Deve ser chamada depois de save_excel, no lugar de st.cache_data.clear().
+    """
+    actual_sheet_name = resolve_sheet_name(sheet_name)
+    evict_sheet(actual_sheet_name)
+    if sheet_name != actual_sheet_name:
+        # load_excel pode ter sido chamado com o apelido da aba
+        load_excel.clear(sheet_name)
+
+def _dates_as_text(df, sheet_name):
+    """Converte as colunas de data configuradas para o texto usado por process_sheet_data.
+
+    As abas processadas guardam datas em datetime64; no Excel elas voltam a ser gravadas
+    como 'dd/mm/aaaa', que é o formato lido de volta na próxima carga.
+    """
+    df = df.reset_index(drop=True).copy()
+    plan = sheet_plan(sheet_name)
+    for col, date_format in (plan.date_formats.items() if plan is not None else []):
+        if col not in df.columns:
+            continue
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime(date_format).fillna('')
+        else:
+            df[col] = df[col].apply(lambda x: '' if pd.isna(x) else x.strftime(date_format) if isinstance(x, datetime) else str(x))
+    return df
+
+class VersionConflictError(Exception):
+    """A aba foi alterada por outra sessão depois que os dados foram carregados."""
+
+def _workbook_sheet_version(wb, sheet_name):
+    name = f"{_VERSION_PREFIX}{sheet_name}"
+    return wb.custom_doc_props[name].value if name in wb.custom_doc_props.names else 0
+
+def _bump_sheet_version(wb, sheet_name):
+    """Incrementa a versão da aba nas propriedades personalizadas do workbook."""
+    name = f"{_VERSION_PREFIX}{sheet_name}"
+    if name in wb.custom_doc_props.names:
+        wb.custom_doc_props[name].value += 1
+    else:
+        from openpyxl.packaging.custom import IntProperty
+        wb.custom_doc_props.append(IntProperty(name=name, value=1))
+
+def _check_sheet_version(wb, sheet_name, expected_version):
+    if expected_version is not None and _workbook_sheet_version(wb, sheet_name) != expected_version:
+        raise VersionConflictError(
+            f"A aba '{sheet_name}' foi alterada por outra pessoa depois que os dados foram carregados. "
+            "Recarregue a página e repita a alteração."
+        )
+
+def _replace_sheet(wb, sheet_name, df):
+    """Reescreve as linhas de dados da aba com o conteúdo do DataFrame.
+
+    Faixas de título e cabeçalhos de dois níveis achados por resolve_header (as linhas
+    acima da primeira linha de dados) ficam como estão: cada coluna do DataFrame é gravada
+    sob o cabeçalho de mesmo nome e as que ainda não existem entram no fim da linha do
+    cabeçalho. Com o cabeçalho na primeira linha, a aba é reescrita inteira.
+    """
+    from openpyxl.utils import get_column_letter
+    from openpyxl.utils.dataframe import dataframe_to_rows
+    # Verify or create sheet
+    if sheet_name not in wb.sheetnames:
+        wb.create_sheet(sheet_name)
+    
+    # Select the sheet
+    ws = wb[sheet_name]
+    headers, header_row, first_data_row = _worksheet_header(ws, sheet_name)
+    first_rewritten = 1 if header_row == 1 else first_data_row
+    
+    # delete_rows não move as mesclagens: as que alcançam as linhas reescritas ficariam
+    # sobre dados de outras linhas (e esconderiam os valores na próxima leitura)
+    for merged in list(ws.merged_cells.ranges):
+        if merged.max_row >= first_rewritten:
+            ws.unmerge_cells(str(merged))
+    
+    # Clear existing sheet content
+    ws.delete_rows(first_rewritten, ws.max_row)
+    
+    if header_row == 1:
+        # Add headers
+        ws.append(df.columns.tolist())
+        columns = list(range(1, len(df.columns) + 1))
+    else:
+        columns = []
+        for col in df.columns:
+            key = _header_key(col)
+            if key not in headers:
+                headers[key] = max(headers.values(), default=0) + 1
+                ws.cell(row=header_row, column=headers[key]).value = col
+            columns.append(headers[key])
+    
+    # Add data
+    for row_number, row in enumerate(dataframe_to_rows(df, index=False, header=False), start=first_data_row):
+        for col_idx, cell in zip(columns, row):
+            ws.cell(row=row_number, column=col_idx).value = str(cell).replace('NaT', '') if pd.notna(cell) else ''
+    
+    # Adjust column widths
+    for col in columns:
+        ws.column_dimensions[get_column_letter(col)].width = 20
+
+def _save_uploaded_workbook(wb, file_path):
+    """Grava o workbook de volta no arquivo carregado via upload (BytesIO)."""
+    output = BytesIO()
+    wb.save(output)
+    file_path.seek(0)
+    file_path.write(output.getvalue())
+
+def _after_sheet_saved(sheet_name, df=None):
+    """Cria a função chamada pelo gravador depois de salvar a aba.
+
+    Ela invalida os caches da aba e, se `df` for informado (write-through), grava `df` como
+    a entrada do cache da aba para a nova versão do arquivo.
+    """
+    def after_save(file_path):
+        invalidate_sheet(sheet_name)
+        if df is not None:
+            cache_key = _sheet_cache_key(file_path, sheet_name)
+            if cache_key is not None:
+                write_cached_frame(sheet_name, cache_key, df)
+    return after_save
+
+def _submit_write(file_path, operation, background):
+    """Envia a operação ao gravador. Em segundo plano retorna o Future; senão espera a gravação."""
+    future = WRITER.submit(file_path, operation)
+    if background:
+        # Invalida já, para que a próxima carga espere a gravação em vez de usar o cache antigo
+        invalidate_sheet(operation.sheet_name)
+        return future
+    future.result()
+    return True
+
+def save_excel(df, sheet_name, file_path=EXCEL_FILE, write_through=False, background=False):
+    """Salva um DataFrame em uma aba específica do arquivo Excel.
+
+    A gravação passa pelo gravador único (writer_utils.WRITER), que junta gravações em
+    rajada e troca o arquivo de forma atômica. Com background=True a função retorna na hora
+    um Future (ou False se a gravação nem pôde ser enfileirada) e o resultado aparece em
+    data_utils.show_write_status; senão espera a gravação e retorna True/False.
+
+    Com write_through=True, o DataFrame salvo passa a ser a entrada do cache da aba para
+    a nova versão do arquivo, então a próxima renderização não precisa interpretar o
+    Excel de novo. O DataFrame deve estar na forma devolvida por load_processed_sheet.
+
+    Se o DataFrame tiver versão (frame_version) e a aba tiver sido gravada por outra sessão
+    depois da carga, a gravação é recusada com VersionConflictError em vez de descartar as
+    linhas da outra pessoa.
+    """
+    import openpyxl
+    try:
+        actual_sheet_name = resolve_sheet_name(sheet_name)
+        expected_version = frame_version(df)
+        # O cache (write-through) guarda as datas em datetime64; o Excel recebe o texto
+        processed = df.reset_index(drop=True)
+        df = _dates_as_text(df, actual_sheet_name)
+        
+        # Handle uploaded file
+        if isinstance(file_path, BytesIO):
+            wb = openpyxl.load_workbook(file_path)
+            _replace_sheet(wb, actual_sheet_name, df)
+            _save_uploaded_workbook(wb, file_path)
+            if write_through:
+                invalidate_sheet(actual_sheet_name)
+            report('success', f"Dados salvos com sucesso na aba '{actual_sheet_name}'!")
+            return True
+        
+        # Check if file exists
+        if not os.path.exists(file_path):
+            report('warning', f"Arquivo não encontrado no caminho principal: {os.path.abspath(file_path)}")
+            file_path = FALLBACK_EXCEL_FILE
+            if not os.path.exists(file_path):
+                with file_lock(file_path):
+                    atomic_save(openpyxl.Workbook(), file_path)
+                report('debug', f"Novo arquivo Excel criado em: {os.path.abspath(file_path)}")
+        
+        def apply(wb):
+            _check_sheet_version(wb, actual_sheet_name, expected_version)
+            _replace_sheet(wb, actual_sheet_name, df)
+            _bump_sheet_version(wb, actual_sheet_name)
+        
+        operation = WriteOperation(
+            actual_sheet_name,
+            apply,
+            after_save=_after_sheet_saved(actual_sheet_name, processed if write_through else None),
+        )
+        result = _submit_write(file_path, operation, background)
+        if background:
+            return result
+        report('debug', f"Arquivo salvo em: {os.path.abspath(file_path)}")
+        report('success', f"Dados salvos com sucesso na aba '{actual_sheet_name}'!")
+        return True
+    except Exception as e:
+        report('error', f"Erro ao salvar a aba {actual_sheet_name}: {str(e)}")
+        return False
+
+def _header_key(header):
+    """Normaliza um cabeçalho da planilha do mesmo jeito que a leitura das abas."""
+    header = re.sub(r'\s+', ' ', str(header).replace('\n', ' ').strip())
+    return header.replace('PREFEITURA DE', 'PREFEITURAS DE')
+
+def _worksheet_header(ws, sheet_name):
+    """Cabeçalho da aba aberta para gravação, achado por resolve_header como na leitura.
+
+    Retorna ({cabeçalho normalizado: coluna}, linha do cabeçalho, primeira linha de dados),
+    com colunas e linhas numeradas a partir de 1 como no openpyxl. Colunas novas são
+    escritas na linha do cabeçalho (a de baixo, nos cabeçalhos de dois níveis).
+    """
+    layout = resolve_header(list(ws.iter_rows(max_row=HEADER_SCAN_ROWS, values_only=True)), sheet_plan(sheet_name))
+    if layout is None:
+        names, header_row = [cell.value for cell in ws[1]], 1
+    else:
+        names, header_row = layout.names, layout.row + layout.depth
+    headers = {_header_key(name): col_idx for col_idx, name in enumerate(names, start=1) if name is not None}
+    return headers, header_row, header_row + 1
+
+def _column_sample(ws, col_idx, min_row=2):
+    """Primeiro valor não vazio da coluna, usado para manter o tipo que a planilha já usa."""
+    for (value,) in ws.iter_rows(min_row=min_row, min_col=col_idx, max_col=col_idx, values_only=True):
+        if value is not None and value != '':
+            return value
+    return None
+
+def _typed_cell_value(value, col_config, sample):
+    """Converte um valor editado na página para o tipo da coluna na planilha.
+
+    Datas e booleanos seguem o que já existe na coluna (`sample`): se a planilha guarda
+    datas como data, grava data; se guarda texto 'dd/mm/aaaa', grava texto. Números são
+    gravados como números.
+    """
+    if value is None or (isinstance(value, str) and value.strip() == '') or (np.isscalar(value) and pd.isna(value)):
+        return None
+    col_type = col_config.get('type', 'string')
+    if col_type in ['date', 'datetime']:
+        date_format = col_config.get('format', '%d/%m/%Y' if col_type == 'date' else '%d/%m/%Y %H:%M')
+        parsed = pd.to_datetime(value, format=date_format, errors='coerce') if isinstance(value, str) else pd.to_datetime(value, errors='coerce')
+        if pd.isna(parsed):
+            return str(value)
+        return parsed.to_pydatetime() if isinstance(sample, datetime) else parsed.strftime(date_format)
+    if col_type == 'boolean':
+        flag = bool(value) if isinstance(value, (bool, np.bool_)) else str(value).strip().upper() in ['X', 'SIM', 'TRUE', 'S']
+        if isinstance(sample, bool):
+            return flag
+        if isinstance(sample, str) and sample.strip().upper() in ['X', 'SIM', 'S']:
+            return sample if flag else None
+        return str(flag)
+    if col_type in ['int', 'float']:
+        number = pd.to_numeric(value, errors='coerce')
+        if pd.isna(number):
+            return str(value)
+        return int(number) if col_type == 'int' else float(number)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value if isinstance(value, (int, float, datetime)) else str(value)
+
+def _patch_sheet(wb, sheet_name, patches, expected_cities=None):
+    """Aplica as alterações célula a célula na aba do workbook (veja patch_excel_rows).
+
+    `expected_cities` ({índice: CIDADE na carga}) é usado quando a aba mudou desde a carga:
+    se a linha do índice não tem mais essa CIDADE, a linha é procurada pela CIDADE.
+    """
+    if sheet_name not in wb.sheetnames:
+        raise ValueError(f"Aba '{sheet_name}' não encontrada no arquivo Excel. Abas disponíveis: {wb.sheetnames}")
+    ws = wb[sheet_name]
+    config = SHEET_CONFIG.get(sheet_name, {}).get('columns', {})
+    headers, header_row, first_data_row = _worksheet_header(ws, sheet_name)
+    samples = {}
+    city_rows = None
+    
+    for row_key, changes in patches:
+        if not isinstance(row_key, str) and expected_cities and expected_cities.get(row_key):
+            expected_city = str(expected_cities[row_key]).strip()
+            city_col = headers.get('CIDADE')
+            current_city = ws.cell(row=int(row_key) + first_data_row, column=city_col).value if city_col else None
+            if str(current_city if current_city is not None else '').replace('\n', ' ').strip() != expected_city:
+                # A linha mudou de posição (linhas incluídas ou apagadas por outra sessão)
+                row_key = expected_city
+        if isinstance(row_key, str):
+            if city_rows is None:
+                if 'CIDADE' not in headers:
+                    raise ValueError(f"Coluna 'CIDADE' não encontrada na aba '{sheet_name}'.")
+                city_rows = {}
+                city_col = headers['CIDADE']
+                for row_number, (value,) in enumerate(ws.iter_rows(min_row=first_data_row, min_col=city_col, max_col=city_col, values_only=True), start=first_data_row):
+                    if value is not None:
+                        city_rows.setdefault(str(value).replace('\n', ' ').strip(), row_number)
+            row_number = city_rows.get(row_key.strip())
+            if row_number is None:
+                raise VersionConflictError(f"Cidade '{row_key}' não encontrada na aba '{sheet_name}'.")
+        else:
+            row_number = int(row_key) + first_data_row
+            if row_number > ws.max_row:
+                raise ValueError(f"Linha {row_key} não encontrada na aba '{sheet_name}'.")
+        
+        for col, value in changes.items():
+            col_key = _header_key(col)
+            if col_key not in headers:
+                headers[col_key] = ws.max_column + 1
+                ws.cell(row=header_row, column=headers[col_key], value=col)
+            col_idx = headers[col_key]
+            if col_idx not in samples:
+                samples[col_idx] = _column_sample(ws, col_idx, first_data_row)
+            ws.cell(row=row_number, column=col_idx).value = _typed_cell_value(value, config.get(col_key, {}), samples[col_idx])
+
+def patch_excel_rows(sheet_name, patches, file_path=EXCEL_FILE, background=False, base=None):
+    """Atualiza apenas as células indicadas de uma aba, numa única leitura e gravação do arquivo.
+
+    `patches` é uma lista de pares (chave, {coluna: valor}). A chave é o índice da linha no
+    DataFrame carregado (linha do Excel = índice + primeira linha de dados, 2 quando o
+    cabeçalho é a primeira linha) ou, se for texto, o valor de CIDADE.
+    As demais células, os tipos e a formatação existentes são mantidos; colunas que ainda
+    não existem são criadas no fim do cabeçalho. Os caches da aba são invalidados.
+    `background` funciona como em save_excel.
+
+    `base` é o DataFrame carregado de onde vieram os índices. Se a aba foi gravada por outra
+    sessão depois da carga, as alterações são refeitas sobre as linhas atuais: cada linha é
+    reencontrada pela CIDADE que tinha na carga, e só as células alteradas são gravadas.
+    """
+    actual_sheet_name = resolve_sheet_name(sheet_name)
+    patches = [(row_key, dict(changes)) for row_key, changes in patches]
+    expected_version = frame_version(base) if base is not None else None
+    expected_cities = {}
+    if base is not None and 'CIDADE' in base.columns:
+        expected_cities = {row_key: base.at[row_key, 'CIDADE'] for row_key, _ in patches if not isinstance(row_key, str) and row_key in base.index}
+    try:
+        if isinstance(file_path, BytesIO):
+            import openpyxl
+            wb = openpyxl.load_workbook(file_path)
+            _patch_sheet(wb, actual_sheet_name, patches)
+            _save_uploaded_workbook(wb, file_path)
+            invalidate_sheet(actual_sheet_name)
+            report('success', f"Dados salvos com sucesso na aba '{actual_sheet_name}'!")
+            return True
+        
+        file_path = resolve_excel_path(file_path)
+        if file_path is None:
+            return False
+        def apply(wb):
+            stale = expected_version is not None and _workbook_sheet_version(wb, actual_sheet_name) != expected_version
+            _patch_sheet(wb, actual_sheet_name, patches, expected_cities if stale else None)
+            _bump_sheet_version(wb, actual_sheet_name)
+        
+        operation = WriteOperation(actual_sheet_name, apply, after_save=_after_sheet_saved(actual_sheet_name))
+        result = _submit_write(file_path, operation, background)
+        if background:
+            return result
+        report('debug', f"Arquivo salvo em: {os.path.abspath(file_path)}")
+        report('success', f"Dados salvos com sucesso na aba '{actual_sheet_name}'!")
+        return True
+    except Exception as e:
+        report('error', f"Erro ao atualizar a aba {actual_sheet_name}: {str(e)}")
+        return False
+
+def patch_excel_row(sheet_name, row_key, changes, file_path=EXCEL_FILE, background=False, base=None):
+    """Atualiza as colunas `changes` de uma única linha; veja patch_excel_rows."""
+    return patch_excel_rows(sheet_name, [(row_key, changes)], file_path, background, base)
+
+def _last_data_row(ws):
+    """Última linha com algum valor (linhas vazias com formatação no fim são ignoradas)."""
+    for row_number in range(ws.max_row, 1, -1):
+        if any(cell.value not in (None, '') for cell in ws[row_number]):
+            return row_number
+    return 1
+
+def _append_rows(wb, sheet_name, rows):
+    """Inclui as linhas ({coluna: valor}) depois da última linha com dados da aba."""
+    if sheet_name not in wb.sheetnames:
+        raise ValueError(f"Aba '{sheet_name}' não encontrada no arquivo Excel. Abas disponíveis: {wb.sheetnames}")
+    ws = wb[sheet_name]
+    config = SHEET_CONFIG.get(sheet_name, {}).get('columns', {})
+    headers, header_row, first_data_row = _worksheet_header(ws, sheet_name)
+    samples = {}
+    row_number = max(_last_data_row(ws), header_row)
+    for values in rows:
+        row_number += 1
+        for col, value in values.items():
+            col_key = _header_key(col)
+            if col_key not in headers:
+                headers[col_key] = ws.max_column + 1
+                ws.cell(row=header_row, column=headers[col_key], value=col)
+            col_idx = headers[col_key]
+            if col_idx not in samples:
+                samples[col_idx] = _column_sample(ws, col_idx, first_data_row)
+            ws.cell(row=row_number, column=col_idx).value = _typed_cell_value(value, config.get(col_key, {}), samples[col_idx])
+
+def append_excel_rows(sheet_name, rows, file_path=EXCEL_FILE, background=False):
+    """Inclui novas linhas no fim de uma aba, sem reescrever as existentes.
+
+    As linhas entram depois das linhas atuais do arquivo, então inclusões feitas ao mesmo
+    tempo por outras sessões são preservadas. `background` funciona como em save_excel.
+    """
+    actual_sheet_name = resolve_sheet_name(sheet_name)
+    rows = [dict(values) for values in rows]
+    try:
+        if isinstance(file_path, BytesIO):
+            import openpyxl
+            wb = openpyxl.load_workbook(file_path)
+            _append_rows(wb, actual_sheet_name, rows)
+            _save_uploaded_workbook(wb, file_path)
+            invalidate_sheet(actual_sheet_name)
+            report('success', f"Dados salvos com sucesso na aba '{actual_sheet_name}'!")
+            return True
+        
+        file_path = resolve_excel_path(file_path)
+        if file_path is None:
+            return False
+        def apply(wb):
+            _append_rows(wb, actual_sheet_name, rows)
+            _bump_sheet_version(wb, actual_sheet_name)
+        
+        operation = WriteOperation(actual_sheet_name, apply, after_save=_after_sheet_saved(actual_sheet_name))
+        result = _submit_write(file_path, operation, background)
+        if background:
+            return result
+        report('debug', f"Arquivo salvo em: {os.path.abspath(file_path)}")
+        report('success', f"Dados salvos com sucesso na aba '{actual_sheet_name}'!")
+        return True
+    except Exception as e:
+        report('error', f"Erro ao incluir linhas na aba {actual_sheet_name}: {str(e)}")
+        return False
+
+def append_excel_row(sheet_name, values, file_path=EXCEL_FILE, background=False):
+    """Inclui uma linha no fim da aba; veja append_excel_rows."""
+    return append_excel_rows(sheet_name, [values], file_path, background)
@@ -0,0 +1,90 @@
+import logging
+from collections import namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Níveis das mensagens da camada de dados, na ordem de gravidade. 'debug' são os avisos de
+# diagnóstico ("[DEBUG] ..." na interface) e 'help' é um texto em Markdown com orientações
+# para o usuário, mostrado junto de um erro.
+MESSAGE_LEVELS = ('debug', 'help', 'info', 'success', 'warning', 'error')
+
+_LOG_LEVELS = {
+    'debug': logging.DEBUG, 'help': logging.INFO, 'info': logging.INFO,
+    'success': logging.INFO, 'warning': logging.WARNING, 'error': logging.ERROR,
+}
+
+_LOGGER = logging.getLogger('python_graphs_CIN.data')
+
+class DataMessage(namedtuple('DataMessage', ['level', 'text'])):
+    """Aviso ou erro emitido pela camada de dados (data_core), sem depender de interface."""
+    __slots__ = ()
+
+class MessageLog(list):
+    """Lista de DataMessage coletadas por collect_messages."""
+
+    @property
+    def errors(self):
+        return [message for message in self if message.level == 'error']
+
+    @property
+    def warnings(self):
+        return [message for message in self if message.level == 'warning']
+
+    def has_errors(self):
+        return any(message.level == 'error' for message in self)
+
+_CURRENT_LOG = ContextVar('python_graphs_CIN_message_log', default=None)
+_sink = None
+
+def set_message_sink(sink):
+    """Define a função que recebe as mensagens emitidas fora de collect_messages.
+
+    A interface registra aqui o seu renderizador (veja data_utils); sem destino registrado,
+    as mensagens vão para o logging, no logger 'python_graphs_CIN.data'.
+    """
+    global _sink
+    _sink = sink
+
+def report(level, text):
+    """Emite uma mensagem da camada de dados.
+
+    Dentro de collect_messages a mensagem só é guardada no MessageLog; fora dele vai para o
+    destino registrado com set_message_sink ou, sem destino, para o logging.
+    """
+    if level not in _LOG_LEVELS:
+        raise ValueError(f"Nível de mensagem desconhecido: {level}")
+    message = DataMessage(level, text)
+    log = _CURRENT_LOG.get()
+    if log is not None:
+        log.append(message)
+    elif _sink is not None:
+        _sink(message)
+    else:
+        _LOGGER.log(_LOG_LEVELS[level], text)
+
+def replay(messages):
+    """Emite de novo mensagens já coletadas (ex.: as guardadas junto de um resultado em cache)."""
+    for message in messages:
+        report(message.level, message.text)
+
+@contextmanager
+def collect_messages():
+    """Guarda as mensagens emitidas no bloco num MessageLog em vez de entregá-las ao destino.
+
+    Uso:
+        with collect_messages() as messages:
+            df = load_processed_sheet('Instalados')
+        if messages.has_errors(): ...
+    """
+    log = MessageLog()
+    token = _CURRENT_LOG.set(log)
+    try:
+        yield log
+    finally:
+        _CURRENT_LOG.reset(token)
+
+def capture(func, *args, **kwargs):
+    """Chama `func` coletando as mensagens; retorna (resultado, MessageLog)."""
+    with collect_messages() as messages:
+        result = func(*args, **kwargs)
+    return result, messages
@@ -1,9 +1,11 @@
-import plotly.express as px
 import pandas as pd
 import calendar
 
+# plotly.express é importado dentro de cada função para não pesar na importação do módulo
+
 def plot_max_min_production(df, months):
     """Gráfico de linhas para produção máxima e mínima por mês."""
+    import plotly.express as px
     if not all(col in df.columns for col in months + ['CIDADE']):
         return None
     
@@ -33,6 +35,7 @@ def plot_max_min_production(df, months):
 
 def plot_total_production(df, months):
     """Gráfico de colunas para produção geral por mês."""
+    import plotly.express as px
     if not all(col in df.columns for col in months):
         return None
     
@@ -45,6 +48,7 @@ def plot_total_production(df, months):
 
 def plot_training_pie(df):
     """Gráfico de pizza para total de cidades treinadas vs não treinadas."""
+    import plotly.express as px
     if 'REALIZOU TREINAMENTO?' not in df.columns:
         return None
     
@@ -57,6 +61,7 @@ def plot_training_pie(df):
 
 def plot_city_production_bar(city_df, months, city):
     """Gráfico de colunas para produção mês a mês de uma cidade."""
+    import plotly.express as px
     if not all(col in city_df.columns for col in months):
         return None
     
@@ -69,6 +74,7 @@ def plot_city_production_bar(city_df, months, city):
 
 def plot_city_production_line(city_df, months, city):
     """Gráfico de linhas para produção mensal de uma cidade."""
+    import plotly.express as px
     if not all(col in city_df.columns for col in months):
         return None
     
@@ -83,6 +89,7 @@ def plot_city_production_line(city_df, months, city):
 
 def plot_daily_avg_pie(city_df, months, city):
     """Gráfico de pizza para média de produção diária por mês."""
+    import plotly.express as px
     if not all(col in city_df.columns for col in months):
         return None
     
@@ -110,6 +117,7 @@ def plot_daily_avg_pie(city_df, months, city):
 
 def plot_compare_total(df, months, selected_city):
     """Gráfico de linhas comparando produção total."""
+    import plotly.express as px
     if not all(col in df.columns for col in months + ['CIDADE']):
         return None
     
@@ -136,6 +144,7 @@ def plot_compare_total(df, months, selected_city):
 
 def plot_compare_month(df, selected_month, selected_city):
     """Gráfico de barras para comparação no mês selecionado."""
+    import plotly.express as px
     if selected_month not in df.columns or 'CIDADE' not in df.columns:
         return None
     
@@ -161,6 +170,7 @@ def plot_compare_month(df, selected_month, selected_city):
 
 def plot_compare_cities_bar(compare_df, months, selected_cities):
     """Gráfico de colunas para comparação de cidades."""
+    import plotly.express as px
     if not all(col in compare_df.columns for col in months + ['CIDADE']):
         return None
     
@@ -178,6 +188,7 @@ def plot_compare_cities_bar(compare_df, months, selected_cities):
 
 def plot_compare_cities_line(compare_df, months, selected_cities):
     """Gráfico de linhas para comparação de cidades."""
+    import plotly.express as px
     if not all(col in compare_df.columns for col in months + ['CIDADE']):
         return None
     
@@ -197,6 +208,7 @@ def plot_compare_cities_line(compare_df, months, selected_cities):
 
 def plot_compare_cities_daily_avg(compare_df, months, selected_cities):
     """Gráfico de barras para média diária de produção por cidade."""
+    import plotly.express as px
     if not all(col in compare_df.columns for col in months + ['CIDADE']):
         return None
     
@@ -226,6 +238,7 @@ def plot_compare_cities_daily_avg(compare_df, months, selected_cities):
 
 def plot_compare_cities_month(compare_df, selected_month, selected_cities):
     """Gráfico de barras para comparação de cidades em um mês específico."""
+    import plotly.express as px
     if selected_month not in compare_df.columns or 'CIDADE' not in compare_df.columns:
         return None
     
@@ -238,6 +251,7 @@ def plot_compare_cities_month(compare_df, selected_month, selected_cities):
 
 def plot_compare_dates_bar(filtered_df, months, filter_type):
     """Gráfico de colunas para comparação por datas."""
+    import plotly.express as px
     if not all(col in filtered_df.columns for col in months + ['CIDADE']):
         return None
     
@@ -255,6 +269,7 @@ def plot_compare_dates_bar(filtered_df, months, filter_type):
 
 def plot_compare_dates_line(filtered_df, months, filter_type):
     """Gráfico de linhas para comparação por datas."""
+    import plotly.express as px
     if not all(col in filtered_df.columns for col in months + ['CIDADE']):
         return None
     
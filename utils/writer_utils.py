@@ -0,0 +1,171 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+# Trava entre processos: fcntl no Linux/macOS, msvcrt no Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+_LOGGER = logging.getLogger('python_graphs_CIN.writer')
+
+# Janela para juntar gravações em rajada num único load/save do arquivo
+DEBOUNCE_SECONDS = 0.2
+# Espera máxima de uma gravação enquanto outras continuam chegando
+MAX_DELAY_SECONDS = 1.0
+
+def atomic_save(wb, file_path):
+    """Salva o workbook num arquivo temporário ao lado do destino e o troca com os.replace.
+
+    Quem lê o arquivo vê sempre a versão anterior completa ou a nova completa, nunca um
+    xlsx pela metade.
+    """
+    directory, name = os.path.split(os.path.abspath(file_path))
+    tmp_path = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        wb.save(tmp_path)
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+@contextmanager
+def file_lock(file_path):
+    """Trava exclusiva entre processos para o ciclo load/save do arquivo.
+
+    A trava fica num arquivo .lock ao lado do xlsx, já que atomic_save troca o próprio
+    xlsx por outro arquivo a cada gravação.
+    """
+    directory, name = os.path.split(os.path.abspath(file_path))
+    with open(os.path.join(directory, f".{name}.lock"), 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+class WriteOperation:
+    """Alteração de uma aba aplicada pelo gravador sobre o workbook aberto.
+
+    `apply(wb)` altera o workbook (e pode recusar a alteração levantando uma exceção, ex.:
+    conflito de versão); `after_save(file_path)` roda depois que o arquivo foi gravado
+    (ex.: invalidar caches).
+    """
+
+    def __init__(self, sheet_name, apply, after_save=None):
+        self.sheet_name = sheet_name
+        self.apply = apply
+        self.after_save = after_save
+
+class WorkbookWriter:
+    """Thread única que grava o arquivo Excel.
+
+    As operações entram numa fila e cada chamada de `submit` devolve um Future. Operações
+    que chegam dentro de DEBOUNCE_SECONDS umas das outras são aplicadas, em ordem, num
+    único load_workbook/save por arquivo, feito sob file_lock e gravado com atomic_save.
+    """
+
+    def __init__(self, debounce=DEBOUNCE_SECONDS, max_delay=MAX_DELAY_SECONDS):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._pending = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def submit(self, file_path, operation):
+        """Enfileira uma operação sobre o arquivo e retorna um Future que resolve em True."""
+        file_path = os.path.abspath(file_path)
+        future = Future()
+        with self._condition:
+            self._pending[file_path] = self._pending.get(file_path, 0) + 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="excel-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((file_path, operation, future))
+        return future
+
+    def wait(self, file_path, timeout=None):
+        """Espera as gravações pendentes do arquivo terminarem. Retorna False se o tempo acabar."""
+        file_path = os.path.abspath(file_path)
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending.get(file_path), timeout)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+            while True:
+                timeout = min(self.debounce, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            by_file = {}
+            for file_path, operation, future in batch:
+                by_file.setdefault(file_path, []).append((operation, future))
+            for file_path, items in by_file.items():
+                try:
+                    self._write(file_path, items)
+                finally:
+                    with self._condition:
+                        self._pending[file_path] -= len(items)
+                        self._condition.notify_all()
+
+    def _write(self, file_path, items):
+        import openpyxl
+        applied = []
+        try:
+            with file_lock(file_path):
+                wb = openpyxl.load_workbook(file_path)
+                for operation, future in items:
+                    try:
+                        operation.apply(wb)
+                        applied.append(operation)
+                    except Exception as e:
+                        future.set_exception(e)
+                if applied:
+                    atomic_save(wb, file_path)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # after_save só da última operação aplicada em cada aba; uma falha aqui (ex.: ao
+        # invalidar ou gravar o cache) não desfaz a gravação do arquivo, mas fica no log
+        last_by_sheet = {operation.sheet_name: operation for operation in applied}
+        for operation in last_by_sheet.values():
+            if operation.after_save is not None:
+                try:
+                    operation.after_save(file_path)
+                except Exception:
+                    _LOGGER.exception(
+                        "Falha depois de gravar a aba '%s' em %s; o arquivo foi salvo, mas os "
+                        "caches da aba podem estar desatualizados", operation.sheet_name, file_path,
+                    )
+        for _, future in items:
+            if not future.done():
+                future.set_result(True)
+
+# Gravador compartilhado por todas as sessões do servidor
+WRITER = WorkbookWriter()